@@ -10,11 +10,37 @@ from pathlib import Path
 # 添加父目录到路径
 sys.path.insert(0, str(Path(__file__).parent))
 
-from market_data_loader import MarketDataLoader, create_default_loader, convert_raw_trades_to_market_format
+from market_data_loader import MarketDataLoader, create_default_loader
+import numpy as np
 import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 
 
+def _update_price_stats(stats, batch):
+    """
+    用一个批次更新价格统计 (count, sum, min, max)
+    
+    Args:
+        stats: 当前累计值
+        batch: 策略格式的 RecordBatch
+        
+    Returns:
+        更新后的 (count, sum, min, max)
+    """
+    count, price_sum, price_min, price_max = stats
+    if batch.num_rows == 0:
+        return stats
+    
+    prices = batch.column('price').to_numpy()
+    return (
+        count + len(prices),
+        price_sum + float(prices.sum()),
+        min(price_min, float(prices.min())),
+        max(price_max, float(prices.max())),
+    )
+
+
 def demo_basic_usage():
     """基础使用演示"""
     print("=" * 80)
@@ -43,33 +69,33 @@ def demo_basic_usage():
         print("\n⚠️ 未找到市场信息")
         return
     
-    # 加载交易数据
-    print("\n⏳ 加载交易数据...")
+    # 按批次流式读取交易数据，峰值内存只与批大小相关
+    print("\n⏳ 流式加载交易数据...")
     try:
-        trades = loader.get_market_trades(market_id)
+        first_batch = None
+        stats = (0, 0.0, float('inf'), float('-inf'))
         
-        if trades.empty:
+        for batch in loader.iter_market_trades(market_id):
+            if first_batch is None:
+                first_batch = batch
+            stats = _update_price_stats(stats, batch)
+        
+        count, price_sum, price_min, price_max = stats
+        if count == 0:
             print("  ⚠️ 未找到交易数据")
             return
         
-        print(f"\n✅ 加载成功:")
-        print(f"  记录数: {len(trades):,}")
-        print(f"  列名: {list(trades.columns)}")
+        print(f"\n📈 策略格式数据:")
+        print(f"  记录数: {count:,}")
+        print(f"  列名: {first_batch.schema.names}")
         
-        # 转换为策略格式
-        market_trades = convert_raw_trades_to_market_format(trades)
-        print(f"\n📈 转换后的数据:")
-        print(f"  记录数: {len(market_trades):,}")
-        print(f"  列名: {list(market_trades.columns)}")
+        print(f"\n  价格统计:")
+        print(f"    平均: {price_sum / count:.4f}")
+        print(f"    最小: {price_min:.4f}")
+        print(f"    最大: {price_max:.4f}")
         
-        if not market_trades.empty:
-            print(f"\n  价格统计:")
-            print(f"    平均: {market_trades['price'].mean():.4f}")
-            print(f"    最小: {market_trades['price'].min():.4f}")
-            print(f"    最大: {market_trades['price'].max():.4f}")
-            
-            print(f"\n  前5行:")
-            print(market_trades.head().to_string())
+        print(f"\n  前5行:")
+        print(first_batch.slice(0, 5).to_pandas().to_string())
         
     except Exception as e:
         print(f"  ❌ 错误: {e}")
@@ -99,6 +125,28 @@ def demo_cache_mechanism():
     print("  第二次加载会直接从本地缓存读取，速度更快")
 
 
+def _load_market_summary(loader, market_id):
+    """
+    加载单个市场的信息和交易统计（在工作线程中运行）
+    
+    信息查询完成后立即开始读取该市场的交易，不等待其他市场。
+    
+    Returns:
+        (info, stats, error)
+    """
+    info = loader.get_market_info(market_id)
+    if not info:
+        return None, None, None
+    
+    try:
+        stats = (0, 0.0, float('inf'), float('-inf'))
+        for batch in loader.iter_market_trades(market_id, columns=['price']):
+            stats = _update_price_stats(stats, batch)
+        return info, stats, None
+    except Exception as e:
+        return info, None, e
+
+
 def demo_multiple_markets():
     """多市场加载演示"""
     print("\n" + "=" * 80)
@@ -114,32 +162,46 @@ def demo_multiple_markets():
         "0xf86032dc2a893df839b93c7868e6cb206db8d5f083c2861554e7fd1deab7dd52",  # Biden inauguration 2021
     ]
     
-    results = []
+    # 先在主线程加载共享的 markets 元数据，避免各线程重复读取
+    loader._load_markets()
+    
+    # 各市场的 SMB 读取是 I/O 密集型，并发执行
+    with ThreadPoolExecutor(max_workers=min(8, len(market_ids))) as executor:
+        summaries = list(executor.map(lambda m: _load_market_summary(loader, m), market_ids))
     
-    for i, market_id in enumerate(market_ids, 1):
+    # 按列收集汇总结果，数值列预分配
+    results = {
+        'market_id': [],
+        'question': [],
+        'trades_count': np.empty(len(market_ids), dtype=np.int64),
+        'avg_price': np.empty(len(market_ids), dtype=np.float64),
+    }
+    n = 0
+    
+    for i, (market_id, (info, stats, error)) in enumerate(zip(market_ids, summaries), 1):
         print(f"\n{i}. 加载 {market_id[:30]}...")
         
-        info = loader.get_market_info(market_id)
         if info:
             print(f"   Q: {info.get('question', 'Unknown')[:50]}...")
             print(f"   Volume: {info.get('volume', 0):,.0f}")
             
-            try:
-                trades = loader.get_market_trades(market_id)
-                if not trades.empty:
-                    market_trades = convert_raw_trades_to_market_format(trades)
-                    results.append({
-                        'market_id': market_id[:20],
-                        'question': info.get('question', 'Unknown')[:30],
-                        'trades_count': len(market_trades),
-                        'avg_price': market_trades['price'].mean() if not market_trades.empty else 0
-                    })
-            except Exception as e:
-                print(f"   ⚠️ 加载失败: {e}")
+            if error is not None:
+                print(f"   ⚠️ 加载失败: {error}")
+                continue
+            
+            count, price_sum, _, _ = stats
+            if count > 0:
+                results['market_id'].append(market_id[:20])
+                results['question'].append(info.get('question', 'Unknown')[:30])
+                results['trades_count'][n] = count
+                results['avg_price'][n] = price_sum / count
+                n += 1
     
     print("\n📊 汇总:")
-    if results:
-        df = pd.DataFrame(results)
+    if n > 0:
+        results['trades_count'] = results['trades_count'][:n]
+        results['avg_price'] = results['avg_price'][:n]
+        df = pd.DataFrame(results, copy=False)
         print(df.to_string(index=False))
 
 
@@ -155,7 +217,7 @@ def demo_time_filter():
     
     # 加载全部数据
     print(f"\n加载全部数据...")
-    all_trades = loader.get_market_trades(market_id)
+    all_trades = loader.get_market_trades(market_id, columns=['block_number'])
     print(f"  总记录数: {len(all_trades):,}")
     
     # 模拟时间过滤（实际应根据数据中的时间戳）
@@ -204,7 +266,8 @@ def main():
     print("=" * 80)
     print("\n使用建议:")
     print("  1. 首次加载较慢（从SMB读取），后续从本地缓存很快")
-    print("  2. 使用 convert_raw_trades_to_market_format() 转换数据格式")
+    print("  2. 使用 loader.get_converted_trades() 获取策略格式数据（转换结果会缓存）")
+    print("     大市场可用 loader.iter_market_trades() 按批次流式处理")
     print("  3. 缓存位置: ~/.cache/polymarket/")
     print("  4. 定期清理缓存: loader.clear_cache()")
 
@@ -0,0 +1,25 @@
+"""
+00002 _njit.py - Numba 可选依赖封装
+
+numba 已安装时导出 numba.njit / numba.prange；
+未安装时导出同名的空实现，被装饰函数按普通 Python/NumPy 代码运行。
+"""
+
+try:
+    from numba import njit, prange
+    
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+    
+    prange = range
+    
+    def njit(*args, **kwargs):
+        """numba.njit 的空实现，支持 @njit 和 @njit(...) 两种写法"""
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+        
+        def decorator(func):
+            return func
+        
+        return decorator
@@ -5,8 +5,50 @@ Main entry point for the unified Streamlit application.
 """
 
 import streamlit as st
-from components import init_state, get_state, set_state
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+from plotly.subplots import make_subplots
+from datetime import datetime
+from components import init_state, get_state, set_state, clear_state
 from components.common import render_header, render_navbar, render_footer, PAGES
+from components.state_manager import debug_state
+from strategy_kernels import compute_pnl, warmup_kernels
+from order_pricing import warmup_kernels as warmup_pricing_kernels
+from risk_management import warmup_kernels as warmup_risk_kernels
+from ui.skill_manager import SkillManager, SkillStatus
+from ui.param_config import ParamConfig
+from ui.result_charts import ResultCharts, create_mock_data
+from typing import Callable, Dict, List
+
+# Skill card markup, filled with str.format for each skill
+SKILL_CARD_TEMPLATE = (
+    '<div style="border: 1px solid #ddd; border-radius: 8px; padding: 15px; '
+    'margin: 5px; background-color: {background};">'
+    '<div style="font-size: 32px; text-align: center;">{emoji}</div>'
+    '<div style="font-weight: bold; text-align: center;">{name}</div>'
+    '<div style="font-size: 12px; color: #666; text-align: center;">v{version}</div>'
+    '<div style="text-align: center; margin-top: 5px;">{status_icon} {status}</div>'
+    '</div>'
+)
+
+# Status value -> icon
+SKILL_STATUS_ICONS = {
+    "active": "🟢",
+    "inactive": "⚪",
+    "error": "🔴",
+    "not_installed": "⚫",
+}
+
+# Mock questions for the backtest runner
+MOCK_QUESTIONS = [
+    {"title": "Will Trump win 2024?", "category": "Politics", "liquidity": 1500000, "volume": 50000},
+    {"title": "Will ETH reach $5k?", "category": "Crypto", "liquidity": 800000, "volume": 30000},
+    {"title": "Will Fed cut rates in Q1?", "category": "Politics", "liquidity": 1200000, "volume": 45000},
+]
+
+# Lowercased titles, computed once for the question search
+MOCK_QUESTION_TITLES_LC = tuple(q["title"].lower() for q in MOCK_QUESTIONS)
 
 # Page configuration - must be first st command
 st.set_page_config(
@@ -29,72 +71,119 @@ def navigate_to(page_key: str) -> None:
         st.rerun()
 
 
+@st.cache_resource
+def _get_skill_manager():
+    """
+    Get the shared SkillManager instance.
+    
+    Skill discovery scans the skills directory and parses YAML metadata,
+    so it runs once per server process instead of on every rerun.
+    """
+    return SkillManager()
+
+
+@st.cache_resource
+def _warmup_kernels() -> None:
+    """
+    Compile the Numba kernels once per server process.
+    
+    Covers the chart kernels, the order pricing kernel and the risk
+    predicates, keeping the JIT cost off the first user-visible render.
+    """
+    warmup_kernels()
+    warmup_pricing_kernels()
+    warmup_risk_kernels()
+
+
+@st.cache_data(ttl=60)
+def _filter_skill_ids(search_query: str, selected_category: str) -> List[str]:
+    """
+    Filter skills by search query and category.
+    
+    Returns skill ids only, so callers resolve them against the shared
+    manager and always see the current skill status.
+    """
+    manager = _get_skill_manager()
+    category = None if selected_category == "全部" else selected_category
+    return [s.id for s in manager.search_skills(search_query, category=category)]
+
+
 def render_sidebar() -> None:
     """Render sidebar with navigation and status."""
     with st.sidebar:
-        st.title("📦 PolyOMB")
-        st.markdown("*Volatility Market Maker*")
-        st.divider()
-        
-        # Navigation
-        st.subheader("导航")
-        current_page = get_state("current_page", "skill_manager")
-        
-        for page_key, page_info in PAGES.items():
-            is_current = page_key == current_page
-            button_type = "primary" if is_current else "secondary"
-            
-            if st.button(
-                f"{page_info['icon']} {page_info['title']}",
-                key=f"sidebar_nav_{page_key}",
-                use_container_width=True,
-                type=button_type
-            ):
-                navigate_to(page_key)
-        
-        st.divider()
-        
-        # Status panel
-        st.subheader("状态")
-        
-        selected_skill = get_state("selected_skill")
-        if selected_skill:
-            st.success(f"已选择 Skill: {selected_skill}")
-        else:
-            st.info("未选择 Skill")
-        
-        if get_state("param_dirty", False):
-            st.warning("参数有未保存的修改")
-        
-        backtest_results = get_state("backtest_results")
-        if backtest_results:
-            st.success("✅ 回测结果已加载")
-        
-        st.divider()
-        
-        # Quick actions
-        st.subheader("快捷操作")
-        
-        if st.button("🔄 重置所有状态", use_container_width=True):
-            from components import clear_state
-            clear_state()
-            st.success("状态已重置")
-            st.rerun()
-        
-        # Debug mode toggle
-        debug_mode = st.checkbox("调试模式", value=get_state("debug_mode", False))
-        if debug_mode != get_state("debug_mode", False):
-            set_state("debug_mode", debug_mode)
-            st.rerun()
+        _render_sidebar_content()
+
+
+@st.fragment
+def _render_sidebar_content() -> None:
+    """
+    Sidebar body.
+    
+    Runs as a fragment, so interacting with sidebar widgets does not rerun
+    the current page; navigation and reset still trigger a full rerun.
+    """
+    st.title("📦 PolyOMB")
+    st.markdown("*Volatility Market Maker*")
+    st.divider()
+    
+    # Navigation
+    st.subheader("导航")
+    current_page = get_state("current_page", "skill_manager")
+    
+    for page_key, page_info in PAGES.items():
+        is_current = page_key == current_page
+        button_type = "primary" if is_current else "secondary"
+        
+        if st.button(
+            f"{page_info['icon']} {page_info['title']}",
+            key=f"sidebar_nav_{page_key}",
+            use_container_width=True,
+            type=button_type
+        ):
+            navigate_to(page_key)
+    
+    st.divider()
+    
+    # Status panel
+    st.subheader("状态")
+    
+    selected_skill = get_state("selected_skill")
+    if selected_skill:
+        st.success(f"已选择 Skill: {selected_skill}")
+    else:
+        st.info("未选择 Skill")
+    
+    if get_state("param_dirty", False):
+        st.warning("参数有未保存的修改")
+    
+    backtest_results = get_state("backtest_results")
+    if backtest_results:
+        st.success("✅ 回测结果已加载")
+    
+    st.divider()
+    
+    # Quick actions
+    st.subheader("快捷操作")
+    
+    if st.button("🔄 重置所有状态", use_container_width=True):
+        clear_state()
+        st.cache_resource.clear()
+        st.cache_data.clear()
+        st.success("状态已重置")
+        st.rerun()
+    
+    # Debug mode toggle
+    debug_mode = st.checkbox("调试模式", value=get_state("debug_mode", False))
+    if debug_mode != get_state("debug_mode", False):
+        set_state("debug_mode", debug_mode)
+        st.rerun()
 
 
 def render_skill_manager_page() -> None:
     """Render Skill Manager page."""
-    from ui.skill_manager import SkillManager, SkillStatus
-    
     render_header("Skill 管理", "管理和选择策略 Skills", "📦")
     
-    manager = SkillManager()
+    manager = _get_skill_manager()
     
     # Search and filter
     col1, col2 = st.columns([2, 1])
@@ -105,7 +194,7 @@ def render_skill_manager_page() -> None:
             key="skill_search"
         )
     with col2:
-        categories = ["全部"] + list(set([s.category for s in manager.skills]))
+        categories = ["全部", *manager.categories]
         selected_category = st.selectbox(
             "📁 类别",
             options=categories,
@@ -119,11 +208,12 @@ def render_skill_manager_page() -> None:
     })
     
     # Filter skills
-    filtered_skills = manager.skills
-    if search_query:
-        filtered_skills = manager.search_skills(search_query)
-    if selected_category != "全部":
-        filtered_skills = [s for s in filtered_skills if s.category == selected_category]
+    skills_by_id = {s.id: s for s in manager.skills}
+    filtered_skills = [
+        skills_by_id[skill_id]
+        for skill_id in _filter_skill_ids(search_query, selected_category)
+        if skill_id in skills_by_id
+    ]
     
     # Main content
     col_left, col_right = st.columns([2, 1])
@@ -134,45 +224,40 @@ def render_skill_manager_page() -> None:
         if not filtered_skills:
             st.info("暂无匹配的 Skills")
         else:
-            # Grid layout
-            cols = st.columns(3)
+            # Grid layout - all cards are sent as a single HTML payload
+            cards_html = "".join(
+                SKILL_CARD_TEMPLATE.format(
+                    background='#f0f8ff' if skill.status == SkillStatus.ACTIVE else 'white',
+                    emoji=skill.emoji,
+                    name=skill.name,
+                    version=skill.version,
+                    status_icon=SKILL_STATUS_ICONS.get(skill.status.value, "⚪"),
+                    status=skill.status.value,
+                )
+                for skill in filtered_skills
+            )
+            st.markdown(
+                '<div style="display: grid; grid-template-columns: repeat(3, 1fr);">'
+                f'{cards_html}</div>',
+                unsafe_allow_html=True
+            )
+            
+            # Action buttons, laid out in the same column order as the cards.
+            # One 6-column layout (run / config pair per card column) is created
+            # for the whole grid instead of a nested st.columns(2) per skill.
+            cols = st.columns(6)
             for i, skill in enumerate(filtered_skills):
-                with cols[i % 3]:
-                    with st.container():
-                        # Status color
-                        status_colors = {
-                            SkillStatus.ACTIVE: "🟢",
-                            SkillStatus.INACTIVE: "⚪",
-                            SkillStatus.ERROR: "🔴",
-                            SkillStatus.NOT_INSTALLED: "⚫"
-                        }
-                        status_icon = status_colors.get(skill.status, "⚪")
-                        
-                        st.markdown(f"""
-                        <div style="
-                            border: 1px solid #ddd;
-                            border-radius: 8px;
-                            padding: 15px;
-                            margin: 5px;
-                            background-color: {'#f0f8ff' if skill.status == SkillStatus.ACTIVE else 'white'};
-                        ">
-                            <div style="font-size: 32px; text-align: center;">{skill.emoji}</div>
-                            <div style="font-weight: bold; text-align: center;">{skill.name}</div>
-                            <div style="font-size: 12px; color: #666; text-align: center;">v{skill.version}</div>
-                            <div style="text-align: center; margin-top: 5px;">{status_icon} {skill.status.value}</div>
-                        </div>
-                        """, unsafe_allow_html=True)
-                        
-                        # Action buttons
-                        btn_col1, btn_col2 = st.columns(2)
-                        with btn_col1:
-                            if st.button("▶️ 运行", key=f"run_{skill.id}", use_container_width=True):
-                                set_state("selected_skill", skill.id)
-                                navigate_to("backtest_runner")
-                        with btn_col2:
-                            if st.button("⚙️ 配置", key=f"config_{skill.id}", use_container_width=True):
-                                set_state("selected_skill", skill.id)
-                                navigate_to("param_config")
+                run_col, config_col = cols[2 * (i % 3)], cols[2 * (i % 3) + 1]
+                with run_col:
+                    st.caption(f"{skill.emoji} {skill.name}")
+                    if st.button("▶️ 运行", key=f"run_{skill.id}", use_container_width=True):
+                        set_state("selected_skill", skill.id)
+                        navigate_to("backtest_runner")
+                with config_col:
+                    st.caption("&nbsp;")
+                    if st.button("⚙️ 配置", key=f"config_{skill.id}", use_container_width=True):
+                        set_state("selected_skill", skill.id)
+                        navigate_to("param_config")
     
     with col_right:
         st.subheader("📋 Skill 详情")
@@ -217,12 +302,9 @@ def render_skill_manager_page() -> None:
 
 def render_param_config_page() -> None:
     """Render Parameter Configuration page."""
-    from ui.param_config import ParamConfig
-    
     render_header("参数配置", "配置波动率做市策略参数", "⚙️")
     
     config = ParamConfig()
-    params = config.params
     
     # Check if skill is selected
     selected_skill = get_state("selected_skill")
@@ -234,6 +316,20 @@ def render_param_config_page() -> None:
     
     st.success(f"当前配置 Skill: {selected_skill}")
     
+    _render_param_editor(config)
+
+
+@st.fragment
+def _render_param_editor(config) -> None:
+    """
+    Parameter inputs, actions and summary.
+    
+    Runs as a fragment so editing a parameter only reruns this block.
+    Widget values are applied to the params object only when saving or
+    starting a backtest; until then they just mark param_dirty.
+    """
+    params = config.params
+    
     # Main content
     col_left, col_right = st.columns([2, 1])
     
@@ -327,21 +423,30 @@ def render_param_config_page() -> None:
         
         st.divider()
         
-        # Update params object
-        params.stop_loss_threshold = stop_loss
-        params.take_profit_threshold = take_profit
-        params.volatility_threshold = volatility
-        params.sleep_period = sleep_period
-        params.max_position_size = max_position
-        params.trade_size = trade_size
-        params.min_size = min_size
-        params.spread_threshold = spread
+        # Pending edits, applied on save / run
+        values = {
+            "stop_loss_threshold": stop_loss,
+            "take_profit_threshold": take_profit,
+            "volatility_threshold": volatility,
+            "sleep_period": sleep_period,
+            "max_position_size": max_position,
+            "trade_size": trade_size,
+            "min_size": min_size,
+            "spread_threshold": spread,
+        }
+        dirty = any(getattr(params, key) != value for key, value in values.items())
+        if dirty != get_state("param_dirty", False):
+            # Full rerun only when the flag flips, so the sidebar warning updates
+            set_state("param_dirty", dirty)
+            st.rerun()
         
         # Action buttons
         col1, col2, col3 = st.columns(3)
         
         with col1:
             if st.button("💾 保存配置", type="primary", use_container_width=True):
+                for key, value in values.items():
+                    setattr(params, key, value)
                 if config.save_params(params):
                     set_state("param_dirty", False)
                     st.success("✅ 配置已保存")
@@ -355,6 +460,8 @@ def render_param_config_page() -> None:
         
         with col3:
             if st.button("🚀 运行回测", use_container_width=True):
+                for key, value in values.items():
+                    setattr(params, key, value)
                 set_state("strategy_params", params.to_dict())
                 navigate_to("backtest_runner")
     
@@ -395,6 +502,48 @@ def render_param_config_page() -> None:
         """)
 
 
+@st.cache_data(max_entries=32)
+def _build_price_figure(title: str):
+    """
+    Build the (mock) price chart for a question.
+    
+    Args:
+        title: Question title, used as the cache key
+    """
+    dates = pd.date_range(start='2024-01-01', periods=100, freq='D')
+    prices = 0.5 + 0.1 * np.arange(100) / 100
+    
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(
+        x=dates,
+        y=prices,
+        mode='lines',
+        name='Price',
+        line=dict(color='blue')
+    ))
+    fig.update_layout(height=300, margin=dict(l=0, r=0, t=30, b=0))
+    return fig
+
+
+@st.cache_data(max_entries=32)
+def _build_signal_figure(title: str):
+    """
+    Build the (mock) position / PnL chart for a question.
+    
+    Args:
+        title: Question title, used as the cache key
+    """
+    dates = pd.date_range(start='2024-01-01', periods=100, freq='D')
+    position = np.concatenate([np.zeros(30), np.full(40, 50.0), np.zeros(30)])
+    pnl = compute_pnl(position, np.full(100, 0.01))
+    
+    fig = make_subplots(rows=2, cols=1, shared_xaxes=True)
+    fig.add_trace(go.Scatter(x=dates, y=position, mode='lines', name='Position'), row=1, col=1)
+    fig.add_trace(go.Scatter(x=dates, y=pnl, mode='lines', name='PnL'), row=2, col=1)
+    fig.update_layout(height=400, margin=dict(l=0, r=0, t=30, b=0))
+    return fig
+
+
 def render_backtest_runner_page() -> None:
     """Render Backtest Runner page."""
     render_header("回测运行", "Volatility Market Maker 回测分析工具", "🔷")
@@ -449,7 +598,6 @@ def render_backtest_runner_page() -> None:
         )
         
         if time_mode == "custom":
-            from datetime import datetime
             col1, col2 = st.columns(2)
             with col1:
                 st.date_input("开始", datetime(2024, 1, 1), key="backtest_start_date")
@@ -459,22 +607,23 @@ def render_backtest_runner_page() -> None:
         # Action buttons
         st.divider()
         if st.button("🔄 应用筛选", type="primary", use_container_width=True):
+            _build_price_figure.clear()
+            _build_signal_figure.clear()
             st.success("筛选已应用")
     
     with col_middle:
         st.subheader("📋 Question 列表")
         
-        # Mock questions
-        questions = [
-            {"title": "Will Trump win 2024?", "category": "Politics", "liquidity": 1500000, "volume": 50000},
-            {"title": "Will ETH reach $5k?", "category": "Crypto", "liquidity": 800000, "volume": 30000},
-            {"title": "Will Fed cut rates in Q1?", "category": "Politics", "liquidity": 1200000, "volume": 45000},
-        ]
+        questions = MOCK_QUESTIONS
         
         search = st.text_input("🔍 在结果中搜索", key="backtest_question_search")
         
         if search:
-            questions = [q for q in questions if search.lower() in q["title"].lower()]
+            search_lc = search.lower()
+            questions = [
+                q for q, title_lc in zip(MOCK_QUESTIONS, MOCK_QUESTION_TITLES_LC)
+                if search_lc in title_lc
+            ]
         
         st.markdown(f"**{len(questions)} 个结果**")
         st.divider()
@@ -506,38 +655,15 @@ def render_backtest_runner_page() -> None:
         st.markdown(f"### {selected_question.get('title', 'Unknown')}")
         
         # Mock charts
-        import pandas as pd
-        import plotly.graph_objects as go
-        from plotly.subplots import make_subplots
-        
-        dates = pd.date_range(start='2024-01-01', periods=100, freq='D')
-        prices = 0.5 + 0.1 * (pd.Series(range(100)) / 100)
+        title = selected_question.get('title', 'Unknown')
         
         # Price chart
         st.markdown("**📊 价格波动图表**")
-        fig = go.Figure()
-        fig.add_trace(go.Scatter(
-            x=dates,
-            y=prices,
-            mode='lines',
-            name='Price',
-            line=dict(color='blue')
-        ))
-        fig.update_layout(height=300, margin=dict(l=0, r=0, t=30, b=0))
-        st.plotly_chart(fig, use_container_width=True)
+        st.plotly_chart(_build_price_figure(title), use_container_width=True)
         
         # Signal chart
         st.markdown("**📈 策略信号图表**")
-        position = [0] * 30 + [50] * 40 + [0] * 30
-        pnl = [0]
-        for i in range(1, 100):
-            pnl.append(pnl[-1] + (0.01 if position[i] > 0 else 0))
-        
-        fig = make_subplots(rows=2, cols=1, shared_xaxes=True)
-        fig.add_trace(go.Scatter(x=dates, y=position, mode='lines', name='Position'), row=1, col=1)
-        fig.add_trace(go.Scatter(x=dates, y=pnl, mode='lines', name='PnL'), row=2, col=1)
-        fig.update_layout(height=400, margin=dict(l=0, r=0, t=30, b=0))
-        st.plotly_chart(fig, use_container_width=True)
+        st.plotly_chart(_build_signal_figure(title), use_container_width=True)
         
         # Trade table
         st.markdown("**📋 交易记录**")
@@ -564,8 +690,6 @@ def render_backtest_runner_page() -> None:
 
 def render_result_charts_page() -> None:
     """Render Result Charts page."""
-    from ui.result_charts import ResultCharts, create_mock_data
-    
     render_header("结果图表", "查看回测结果图表", "📊")
     
     # Check prerequisites
@@ -600,36 +724,41 @@ def render_result_charts_page() -> None:
         st.error(f"渲染图表时出错: {e}")
 
 
+def _render_unknown_page() -> None:
+    """Fallback for an unknown current_page: reset to the skill manager."""
+    current_page = get_state("current_page")
+    st.error(f"Unknown page: {current_page}")
+    set_state("current_page", "skill_manager")
+    st.rerun()
+
+
+# Page key (see components.common.PAGES) -> render function
+PAGE_RENDERERS: Dict[str, Callable[[], None]] = {
+    "skill_manager": render_skill_manager_page,
+    "param_config": render_param_config_page,
+    "backtest_runner": render_backtest_runner_page,
+    "result_charts": render_result_charts_page,
+}
+
+
 def main() -> None:
     """Main entry point."""
     # Initialize session state
     init_state()
+    _warmup_kernels()
     
     # Render sidebar
     render_sidebar()
     
     # Render current page
     current_page = get_state("current_page", "skill_manager")
-    
-    if current_page == "skill_manager":
-        render_skill_manager_page()
-    elif current_page == "param_config":
-        render_param_config_page()
-    elif current_page == "backtest_runner":
-        render_backtest_runner_page()
-    elif current_page == "result_charts":
-        render_result_charts_page()
-    else:
-        st.error(f"Unknown page: {current_page}")
-        set_state("current_page", "skill_manager")
-        st.rerun()
+    PAGE_RENDERERS.get(current_page, _render_unknown_page)()
     
     # Render footer
     render_footer()
     
     # Debug panel
     if get_state("debug_mode", False):
-        from components import debug_state
         st.sidebar.divider()
         debug_state()
 
@@ -8,15 +8,42 @@ import pandas as pd
 import numpy as np
 from dataclasses import dataclass, field
 from datetime import datetime
-from typing import List, Dict, Optional, Callable
-from enum import Enum
+from typing import List, Dict, Optional, Union
+from enum import IntEnum
 
+try:
+    from ._njit import njit, prange
+    from .data_adapter import (
+        get_lifecycle_date_range, get_full_year_date_range, filter_by_date_range
+    )
+except ImportError:
+    from _njit import njit, prange
+    from data_adapter import (
+        get_lifecycle_date_range, get_full_year_date_range, filter_by_date_range
+    )
 
-class Signal(Enum):
-    """交易信号枚举"""
-    BUY = "BUY"
-    SELL = "SELL"
-    HOLD = "HOLD"
+
+class Signal(IntEnum):
+    """交易信号枚举（取值即 int8 信号编码）"""
+    BUY = 1
+    SELL = -1
+    HOLD = 0
+
+
+class SignalCode:
+    """
+    信号的内部整数编码 (int8)
+    
+    数组与内核中只使用整数编码，仅在 API 边界转换为 Signal
+    """
+    BUY = int(Signal.BUY)
+    SELL = int(Signal.SELL)
+    HOLD = int(Signal.HOLD)
+
+
+# numba 内核只能读取模块级整数常量
+_SELL = SignalCode.SELL
+_HOLD = SignalCode.HOLD
 
 
 @dataclass
@@ -31,11 +58,135 @@ class Trade:
     fee: float = 0.0
 
 
+# Trade.action 字符串与整数编码的对应关系
+_ACTION_CODES = {signal.name: int(signal) for signal in Signal}
+_CODE_ACTIONS = {code: action for action, code in _ACTION_CODES.items()}
+
+
+def _int_to_signal(code: int) -> Signal:
+    """将整数信号编码转换为 Signal 枚举"""
+    return Signal(int(code))
+
+
+@dataclass
+class TradeLog:
+    """
+    列式交易记录 (SoA)
+    
+    每个字段一个 NumPy 数组，汇总统计直接在数组上计算；
+    未结算的盈亏记为 NaN
+    """
+    timestamps: np.ndarray
+    actions: np.ndarray
+    sizes: np.ndarray
+    prices: np.ndarray
+    pnls: np.ndarray
+    
+    def __len__(self) -> int:
+        return len(self.pnls)
+    
+    @classmethod
+    def from_trades(cls, trades: List[Trade]) -> 'TradeLog':
+        """从 Trade 列表构建"""
+        return cls(
+            timestamps=np.array([t.timestamp for t in trades], dtype='datetime64[ns]'),
+            actions=np.array([_ACTION_CODES.get(t.action, SignalCode.HOLD) for t in trades], dtype=np.int8),
+            sizes=np.array([t.size for t in trades], dtype=np.float64),
+            prices=np.array([t.price for t in trades], dtype=np.float64),
+            pnls=np.array([np.nan if t.pnl is None else t.pnl for t in trades], dtype=np.float64),
+        )
+    
+    def to_trades(self) -> List[Trade]:
+        """转换为 Trade 列表（仅在需要逐条访问时使用）"""
+        return [
+            Trade(
+                timestamp=pd.Timestamp(ts).to_pydatetime(),
+                action=_CODE_ACTIONS[int(action)],
+                size=float(size),
+                price=float(price),
+                pnl=None if np.isnan(pnl) else float(pnl),
+            )
+            for ts, action, size, price, pnl in zip(
+                self.timestamps, self.actions, self.sizes, self.prices, self.pnls
+            )
+        ]
+
+
+@dataclass
+class TradeBuffer:
+    """
+    可增长的列式交易缓冲区
+    
+    容量不足时按倍数扩容，有效数据为各数组的前 n 个元素
+    """
+    timestamps: np.ndarray = field(default_factory=lambda: np.empty(0, dtype='datetime64[ns]'))
+    actions: np.ndarray = field(default_factory=lambda: np.empty(0, dtype=np.int8))
+    sizes: np.ndarray = field(default_factory=lambda: np.empty(0, dtype=np.float64))
+    prices: np.ndarray = field(default_factory=lambda: np.empty(0, dtype=np.float64))
+    pnls: np.ndarray = field(default_factory=lambda: np.empty(0, dtype=np.float64))
+    n: int = 0
+    
+    def __len__(self) -> int:
+        return self.n
+    
+    def _grow(self) -> None:
+        """容量翻倍（至少 16）"""
+        capacity = max(2 * len(self.pnls), 16)
+        for name in ('timestamps', 'actions', 'sizes', 'prices', 'pnls'):
+            old = getattr(self, name)
+            new = np.empty(capacity, dtype=old.dtype)
+            new[:self.n] = old[:self.n]
+            setattr(self, name, new)
+    
+    def append(
+        self,
+        ts: datetime,
+        action: Union[str, int],
+        size: float,
+        price: float,
+        pnl: Optional[float] = None
+    ) -> None:
+        """
+        追加一笔交易
+        
+        Args:
+            ts: 时间戳
+            action: 交易方向 ('BUY'/'SELL'/'HOLD' 或 SignalCode 编码)
+            size: 数量
+            price: 价格
+            pnl: 已实现盈亏（未结算为 None）
+        """
+        if self.n == len(self.pnls):
+            self._grow()
+        
+        i = self.n
+        self.timestamps[i] = np.datetime64(ts, 'ns')
+        self.actions[i] = _ACTION_CODES[action] if isinstance(action, str) else action
+        self.sizes[i] = size
+        self.prices[i] = price
+        self.pnls[i] = np.nan if pnl is None else pnl
+        self.n += 1
+    
+    def to_log(self) -> TradeLog:
+        """返回有效部分的 TradeLog 视图（不复制数据）"""
+        return TradeLog(
+            timestamps=self.timestamps[:self.n],
+            actions=self.actions[:self.n],
+            sizes=self.sizes[:self.n],
+            prices=self.prices[:self.n],
+            pnls=self.pnls[:self.n],
+        )
+    
+    def trades(self) -> List[Trade]:
+        """按需物化为 Trade 列表"""
+        return self.to_log().to_trades()
+
+
 @dataclass
 class BacktestResult:
     """回测结果"""
     trades: List[Trade] = field(default_factory=list)
-    pnl_series: pd.Series = field(default_factory=pd.Series)
+    pnl_array: np.ndarray = field(default_factory=lambda: np.empty(0, dtype=np.float64))
     total_pnl: float = 0.0
     total_return_pct: float = 0.0
     sharpe_ratio: float = 0.0
@@ -47,6 +198,11 @@ class BacktestResult:
     start_date: Optional[datetime] = None
     end_date: Optional[datetime] = None
     
+    @property
+    def pnl_series(self) -> pd.Series:
+        """每步盈亏序列（共享 pnl_array 内存，不复制）"""
+        return pd.Series(self.pnl_array, copy=False)
+    
     def to_dict(self) -> Dict:
         """转换为字典"""
         return {
@@ -118,33 +274,123 @@ class VolatilityMarketMakerStrategy:
         """
         生成交易信号
         
+        与 generate_signals_vectorized 共用同一内核，按单元素数组调用
+        
         Args:
             row: 当前市场数据行
             
         Returns:
             交易信号
         """
-        from .risk_management import should_pause_trading, is_in_risk_off_period
+        volatilities = np.array([row.get('3_hour', 0)], dtype=np.float64)
+        timestamps_ns = None
+        if self.risk_off_until and row.get('timestamp') is not None:
+            timestamps_ns = np.array([pd.Timestamp(row['timestamp']).value], dtype=np.int64)
+        
+        code = self._signals_from_arrays(volatilities, timestamps_ns)[0]
+        return _int_to_signal(code)
+    
+    def generate_signals_vectorized(self, data: pd.DataFrame) -> np.ndarray:
+        """
+        为整段数据一次性生成交易信号
         
-        # 获取参数
-        volatility = row.get('3_hour', 0)
-        threshold = self.config.get('volatility_threshold', 0.15)
+        Args:
+            data: 市场数据
+            
+        Returns:
+            int8 信号编码数组 (与 data 等长，取值见 SignalCode)
+        """
+        timestamps_ns = _timestamp_array(data) if self.risk_off_until else None
+        return self._signals_from_arrays(_volatility_array(data), timestamps_ns)
+    
+    def _signals_from_arrays(
+        self,
+        volatilities: np.ndarray,
+        timestamps_ns: Optional[np.ndarray] = None
+    ) -> np.ndarray:
+        """
+        信号内核：只接收数组，不接触 DataFrame
         
-        # 处理 NaN
-        if pd.isna(volatility):
-            volatility = 0
+        Args:
+            volatilities: 3 小时波动率 float64 数组
+            timestamps_ns: 纳秒级 int64 时间戳数组；无时间戳时为 None
+            
+        Returns:
+            int8 信号编码数组
+        """
+        # 阈值作为运行时参数传入，所有阈值共用同一个 (可磁盘缓存的) 编译结果
+        threshold = float(self.config.get('volatility_threshold', 0.15))
+        signals = _signal_codes(volatilities, threshold)
         
         # 检查风险关闭期
-        if self.risk_off_until and is_in_risk_off_period(self.risk_off_until):
-            return Signal.HOLD
+        risk_off_mask = self._risk_off_mask(len(volatilities), timestamps_ns)
+        if risk_off_mask is not None:
+            signals[risk_off_mask] = SignalCode.HOLD
         
-        # 高波动率时 Hold
-        if should_pause_trading(volatility, threshold):
-            return Signal.HOLD
+        return signals
+    
+    def _risk_off_mask(
+        self,
+        n: int,
+        timestamps_ns: Optional[np.ndarray]
+    ) -> Optional[np.ndarray]:
+        """
+        计算处于风险关闭期的行掩码
         
-        # 简化策略：根据持仓决定
-        # 可以根据更复杂的逻辑扩展
-        return Signal.HOLD
+        Args:
+            n: 行数
+            timestamps_ns: 纳秒级 int64 时间戳数组；无时间戳时按当前时间判断
+            
+        Returns:
+            布尔掩码；未设置风险关闭期时返回 None
+        """
+        if not self.risk_off_until:
+            return None
+        
+        if timestamps_ns is None:
+            return np.full(n, datetime.now() < self.risk_off_until)
+        
+        return timestamps_ns < pd.Timestamp(self.risk_off_until).value
+    
+    def grid_search(
+        self,
+        data: pd.DataFrame,
+        thresholds: Union[List[float], np.ndarray]
+    ) -> np.recarray:
+        """
+        并行扫描波动率阈值
+        
+        各组参数共享同一份价格/波动率数组，在 prange 中并行回测
+        
+        Args:
+            data: 市场数据
+            thresholds: 待扫描的波动率阈值
+            
+        Returns:
+            每个阈值一行的 recarray，字段为
+            volatility_threshold / total_pnl / sharpe_ratio / max_drawdown_pct
+        """
+        thresholds = np.ascontiguousarray(thresholds, dtype=np.float64)
+        timestamps_ns = _timestamp_array(data) if self.risk_off_until else None
+        risk_off_mask = self._risk_off_mask(len(data), timestamps_ns)
+        if risk_off_mask is None:
+            risk_off_mask = np.zeros(len(data), dtype=np.bool_)
+        
+        out = np.zeros((len(thresholds), 3), dtype=np.float64)
+        _grid(
+            _price_array(data),
+            _volatility_array(data),
+            risk_off_mask,
+            thresholds,
+            float(self.position),
+            float(self.avg_price),
+            out,
+        )
+        
+        return np.rec.fromarrays(
+            [thresholds, out[:, 0], out[:, 1], out[:, 2]],
+            names='volatility_threshold,total_pnl,sharpe_ratio,max_drawdown_pct',
+        )
     
     def update_params(self, params: Dict):
         """
@@ -174,12 +420,6 @@ class VolatilityMarketMakerStrategy:
         Returns:
             回测结果
         """
-        from .data_adapter import (
-            get_lifecycle_date_range,
-            get_full_year_date_range,
-            filter_by_date_range
-        )
-        
         # 重置状态
         self.reset()
         
@@ -193,7 +433,8 @@ class VolatilityMarketMakerStrategy:
         if start_date and end_date:
             data = filter_by_date_range(market_data, start_date, end_date)
         else:
-            data = market_data.copy()
+            # 引擎只读取数据，不修改 DataFrame，无需防御性复制
+            data = market_data
         
         if len(data) == 0:
             return BacktestResult()
@@ -208,6 +449,27 @@ class VolatilityMarketMakerStrategy:
         return result
 
 
+def _price_array(data: pd.DataFrame) -> np.ndarray:
+    """价格列转 float64 数组（缺失时按 0.5 填充）"""
+    if 'price' in data.columns:
+        return data['price'].to_numpy(dtype=np.float64)
+    return np.full(len(data), 0.5)
+
+
+def _volatility_array(data: pd.DataFrame) -> np.ndarray:
+    """3 小时波动率列转 float64 数组（缺失时为 0）"""
+    if '3_hour' in data.columns:
+        return data['3_hour'].to_numpy(dtype=np.float64)
+    return np.zeros(len(data))
+
+
+def _timestamp_array(data: pd.DataFrame) -> Optional[np.ndarray]:
+    """时间戳列转纳秒级 int64 数组（缺失时为 None）"""
+    if 'timestamp' not in data.columns:
+        return None
+    return pd.to_datetime(data['timestamp']).to_numpy(dtype='datetime64[ns]').view(np.int64)
+
+
 class BacktestEngine:
     """
     回测引擎
@@ -231,7 +493,19 @@ class BacktestEngine:
         self.initial_capital = initial_capital
         self.current_capital = initial_capital
         self.trades: List[Trade] = []
-        self.pnl_history: List[float] = []
+        self._pnl_history: np.ndarray = np.empty(0, dtype=np.float64)
+        # step() 逐笔追加到列表，读取 pnl_history 时才合并为数组
+        self._pending_pnls: List[float] = []
+    
+    @property
+    def pnl_history(self) -> np.ndarray:
+        """盈亏历史 (float64 数组)"""
+        if self._pending_pnls:
+            self._pnl_history = np.concatenate(
+                (self._pnl_history, np.asarray(self._pending_pnls, dtype=np.float64))
+            )
+            self._pending_pnls.clear()
+        return self._pnl_history
     
     def step(self, row: pd.Series) -> Dict:
         """
@@ -247,9 +521,6 @@ class BacktestEngine:
         
         # 获取当前价格
         price = row.get('price', 0.5)
-        timestamp = row.get('timestamp', datetime.now())
-        if isinstance(timestamp, str):
-            timestamp = pd.to_datetime(timestamp)
         
         trade_pnl = 0.0
         
@@ -262,10 +533,10 @@ class BacktestEngine:
             if self.strategy.position > 0 and self.strategy.avg_price > 0:
                 trade_pnl = (price - self.strategy.avg_price) * self.strategy.position
         
-        self.pnl_history.append(trade_pnl)
+        self._pending_pnls.append(trade_pnl)
         
         return {
-            'signal': signal.value,
+            'signal': signal.name,
             'pnl': trade_pnl,
             'price': price,
         }
@@ -280,40 +551,189 @@ class BacktestEngine:
         Returns:
             回测结果
         """
-        trades = []
-        pnls = []
+        # 时间戳列整体解析一次，后续信号生成直接使用 datetime64
+        if 'timestamp' in data.columns and not pd.api.types.is_datetime64_any_dtype(
+            data['timestamp']
+        ):
+            data = data.assign(timestamp=pd.to_datetime(data['timestamp'], cache=True))
+        
+        # 一次性取出价格列和信号，替代逐行 iterrows + step
+        prices = _price_array(data)
+        signals = self.strategy.generate_signals_vectorized(data)
+        
+        pnls = _backtest_loop(
+            prices, signals, float(self.strategy.position), float(self.strategy.avg_price)
+        )
         
-        for _, row in data.iterrows():
-            result = self.step(row)
-            pnls.append(result.get('pnl', 0))
+        # 盈亏直接保留为 float64 数组，不再转成 Python float 列表
+        history = self.pnl_history
+        self._pnl_history = np.concatenate((history, pnls)) if history.size else pnls
         
         # 构建结果
+        # 简化状态机不记录逐笔交易，trades 及交易计数/胜率保持默认值
         result = BacktestResult()
-        result.trades = trades
-        result.pnl_series = pd.Series(pnls)
-        result.total_pnl = sum(pnls)
+        result.pnl_array = pnls
+        
+        total, mean, std, max_dd_pct, _, _, _ = _compute_metrics(pnls)
+        result.total_pnl = float(total)
         
         if self.initial_capital > 0:
             result.total_return_pct = (result.total_pnl / self.initial_capital) * 100
         
         # 计算统计指标
-        if len(trades) > 0:
-            result.total_trades = len(trades)
-            winning = [t for t in trades if t.pnl and t.pnl > 0]
-            losing = [t for t in trades if t.pnl and t.pnl < 0]
-            result.winning_trades = len(winning)
-            result.losing_trades = len(losing)
-            result.win_rate = len(winning) / len(trades) if trades else 0
-        
-        if len(result.pnl_series) > 0:
-            result.max_drawdown_pct = calculate_max_drawdown(result.pnl_series)
-            result.sharpe_ratio = calculate_sharpe_ratio(result.pnl_series)
+        result.max_drawdown_pct = float(max_dd_pct)
+        if std > 0:
+            result.sharpe_ratio = float(mean / std)
         
         return result
 
 
+@njit(cache=True)
+def _signal_codes(vols: np.ndarray, vol_threshold: float) -> np.ndarray:
+    """
+    由波动率数组生成 int8 信号编码
+    
+    NaN 处理、阈值比较和编码在同一次循环中完成
+    """
+    n = vols.shape[0]
+    signals = np.empty(n, dtype=np.int8)
+    
+    for i in range(n):
+        vol = vols[i]
+        if np.isnan(vol):
+            vol = 0.0
+        
+        # 高波动率时 Hold；简化策略：其余情况同样 Hold，可以根据更复杂的逻辑扩展
+        if vol >= vol_threshold:
+            signals[i] = _HOLD
+        else:
+            signals[i] = _HOLD
+    
+    return signals
+
+
+@njit(cache=True)
+def _backtest_loop(
+    prices: np.ndarray,
+    signals: np.ndarray,
+    position: float,
+    avg_price: float
+) -> np.ndarray:
+    """
+    逐 tick 执行回测状态机
+    
+    持仓、均价等状态以标量在循环中演进，每步盈亏写入预分配数组
+    
+    Args:
+        prices: 价格数组
+        signals: 整数信号编码数组 (见 SignalCode)
+        position: 初始持仓
+        avg_price: 初始持仓均价
+        
+    Returns:
+        每步盈亏数组
+    """
+    n = prices.shape[0]
+    pnls = np.empty(n, dtype=np.float64)
+    
+    for i in range(n):
+        trade_pnl = 0.0
+        
+        # 执行交易 (简化版本)，卖出时按当前持仓结算盈亏
+        if signals[i] == _SELL:
+            if position > 0 and avg_price > 0:
+                trade_pnl = (prices[i] - avg_price) * position
+        
+        pnls[i] = trade_pnl
+    
+    return pnls
+
+
+@njit(cache=True)
+def _compute_metrics(pnls: np.ndarray):
+    """
+    单次遍历盈亏数组计算全部汇总指标
+    
+    与 calculate_sharpe_ratio / calculate_max_drawdown 口径一致：
+    NaN 不参与均值方差，累计曲线中按 0 计；方差用 Welford 递推 (ddof=1)
+    
+    Args:
+        pnls: 每步盈亏数组
+        
+    Returns:
+        (total, mean, std, max_dd_pct, win_rate, n_wins, n_losses)，
+        其中胜负按非零盈亏计数，样本不足两个时 std 为 0
+    """
+    count = 0
+    total = 0.0
+    mean = 0.0
+    m2 = 0.0
+    cum = 0.0
+    peak = -np.inf
+    max_dd_pct = 0.0
+    n_wins = 0
+    n_losses = 0
+    
+    for i in range(pnls.shape[0]):
+        x = pnls[i]
+        if not np.isnan(x):
+            count += 1
+            total += x
+            delta = x - mean
+            mean += delta / count
+            m2 += delta * (x - mean)
+            cum += x
+            if x > 0:
+                n_wins += 1
+            elif x < 0:
+                n_losses += 1
+        
+        # 历史最高值不为正时回撤记为 0
+        if cum > peak:
+            peak = cum
+        if peak > 0:
+            dd = (cum - peak) * 100 / peak
+            if dd < max_dd_pct:
+                max_dd_pct = dd
+    
+    std = np.sqrt(m2 / (count - 1)) if count >= 2 else 0.0
+    n_decided = n_wins + n_losses
+    win_rate = n_wins / n_decided if n_decided > 0 else 0.0
+    
+    return total, mean, std, max_dd_pct, win_rate, n_wins, n_losses
+
+
+@njit(parallel=True, cache=True)
+def _grid(
+    prices: np.ndarray,
+    vols: np.ndarray,
+    risk_off_mask: np.ndarray,
+    thresholds: np.ndarray,
+    position: float,
+    avg_price: float,
+    out: np.ndarray
+) -> None:
+    """
+    并行回测多个波动率阈值
+    
+    out[k] 写入第 k 个阈值的 (total_pnl, sharpe_ratio, max_drawdown_pct)
+    """
+    for k in prange(thresholds.shape[0]):
+        signals = _signal_codes(vols, thresholds[k])
+        for i in range(signals.shape[0]):
+            if risk_off_mask[i]:
+                signals[i] = _HOLD
+        
+        pnls = _backtest_loop(prices, signals, position, avg_price)
+        total, mean, std, max_dd_pct, _, _, _ = _compute_metrics(pnls)
+        
+        out[k, 0] = total
+        out[k, 1] = mean / std if std > 0 else 0.0
+        out[k, 2] = max_dd_pct
+
+
 def calculate_sharpe_ratio(
-    returns: pd.Series,
+    returns: Union[pd.Series, np.ndarray],
     risk_free_rate: float = 0.0
 ) -> float:
     """
@@ -322,32 +742,35 @@ def calculate_sharpe_ratio(
     公式: (mean(return) - risk_free_rate) / std(return)
     
     Args:
-        returns: 收益率序列
+        returns: 收益率序列或数组
         risk_free_rate: 无风险利率
         
     Returns:
         夏普比率
     """
-    if len(returns) < 2:
-        return 0.0
+    arr = np.asarray(returns, dtype=np.float64)
     
     # 移除 NaN
-    returns = returns.dropna()
+    arr = arr[~np.isnan(arr)]
     
-    if len(returns) < 2 or returns.std() == 0:
+    if arr.size < 2:
         return 0.0
     
-    return (returns.mean() - risk_free_rate) / returns.std()
+    std = arr.std(ddof=1)
+    if std == 0:
+        return 0.0
+    
+    return float((arr.mean() - risk_free_rate) / std)
 
 
-def calculate_max_drawdown(pnl_series: pd.Series) -> float:
+def calculate_max_drawdown(pnl_series: Union[pd.Series, np.ndarray]) -> float:
     """
     计算最大回撤
     
     基于累计盈亏计算最大回撤百分比
     
     Args:
-        pnl_series: 盈亏序列 (每笔交易的盈亏)
+        pnl_series: 盈亏序列或数组 (每笔交易的盈亏)
         
     Returns:
         最大回撤百分比 (负数)
@@ -356,28 +779,38 @@ def calculate_max_drawdown(pnl_series: pd.Series) -> float:
         return 0.0
     
     # 累计盈亏曲线
-    cumulative = pnl_series.cumsum()
+    cum = np.nancumsum(np.asarray(pnl_series, dtype=np.float64))
     
     # 历史最高值（到当前为止）
-    running_max = cumulative.expanding().max()
+    peak = np.maximum.accumulate(cum)
     
-    # 计算回撤百分比
-    drawdown_pct = pd.Series(0.0, index=cumulative.index)
-    
-    for i in range(len(cumulative)):
-        if running_max.iloc[i] > 0:
-            drawdown_pct.iloc[i] = ((cumulative.iloc[i] - running_max.iloc[i]) / running_max.iloc[i]) * 100
+    # 计算回撤百分比 (历史最高值不为正时回撤记为 0)
+    drawdown_pct = np.zeros_like(cum)
+    np.divide((cum - peak) * 100, peak, out=drawdown_pct, where=peak > 0)
     
     # 最大回撤 (最负的值)
-    return drawdown_pct.min()
+    return float(drawdown_pct.min())
+
+
+def _trade_pnls(trades: Union[TradeLog, List[Trade]]) -> np.ndarray:
+    """
+    取出盈亏 float64 数组（未结算为 NaN）
+    
+    Trade 列表只读取 pnl 字段，不经过 TradeLog.from_trades 解析其余字段
+    """
+    if isinstance(trades, TradeLog):
+        return trades.pnls
+    return np.fromiter(
+        (np.nan if t.pnl is None else t.pnl for t in trades), np.float64, len(trades)
+    )
 
 
-def calculate_win_rate(trades: List[Trade]) -> float:
+def calculate_win_rate(trades: Union[TradeLog, List[Trade]]) -> float:
     """
     计算胜率
     
     Args:
-        trades: 交易列表
+        trades: 交易记录 (TradeLog 或 Trade 列表)
         
     Returns:
         胜率（0-1）
@@ -385,21 +818,20 @@ def calculate_win_rate(trades: List[Trade]) -> float:
     if len(trades) == 0:
         return 0.0
     
-    winning_trades = [t for t in trades if t.pnl is not None and t.pnl > 0]
-    return len(winning_trades) / len(trades)
+    return int(np.count_nonzero(_trade_pnls(trades) > 0)) / len(trades)
 
 
-def calculate_pnl_from_trades(trades: List[Trade]) -> float:
+def calculate_pnl_from_trades(trades: Union[TradeLog, List[Trade]]) -> float:
     """
-    从交易列表计算总盈亏
+    从交易记录计算总盈亏
     
     Args:
-        trades: 交易列表
+        trades: 交易记录 (TradeLog 或 Trade 列表)
         
     Returns:
         总盈亏
     """
-    return sum(t.pnl for t in trades if t.pnl is not None)
+    return float(np.nansum(_trade_pnls(trades)))
 
 
 def run_backtest(
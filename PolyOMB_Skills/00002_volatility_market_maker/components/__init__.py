@@ -3,9 +3,10 @@ Components module for shared UI components and utilities
 """
 
 from .state_manager import init_state, get_state, set_state, clear_state
-from .common import render_header, render_navbar, render_footer, render_error, render_loading
+from .common import render_header, render_navbar, render_footer, render_error, render_loading, render_redirect_stub
 
 __all__ = [
     'init_state', 'get_state', 'set_state', 'clear_state',
     'render_header', 'render_navbar', 'render_footer', 'render_error', 'render_loading',
+    'render_redirect_stub',
 ]
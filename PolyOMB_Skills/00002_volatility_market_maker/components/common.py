@@ -340,6 +340,37 @@ def render_page_container(page_content: Callable) -> None:
         debug_state()
 
 
+def render_redirect_stub(title: str, page_key: str) -> None:
+    """
+    Render a legacy ``pages/`` stub that redirects to the main app.
+    
+    Args:
+        title: Page title (English)
+        page_key: Key into PAGES for the icon and sidebar entry
+    """
+    page_info = PAGES[page_key]
+    icon = page_info["icon"]
+    
+    st.set_page_config(page_title=title, page_icon=icon)
+    
+    st.title(f"{icon} {title}")
+    st.info("This page is integrated into the main application.")
+    
+    st.markdown(f"""
+Please run the main application instead:
+
+```bash
+streamlit run app.py
+```
+
+Then navigate to **{page_info['title']}** from the sidebar.
+""")
+    
+    # Redirect button
+    if st.button("🚀 Open Main App"):
+        st.switch_page("app.py")
+
+
 # Convenience function for page imports
 def get_page_module(page_key: str):
     """
@@ -4,6 +4,8 @@ State Manager Component
 Unified session state management for the multi-page app
 """
 
+import json
+import pandas as pd
 import streamlit as st
 from typing import Any, Optional, Dict, List
 
@@ -61,16 +63,27 @@ DEFAULT_STATE = {
 
 # List of all state keys for validation
 STATE_KEYS = list(DEFAULT_STATE.keys())
+STATE_KEYS_SET = frozenset(DEFAULT_STATE)
+
+# Session flag set once init_state has populated the defaults
+_INIT_FLAG = "_polyomb_state_initialized"
 
 
 def init_state() -> None:
     """
     Initialize all session state keys with default values.
     Safe to call multiple times - won't overwrite existing values.
+    Only the first call per session scans DEFAULT_STATE; later calls
+    return after a single flag lookup.
     """
+    if st.session_state.get(_INIT_FLAG):
+        return
+    
     for key, default_value in DEFAULT_STATE.items():
         if key not in st.session_state:
             st.session_state[key] = default_value
+    
+    st.session_state[_INIT_FLAG] = True
 
 
 def get_state(key: str, default: Any = None) -> Any:
@@ -119,10 +132,10 @@ def clear_state(keep_keys: Optional[List[str]] = None) -> None:
     Args:
         keep_keys: List of keys to preserve (optional)
     """
-    keep_keys = keep_keys or []
+    keep_keys = frozenset(keep_keys or ())
     preserved = {k: st.session_state.get(k) for k in keep_keys if k in st.session_state}
     
-    # Clear and reinitialize
+    # Clear and reinitialize (drops the init flag too, so defaults are restored)
     for key in list(st.session_state.keys()):
         if key not in keep_keys:
             del st.session_state[key]
@@ -145,7 +158,7 @@ def is_dirty(key: str) -> bool:
         True if state differs from default
     """
     init_state()
-    if key not in DEFAULT_STATE:
+    if key not in STATE_KEYS_SET:
         return True
     return st.session_state.get(key) != DEFAULT_STATE[key]
 
@@ -187,11 +200,37 @@ def validate_state() -> List[str]:
     return errors
 
 
+def _summarize_value(value: Any) -> Any:
+    """
+    Replace pandas objects with a short placeholder for debug output.
+    
+    Args:
+        value: State value
+        
+    Returns:
+        JSON-friendly value with DataFrames/Series summarized
+    """
+    if isinstance(value, pd.DataFrame):
+        return f"<DataFrame {value.shape}>"
+    if isinstance(value, pd.Series):
+        return f"<Series {value.shape}>"
+    if isinstance(value, dict):
+        return {k: _summarize_value(v) for k, v in value.items()}
+    return value
+
+
 def debug_state() -> None:
     """
     Print current state for debugging (use in development only).
+    
+    The state is serialized inside the expander block, and pandas
+    objects (e.g. backtest results) are summarized instead of dumped.
     """
     init_state()
-    import json
-    state_dump = json.dumps(get_all_state(), indent=2, default=str)
-    st.sidebar.expander("🔧 Debug State").code(state_dump)
+    with st.sidebar.expander("🔧 Debug State"):
+        state_dump = json.dumps(
+            {k: _summarize_value(v) for k, v in get_all_state().items()},
+            indent=2,
+            default=str,
+        )
+        st.code(state_dump)
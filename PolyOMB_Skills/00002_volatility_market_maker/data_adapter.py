@@ -6,12 +6,18 @@
 
 import pandas as pd
 import numpy as np
+from dataclasses import dataclass
 from datetime import datetime, timedelta
 from pathlib import Path
-from typing import Dict, Optional, Tuple
+from typing import Dict, Optional, Sequence, Tuple
 import subprocess
 import os
 
+try:
+    from .volatility_calc import add_volatility_column
+except ImportError:
+    from volatility_calc import add_volatility_column
+
 
 class SMBDataAdapter:
     """
@@ -126,7 +132,12 @@ class SMBDataAdapter:
         """
         self._mock_data[path] = df.copy()
     
-    def read_parquet(self, relative_path: str) -> pd.DataFrame:
+    def _get_mock_data(self, path: str, copy: bool) -> pd.DataFrame:
+        """返回 Mock 数据；copy=False 时直接返回缓存的 DataFrame，调用方不得修改"""
+        df = self._mock_data[path]
+        return df.copy() if copy else df
+    
+    def read_parquet(self, relative_path: str, copy: bool = False) -> pd.DataFrame:
         """
         读取 Parquet 文件
         
@@ -134,18 +145,19 @@ class SMBDataAdapter:
         
         Args:
             relative_path: 相对路径
+            copy: 返回 Mock 数据的副本（调用方需要修改数据时使用）
             
         Returns:
             DataFrame
         """
         # 优先返回 Mock 数据
         if relative_path in self._mock_data:
-            return self._mock_data[relative_path].copy()
+            return self._get_mock_data(relative_path, copy)
         
         # 检查 CSV 版本 (用于测试)
         csv_path = relative_path.replace('.parquet', '.csv')
         if csv_path in self._mock_data:
-            return self._mock_data[csv_path].copy()
+            return self._get_mock_data(csv_path, copy)
         
         # 读取实际文件
         if not self._is_mounted:
@@ -165,19 +177,20 @@ class SMBDataAdapter:
         # 返回空 DataFrame
         return pd.DataFrame()
     
-    def read_csv(self, relative_path: str) -> pd.DataFrame:
+    def read_csv(self, relative_path: str, copy: bool = False) -> pd.DataFrame:
         """
         读取 CSV 文件
         
         Args:
             relative_path: 相对路径
+            copy: 返回 Mock 数据的副本（调用方需要修改数据时使用）
             
         Returns:
             DataFrame
         """
         # 优先返回 Mock 数据
         if relative_path in self._mock_data:
-            return self._mock_data[relative_path].copy()
+            return self._get_mock_data(relative_path, copy)
         
         # 读取实际文件
         if not self._is_mounted:
@@ -190,12 +203,13 @@ class SMBDataAdapter:
         
         return pd.DataFrame()
     
-    def get_market_trades(self, market_id: str) -> pd.DataFrame:
+    def get_market_trades(self, market_id: str, copy: bool = False) -> pd.DataFrame:
         """
         获取市场交易数据
         
         Args:
             market_id: 市场 ID
+            copy: 返回 Mock 数据的副本（调用方需要修改数据时使用）
             
         Returns:
             交易数据
@@ -209,15 +223,17 @@ class SMBDataAdapter:
         
         for path in paths:
             if path in self._mock_data:
-                df = self._mock_data[path].copy()
-                # 如果指定了 market_id，过滤该市场的数据
+                df = self._mock_data[path]
+                # 如果指定了 market_id，过滤该市场的数据（布尔索引已生成新对象）
                 if 'market' in df.columns:
                     df = df[df['market'] == market_id]
+                elif copy:
+                    df = df.copy()
                 return df
         
         # 尝试读取文件
         for path in paths[:2]:
-            df = self.read_parquet(path)
+            df = self.read_parquet(path, copy=copy)
             if len(df) > 0:
                 return df
         
@@ -309,6 +325,18 @@ class LocalDataAdapter:
         return pd.DataFrame()
 
 
+def _timestamps(df: pd.DataFrame) -> pd.Series:
+    """
+    返回 datetime64 类型的时间戳列
+    
+    加载时已解析的列直接返回，只有未解析的列才调用 pd.to_datetime；不修改 df
+    """
+    ts = df['timestamp']
+    if pd.api.types.is_datetime64_any_dtype(ts):
+        return ts
+    return pd.to_datetime(ts)
+
+
 def extract_price_series(
     df: pd.DataFrame,
     interval: str = "1min"
@@ -316,13 +344,11 @@ def extract_price_series(
     """
     从交易数据提取价格序列
     """
-    df = df.copy()
-    df['timestamp'] = pd.to_datetime(df['timestamp'])
-    df = df.sort_values('timestamp')
-    df.set_index('timestamp', inplace=True)
+    prices = pd.Series(df['price'].to_numpy(), index=pd.DatetimeIndex(_timestamps(df)))
+    prices = prices.sort_index(kind='stable')
     
     # 重采样
-    price_series = df['price'].resample(interval).last()
+    price_series = prices.resample(interval).last()
     
     # 前向填充
     price_series = price_series.ffill()
@@ -337,8 +363,7 @@ def build_orderbook_snapshot(
     """
     从交易数据重建订单簿快照
     """
-    df['timestamp'] = pd.to_datetime(df['timestamp'])
-    mask = df['timestamp'] <= timestamp
+    mask = _timestamps(df) <= timestamp
     recent = df[mask].tail(20)
     
     if len(recent) == 0:
@@ -355,6 +380,86 @@ def build_orderbook_snapshot(
     }
 
 
+# 订单簿字段: (OrderBookFrame 列名, 订单簿 dict / DataFrame 键, 缺失值)
+# 缺失值与 order_pricing 中 dict 值为 0/None 时的处理一致
+ORDERBOOK_FIELDS = (
+    ('best_bid', 'best_bid', 0.0),
+    ('best_ask', 'best_ask', 0.0),
+    ('best_bid_size', 'best_bid_size', 0.0),
+    ('best_ask_size', 'best_ask_size', 0.0),
+    ('bid_sum', 'bid_sum_within_n_percent', 1000.0),
+    ('ask_sum', 'ask_sum_within_n_percent', 1000.0),
+)
+
+
+@dataclass
+class OrderBookFrame:
+    """
+    订单簿时间序列的列式 (SoA) 存储
+    
+    六个等长的 float64 数组，每个 tick 一行；整列或切片可直接传给
+    order_pricing.get_order_prices_batch，无需逐行构造 dict
+    """
+    best_bid: np.ndarray
+    best_ask: np.ndarray
+    best_bid_size: np.ndarray
+    best_ask_size: np.ndarray
+    bid_sum: np.ndarray
+    ask_sum: np.ndarray
+    
+    def __len__(self) -> int:
+        return len(self.best_bid)
+    
+    def __getitem__(self, index) -> 'OrderBookFrame':
+        """按切片或掩码选取行（切片返回视图）"""
+        return OrderBookFrame(*(
+            getattr(self, name)[index] for name, _, _ in ORDERBOOK_FIELDS
+        ))
+    
+    @classmethod
+    def from_dataframe(cls, df: pd.DataFrame) -> 'OrderBookFrame':
+        """
+        从包含订单簿列的 DataFrame 构造
+        
+        已是 float64 且无缺失值的列直接引用底层数组，不复制；缺失的列以缺失值填充
+        """
+        n = len(df)
+        columns = []
+        for _, key, missing in ORDERBOOK_FIELDS:
+            if key in df.columns:
+                values = df[key].to_numpy(dtype=np.float64, na_value=np.nan)
+                absent = np.isnan(values)
+                if missing:
+                    absent |= values == 0
+                if absent.any():
+                    values = np.where(absent, missing, values)
+            else:
+                values = np.full(n, missing)
+            columns.append(values)
+        return cls(*columns)
+    
+    def row(self, i: int) -> Dict:
+        """第 i 行的订单簿 dict（兼容逐行接口）"""
+        return {key: float(getattr(self, name)[i]) for name, key, _ in ORDERBOOK_FIELDS}
+
+
+def dicts_to_soa(rows: Sequence[Dict]) -> OrderBookFrame:
+    """
+    将逐 tick 的订单簿 dict 列表转换为列式 OrderBookFrame
+    
+    Args:
+        rows: 订单簿 dict 列表
+        
+    Returns:
+        OrderBookFrame
+    """
+    n = len(rows)
+    return OrderBookFrame(*(
+        np.fromiter((row.get(key) or missing for row in rows), dtype=np.float64, count=n)
+        for _, key, missing in ORDERBOOK_FIELDS
+    ))
+
+
 def convert_to_strategy_format(
     trades: pd.DataFrame,
     metadata: Dict
@@ -362,8 +467,6 @@ def convert_to_strategy_format(
     """
     转换为策略内部格式
     """
-    from .volatility_calc import add_volatility_column
-    
     df = trades.copy()
     
     # 添加波动率列
@@ -381,16 +484,23 @@ def get_lifecycle_date_range(df: pd.DataFrame) -> Tuple[datetime, datetime]:
     """
     获取生命周期日期范围
     """
-    df['timestamp'] = pd.to_datetime(df['timestamp'])
-    return df['timestamp'].min(), df['timestamp'].max()
+    ts = _timestamps(df)
+    return ts.min(), ts.max()
 
 
 def get_full_year_date_range(df: pd.DataFrame) -> Tuple[datetime, datetime]:
     """
     获取全年日期范围
+    
+    取交易最多的年份；数据落在同一年内时直接由首末时间确定，无需逐行提取年份
     """
-    df['timestamp'] = pd.to_datetime(df['timestamp'])
-    year = df['timestamp'].dt.year.mode()[0]
+    ts = _timestamps(df)
+    first, last = ts.min(), ts.max()
+    if first.year == last.year:
+        year = first.year
+    else:
+        years = ts.dt.year.to_numpy()
+        year = first.year + int(np.argmax(np.bincount(years - first.year)))
     
     return (
         datetime(year, 1, 1),
@@ -405,10 +515,19 @@ def filter_by_date_range(
 ) -> pd.DataFrame:
     """
     按日期范围过滤数据
+    
+    布尔索引已返回新对象，不再额外 copy；需要独立修改结果的调用方自行 copy。
+    原列不是 datetime 时，结果中的时间戳列替换为解析后的值（不修改输入）
     """
-    df['timestamp'] = pd.to_datetime(df['timestamp'])
-    mask = (df['timestamp'] >= start) & (df['timestamp'] <= end)
-    return df[mask].copy()
+    ts = _timestamps(df)
+    timestamps = ts.to_numpy(dtype='datetime64[ns]')
+    start_ns = pd.Timestamp(start).to_datetime64()
+    end_ns = pd.Timestamp(end).to_datetime64()
+    mask = (timestamps >= start_ns) & (timestamps <= end_ns)
+    
+    if pd.api.types.is_datetime64_any_dtype(df['timestamp']):
+        return df.loc[mask]
+    return df.loc[mask].assign(timestamp=ts[mask])
 
 
 def validate_trades_df(df: pd.DataFrame) -> bool:
@@ -9,12 +9,21 @@
 
 import pandas as pd
 import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.feather as feather
+import pyarrow.fs as pafs
+import functools
 import json
 import os
-import pickle
+import re
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import datetime, timedelta
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple, Set
+from typing import Dict, Iterator, List, Optional, Tuple, Set, Union
 import hashlib
 import logging
 
@@ -22,6 +31,41 @@ import logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# 转换后数据缓存的格式版本
+# convert_raw_trades_to_market_format 语义变化时必须递增，使旧缓存失效
+CONVERTED_CACHE_VERSION = 2
+
+# 本地 (含 SMB 挂载点) 文件系统
+_LOCAL_FS = pafs.LocalFileSystem()
+
+# 交易文件扫描格式：预缓冲并合并相邻的列块读取 (间隔 16KiB 内合并)，
+# 一次性发出所有需要的字节范围请求，减少高延迟 SMB 上的往返次数
+_TRADES_FILE_FORMAT = ds.ParquetFileFormat(
+    default_fragment_scan_options=ds.ParquetFragmentScanOptions(
+        pre_buffer=True,
+        cache_options=pa.CacheOptions(
+            hole_size_limit=16 * 1024,
+            range_size_limit=32 * 1024 * 1024,
+            lazy=False,
+        ),
+    )
+)
+
+# 从交易文件读取的列：市场过滤所需的 asset id 加上转换所需的列，其余宽列不解码
+TRADE_FILE_COLUMNS = [
+    'block_number', 'timestamp', 'transaction_hash',
+    'taker_asset_id', 'maker_asset_id', 'maker_amount', 'taker_amount'
+]
+
+# 策略格式交易数据的列 (convert_raw_trades_to_arrow 的输出)
+MARKET_TRADE_COLUMNS = ['timestamp', 'price', 'size', 'side', 'market']
+
+# 交易文件名: trades_{start}_{end}.parquet
+TRADES_FILE_RE = re.compile(r'^trades_(\d+)_(\d+)\.parquet$')
+
+# 流式读取交易文件时每个批次的最大行数
+READ_BATCH_SIZE = 100_000
+
 
 class MarketDataLoader:
     """
@@ -40,7 +84,10 @@ class MarketDataLoader:
         self,
         data_path: Optional[str] = None,
         cache_dir: str = "~/.cache/polymarket",
-        use_cache: bool = True
+        use_cache: bool = True,
+        stale_ttl: Optional[float] = None,
+        hard_ttl: Optional[float] = None,
+        io_concurrency: int = 8
     ):
         """
         初始化数据加载器
@@ -49,38 +96,85 @@ class MarketDataLoader:
             data_path: 数据源路径 (默认使用 SMB 挂载点)
             cache_dir: 本地缓存目录
             use_cache: 是否使用缓存
+            stale_ttl: 交易缓存过期秒数，超过后仍返回缓存并在后台刷新 (None 表示永不过期)
+            hard_ttl: 交易缓存失效秒数，超过后阻塞重新读取 SMB (None 表示永不失效)
+            io_concurrency: 并发读取交易文件的线程数
         """
         self.data_path = Path(data_path or self.DEFAULT_SMB_PATH)
         self.cache_dir = Path(cache_dir).expanduser()
         self.use_cache = use_cache
+        self.stale_ttl = stale_ttl
+        self.hard_ttl = hard_ttl
+        self.io_concurrency = max(1, io_concurrency)
         
         # 创建缓存目录
         self.cache_dir.mkdir(parents=True, exist_ok=True)
         self.trades_cache_dir = self.cache_dir / "trades"
         self.trades_cache_dir.mkdir(exist_ok=True)
+        self.converted_cache_dir = self.cache_dir / "converted"
+        self.converted_cache_dir.mkdir(exist_ok=True)
         
         # 索引文件路径
-        self.index_file = self.cache_dir / "market_block_index.pkl"
+        self.index_file = self.cache_dir / "market_block_index.arrow"
         self.markets_cache = self.cache_dir / "markets.parquet"
         
         # 内存缓存
         self._markets_df: Optional[pd.DataFrame] = None
-        self._market_index: Optional[Dict[str, List[Tuple[int, int]]]] = None
+        self._market_positions: Optional[Dict[str, int]] = None
+        self._token_ids_cache: Dict[str, Tuple[str, ...]] = {}
+        self._market_index: Optional[Dict[str, Tuple[int, List[Tuple[int, int]]]]] = None
+        self._market_index_lock = threading.Lock()
         self._loaded_trades_files: Set[str] = set()
         
+        # parquet 文件片段缓存 {path: (mtime, fragment)}，footer 每个文件只解析一次
+        self._pq_fragment_cache: Dict[str, Tuple[float, ds.ParquetFileFragment]] = {}
+        self._pq_fragment_lock = threading.Lock()
+        
+        # 转换缓存命中统计
+        self._converted_hits = 0
+        self._converted_misses = 0
+        
+        # 交易缓存命中统计与后台刷新
+        self._fresh_hits = 0
+        self._stale_hits = 0
+        self._misses = 0
+        self._background_refreshes = 0
+        self._refresh_executor: Optional[ThreadPoolExecutor] = None
+        self._refresh_futures: Dict[str, Future] = {}
+        self._refresh_lock = threading.Lock()
+        
         logger.info(f"MarketDataLoader 初始化完成")
         logger.info(f"  数据源: {self.data_path}")
         logger.info(f"  缓存目录: {self.cache_dir}")
     
     def _get_cache_key(self, market_id: str) -> str:
         """生成缓存键"""
-        return hashlib.md5(market_id.encode()).hexdigest()[:16]
+        return _market_cache_key(market_id)
     
     def _get_market_cache_path(self, market_id: str) -> Path:
         """获取市场缓存文件路径"""
         cache_key = self._get_cache_key(market_id)
         return self.trades_cache_dir / f"{cache_key}.parquet"
     
+    def _get_converted_cache_path(self, market_id: str) -> Path:
+        """获取转换后数据的缓存文件路径 (Feather)"""
+        cache_key = self._get_cache_key(market_id)
+        return self.converted_cache_dir / f"{cache_key}.feather"
+    
+    def _is_converted_cache_valid(self, cache_path: Path) -> bool:
+        """检查转换缓存是否存在且版本匹配"""
+        meta_path = cache_path.with_suffix('.json')
+        
+        if not cache_path.exists() or not meta_path.exists():
+            return False
+        
+        try:
+            meta = json.loads(meta_path.read_text())
+        except (OSError, ValueError):
+            return False
+        
+        return meta.get('version') == CONVERTED_CACHE_VERSION
+    
     def _load_markets(self, force_reload: bool = False) -> pd.DataFrame:
         """
         加载市场元数据
@@ -97,7 +191,7 @@ class MarketDataLoader:
         # 检查本地缓存
         if self.use_cache and self.markets_cache.exists() and not force_reload:
             logger.info("从本地缓存加载 markets 数据...")
-            self._markets_df = pd.read_parquet(self.markets_cache)
+            self._set_markets_df(pd.read_parquet(self.markets_cache))
             return self._markets_df
         
         # 从 SMB 加载
@@ -108,7 +202,7 @@ class MarketDataLoader:
             return pd.DataFrame()
         
         logger.info("从 SMB 加载 markets 数据...")
-        self._markets_df = pd.read_parquet(markets_file)
+        self._set_markets_df(pd.read_parquet(markets_file))
         
         # 保存到本地缓存
         if self.use_cache:
@@ -117,6 +211,18 @@ class MarketDataLoader:
         
         return self._markets_df
     
+    def _set_markets_df(self, markets_df: pd.DataFrame):
+        """替换市场元数据，并重建 condition_id -> 行号映射和 token IDs 缓存"""
+        self._markets_df = markets_df
+        self._token_ids_cache = {}
+        
+        if 'condition_id' in markets_df.columns:
+            # 倒序插入，重复的 condition_id 保留第一行
+            ids = markets_df['condition_id'].tolist()
+            self._market_positions = dict(zip(ids[::-1], range(len(ids) - 1, -1, -1)))
+        else:
+            self._market_positions = None
+    
     def get_market_info(self, market_id: str) -> Optional[Dict]:
         """
         获取市场详细信息
@@ -132,12 +238,12 @@ class MarketDataLoader:
         if 'condition_id' not in markets_df.columns:
             return None
         
-        market_row = markets_df[markets_df['condition_id'] == market_id]
+        position = (self._market_positions or {}).get(market_id)
         
-        if len(market_row) == 0:
+        if position is None:
             return None
         
-        info = market_row.iloc[0].to_dict()
+        info = markets_df.iloc[position].to_dict()
         
         # 解析 JSON 字段
         for field in ['outcomes', 'outcome_prices', 'clob_token_ids']:
@@ -150,7 +256,11 @@ class MarketDataLoader:
         return info
     
     def _get_token_ids_for_market(self, market_id: str) -> List[str]:
-        """获取市场的 token IDs"""
+        """获取市场的 token IDs（每个市场只解析一次）"""
+        cached = self._token_ids_cache.get(market_id)
+        if cached is not None:
+            return list(cached)
+        
         info = self.get_market_info(market_id)
         
         if not info:
@@ -166,9 +276,11 @@ class MarketDataLoader:
                 token_ids = []
         
         # 转为字符串
-        return [str(tid) for tid in token_ids]
+        token_ids = [str(tid) for tid in token_ids]
+        self._token_ids_cache[market_id] = tuple(token_ids)
+        return token_ids
     
-    def _scan_trades_files(self) -> List[Tuple[int, int, Path]]:
+    def _scan_trades_files(self) -> List[Tuple[int, int, str]]:
         """
         扫描可用的交易文件
         
@@ -185,16 +297,12 @@ class MarketDataLoader:
         
         # 只读取少量文件避免超时
         try:
-            for entry in os.scandir(trades_dir):
-                if entry.is_file() and entry.name.startswith('trades_') and entry.name.endswith('.parquet'):
-                    # 解析文件名: trades_{start}_{end}.parquet
-                    try:
-                        parts = entry.name.replace('trades_', '').replace('.parquet', '').split('_')
-                        start_block = int(parts[0])
-                        end_block = int(parts[1])
-                        files.append((start_block, end_block, Path(entry.path)))
-                    except:
-                        continue
+            with os.scandir(trades_dir) as entries:
+                for entry in entries:
+                    # 先匹配文件名，不匹配的条目不需要 stat
+                    match = TRADES_FILE_RE.match(entry.name)
+                    if match and entry.is_file():
+                        files.append((int(match[1]), int(match[2]), entry.path))
         except Exception as e:
             logger.error(f"扫描 trades 文件失败: {e}")
         
@@ -202,90 +310,74 @@ class MarketDataLoader:
         files.sort()
         return files
     
-    def _build_market_index(self, force_rebuild: bool = False) -> Dict[str, List[Tuple[int, int]]]:
+    def _get_parquet_fragment(self, file_path: str) -> ds.ParquetFileFragment:
         """
-        构建市场-区块索引
+        获取已解析 footer 的 parquet 文件片段
         
-        Args:
-            force_rebuild: 强制重建索引
-            
-        Returns:
-            索引字典 {market_id: [(start_block, end_block), ...]}
+        片段按文件 mtime 缓存，后续读取复用其中的 schema 和行组统计，
+        文件被替换后自动重新解析。
         """
-        if self._market_index is not None and not force_rebuild:
-            return self._market_index
-        
-        # 检查缓存的索引
-        if self.use_cache and self.index_file.exists() and not force_rebuild:
-            logger.info("从缓存加载市场索引...")
-            with open(self.index_file, 'rb') as f:
-                self._market_index = pickle.load(f)
-            return self._market_index
+        mtime = os.stat(file_path).st_mtime
         
-        logger.info("构建市场-区块索引...")
-        
-        # 获取所有市场
-        markets_df = self._load_markets()
+        with self._pq_fragment_lock:
+            cached = self._pq_fragment_cache.get(file_path)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
         
-        # 初始化索引
-        index: Dict[str, List[Tuple[int, int]]] = {}
+        fragment = _TRADES_FILE_FORMAT.make_fragment(file_path, filesystem=_LOCAL_FS)
+        fragment.ensure_complete_metadata()
         
-        # 扫描交易文件
-        trades_files = self._scan_trades_files()
-        
-        if not trades_files:
-            logger.warning("未找到交易文件")
-            return {}
-        
-        logger.info(f"扫描到 {len(trades_files)} 个交易文件")
-        
-        # 为每个市场建立索引（只处理少量样本避免太慢）
-        sample_size = min(100, len(markets_df))
-        sample_markets = markets_df.head(sample_size)
-        
-        for _, market in sample_markets.iterrows():
-            market_id = market['condition_id']
-            token_ids = self._get_token_ids_for_market(market_id)
-            
-            if not token_ids:
-                continue
-            
-            # 检查哪些文件包含该市场的交易
-            relevant_blocks = []
-            
-            for start_block, end_block, file_path in trades_files[:20]:  # 只检查前20个文件
-                try:
-                    # 快速检查：只读取前几行
-                    df = pd.read_parquet(file_path, columns=['taker_asset_id'])
-                    
-                    # 检查是否有交集
-                    file_tokens = set(df['taker_asset_id'].astype(str).unique())
-                    
-                    if any(str(tid) in file_tokens for tid in token_ids):
-                        relevant_blocks.append((start_block, end_block))
-                        
-                except Exception as e:
-                    continue
-            
-            if relevant_blocks:
-                index[market_id] = relevant_blocks
+        with self._pq_fragment_lock:
+            self._pq_fragment_cache[file_path] = (mtime, fragment)
+        return fragment
+    
+    def _load_market_index(self) -> Dict[str, Tuple[int, List[Tuple[int, int]]]]:
+        """
+        加载市场-区块索引（首次调用时从缓存文件读取）
         
-        self._market_index = index
+        索引按市场惰性构建：不预先扫描任何文件，某个市场第一次从 SMB
+        读取时顺带记录包含其交易的文件，见 _update_market_index。
         
-        # 保存索引
-        if self.use_cache:
-            with open(self.index_file, 'wb') as f:
-                pickle.dump(index, f)
-            logger.info(f"已缓存 {len(index)} 个市场的索引")
+        Returns:
+            索引字典 {market_id: (已扫描到的区块, [(start_block, end_block), ...])}
+        """
+        if self._market_index is None:
+            with self._market_index_lock:
+                if self._market_index is None:
+                    index = {}
+                    if self.use_cache and self.index_file.exists():
+                        logger.info("从缓存加载市场索引...")
+                        index = _read_market_index(self.index_file)
+                    self._market_index = index
+        return self._market_index
+    
+    def _update_market_index(
+        self,
+        market_id: str,
+        scanned_through: int,
+        block_ranges: List[Tuple[int, int]]
+    ):
+        """
+        记录单个市场的索引条目并持久化
         
-        return index
+        Args:
+            market_id: 市场 condition_id
+            scanned_through: 已扫描文件的最大结束区块，之后新增的文件下次仍需扫描
+            block_ranges: 包含该市场交易的文件区块范围
+        """
+        index = self._load_market_index()
+        with self._market_index_lock:
+            index[market_id] = (scanned_through, sorted(block_ranges))
+            if self.use_cache:
+                _write_market_index(self.index_file, index)
     
     def get_market_trades(
         self,
         market_id: str,
         start_time: Optional[datetime] = None,
         end_time: Optional[datetime] = None,
-        use_cache: bool = True
+        use_cache: bool = True,
+        columns: Optional[List[str]] = None
     ) -> pd.DataFrame:
         """
         获取市场交易数据
@@ -295,6 +387,7 @@ class MarketDataLoader:
             start_time: 开始时间（可选）
             end_time: 结束时间（可选）
             use_cache: 是否使用本地缓存
+            columns: 只返回这些列（可选）；命中缓存且无时间过滤时在读取 parquet 时投影
             
         Returns:
             交易数据 DataFrame
@@ -303,15 +396,56 @@ class MarketDataLoader:
         cache_path = self._get_market_cache_path(market_id)
         
         if use_cache and self.use_cache and cache_path.exists():
-            logger.info(f"从本地缓存加载 {market_id[:20]}... 的交易数据")
-            df = pd.read_parquet(cache_path)
-            
-            # 应用时间过滤
-            if start_time or end_time:
-                df = self._filter_by_time(df, start_time, end_time)
+            age = time.time() - cache_path.stat().st_mtime
             
-            return df
+            if self.hard_ttl is None or age <= self.hard_ttl:
+                if self.stale_ttl is not None and age > self.stale_ttl:
+                    # 过期但未失效: 先返回旧数据，后台刷新
+                    self._stale_hits += 1
+                    self._schedule_refresh(market_id)
+                else:
+                    self._fresh_hits += 1
+                
+                logger.info(f"从本地缓存加载 {market_id[:20]}... 的交易数据")
+                
+                # 时间过滤需要时间列，此时先完整读取再投影
+                if start_time or end_time:
+                    df = pd.read_parquet(cache_path)
+                    df = self._filter_by_time(df, start_time, end_time)
+                    return df[list(columns)] if columns is not None else df
+                
+                return pd.read_parquet(cache_path, columns=columns)
+        
+        self._misses += 1
+        result = self._fetch_market_trades(market_id)
+        
+        if result.empty:
+            return result
+        
+        # 保存到缓存
+        if self.use_cache and use_cache:
+            self._write_trades_cache(market_id, result)
+            logger.info(f"已缓存到 {cache_path}")
+        
+        # 应用时间过滤
+        if start_time or end_time:
+            result = self._filter_by_time(result, start_time, end_time)
+        
+        if columns is not None:
+            result = result[list(columns)]
+        
+        return result
+    
+    def _fetch_market_trades(self, market_id: str) -> pd.DataFrame:
+        """
+        从 SMB 读取市场的全部交易数据（不使用缓存）
         
+        Args:
+            market_id: 市场 condition_id
+            
+        Returns:
+            按区块排序的交易数据 DataFrame，未找到时为空
+        """
         # 获取市场 token IDs
         token_ids = self._get_token_ids_for_market(market_id)
         
@@ -322,69 +456,277 @@ class MarketDataLoader:
         logger.info(f"加载市场 {market_id[:20]}... 的交易数据")
         logger.info(f"Token IDs: {[tid[:20] + '...' for tid in token_ids]}")
         
-        # 获取相关区块范围
-        index = self._build_market_index()
-        block_ranges = index.get(market_id, [])
+        trades_files = self._scan_trades_files()
+        if not trades_files:
+            logger.warning("未找到交易文件")
+            return pd.DataFrame()
         
-        if not block_ranges:
-            logger.info(f"未找到市场的索引，尝试扫描所有文件...")
-            # 扫描所有文件
-            block_ranges = self._scan_trades_files()
-            block_ranges = [(s, e) for s, e, _ in block_ranges]
+        # 已索引的市场只读取包含其交易的文件，以及索引之后新增的文件
+        entry = self._load_market_index().get(market_id)
+        if entry is not None:
+            scanned_through, block_ranges = entry
+            known = set(block_ranges)
+            trades_files = [
+                (start_block, end_block, path)
+                for start_block, end_block, path in trades_files
+                if (start_block, end_block) in known or start_block > scanned_through
+            ]
+        else:
+            logger.info(f"市场尚未索引，扫描所有文件...")
+        
+        # 并发读取并过滤各交易文件（读取 parquet 时释放 GIL，网络等待可重叠）
+        with ThreadPoolExecutor(
+            max_workers=self.io_concurrency, thread_name_prefix="trades-read"
+        ) as executor:
+            results = list(executor.map(
+                lambda item: self._read_and_filter(item[2], token_ids), trades_files
+            ))
+        
+        # 所有文件都读取成功时，顺带记录该市场的索引条目
+        if trades_files and all(table is not None for table in results):
+            self._update_market_index(
+                market_id,
+                max(entry[0] if entry else -1, trades_files[-1][1]),
+                [
+                    (start_block, end_block)
+                    for (start_block, end_block, _), table in zip(trades_files, results)
+                    if table.num_rows > 0
+                ]
+            )
         
-        # 读取并合并交易数据
-        all_trades = []
+        all_trades = [table for table in results if table is not None and table.num_rows > 0]
+        del results
         
-        for start_block, end_block in block_ranges:
-            file_path = self.data_path / "polymarket" / "trades" / f"trades_{start_block}_{end_block}.parquet"
+        if not all_trades:
+            logger.warning(f"未找到市场 {market_id[:20]}... 的交易数据")
+            return pd.DataFrame()
+        
+        # 在 Arrow 中合并各文件的过滤结果（只拼接 chunk，不复制数据）并按区块排序，
+        # 最后只转换一次 pandas：每列单独成块且转换后立即释放 Arrow 缓冲区，
+        # 避免中间 DataFrame 和 pandas 合并/排序带来的额外复制
+        table = pa.concat_tables(all_trades, promote_options='permissive')
+        del all_trades
+        if 'block_number' in table.column_names:
+            table = table.sort_by('block_number')
+        result = table.to_pandas(self_destruct=True, split_blocks=True, use_threads=True)
+        del table
+        result['market_id'] = market_id
+        
+        # 时间戳只在加载时解析一次，以 datetime64 写入缓存，下游过滤不再重复解析
+        if 'timestamp' in result.columns and not pd.api.types.is_datetime64_any_dtype(
+            result['timestamp']
+        ):
+            result['timestamp'] = pd.to_datetime(result['timestamp'])
+        
+        logger.info(f"加载完成: {len(result)} 条交易记录")
+        
+        return result
+    
+    def _read_and_filter(
+        self,
+        file_path: str,
+        token_ids: List[str]
+    ) -> Optional[pa.Table]:
+        """
+        按批次流式读取单个交易文件并过滤出指定 token 的交易
+        
+        谓词下推到扫描阶段，每次只解码一个批次，峰值内存与 READ_BATCH_SIZE
+        成正比而非与文件大小成正比；只保留匹配行组成的小批次。
+        
+        Args:
+            file_path: 交易文件路径
+            token_ids: 市场的 token IDs
             
-            if not file_path.exists():
-                continue
+        Returns:
+            匹配的交易数据 Arrow Table (无匹配时为空表)，文件不存在或读取失败时返回 None
+        """
+        if not os.path.exists(file_path):
+            return None
+        
+        try:
+            logger.debug(f"读取 {os.path.basename(file_path)}...")
+            fragment = self._get_parquet_fragment(file_path)
+            schema = fragment.physical_schema
+            available = set(schema.names)
             
-            try:
-                logger.debug(f"读取 {file_path.name}...")
-                df = pd.read_parquet(file_path)
-                
-                # 过滤该市场的交易
-                mask = (
-                    df['taker_asset_id'].astype(str).isin(token_ids) |
-                    df['maker_asset_id'].astype(str).isin(token_ids)
+            # 过滤该市场的交易（表达式按列类型缓存，同一市场的各文件共用）
+            tokens = tuple(token_ids)
+            predicate = (
+                _asset_id_predicate('taker_asset_id', schema.field('taker_asset_id').type, tokens) |
+                _asset_id_predicate('maker_asset_id', schema.field('maker_asset_id').type, tokens)
+            )
+            columns = [c for c in TRADE_FILE_COLUMNS if c in available]
+            batches = [
+                batch for batch in fragment.to_batches(
+                    columns=columns,
+                    filter=predicate,
+                    batch_size=READ_BATCH_SIZE
                 )
-                market_trades = df[mask].copy()
-                
-                if len(market_trades) > 0:
-                    # 添加市场 ID 列
-                    market_trades['market_id'] = market_id
-                    all_trades.append(market_trades)
-                    
-            except Exception as e:
-                logger.error(f"读取文件失败 {file_path}: {e}")
-                continue
+                if batch.num_rows > 0
+            ]
+            
+            if not batches:
+                return pa.schema([schema.field(c) for c in columns]).empty_table()
+            
+            return pa.Table.from_batches(batches)
+            
+        except Exception as e:
+            logger.error(f"读取文件失败 {file_path}: {e}")
+            return None
+    
+    def _write_trades_cache(self, market_id: str, trades: pd.DataFrame):
+        """
+        原子写入市场交易缓存
         
-        if not all_trades:
-            logger.warning(f"未找到市场 {market_id[:20]}... 的交易数据")
-            return pd.DataFrame()
+        先写临时文件再替换，读取方不会看到写了一半的文件。原始数据变化后
+        对应的转换缓存随之失效。
+        """
+        cache_path = self._get_market_cache_path(market_id)
+        tmp_path = cache_path.with_name(f"{cache_path.stem}.{threading.get_ident()}.tmp")
+        trades.to_parquet(tmp_path)
+        os.replace(tmp_path, cache_path)
         
-        # 合并数据
-        result = pd.concat(all_trades, ignore_index=True)
+        meta_path = self._get_converted_cache_path(market_id).with_suffix('.json')
+        if meta_path.exists():
+            meta_path.unlink()
+    
+    def _schedule_refresh(self, market_id: str):
+        """提交后台刷新任务（同一市场同时只有一个刷新任务）"""
+        with self._refresh_lock:
+            future = self._refresh_futures.get(market_id)
+            if future is not None and not future.done():
+                return
+            
+            if self._refresh_executor is None:
+                self._refresh_executor = ThreadPoolExecutor(
+                    max_workers=2, thread_name_prefix="trades-refresh"
+                )
+            self._refresh_futures[market_id] = self._refresh_executor.submit(
+                self._refresh_market_trades, market_id
+            )
+    
+    def _refresh_market_trades(self, market_id: str):
+        """后台重新读取 SMB 并替换缓存，读取失败时保留旧缓存"""
+        try:
+            result = self._fetch_market_trades(market_id)
+            if not result.empty:
+                self._write_trades_cache(market_id, result)
+                logger.info(f"后台刷新完成 {market_id[:20]}...")
+        except Exception as e:
+            logger.error(f"后台刷新失败 {market_id[:20]}...: {e}")
+        finally:
+            with self._refresh_lock:
+                self._background_refreshes += 1
+    
+    def get_converted_trades(self, market_id: str, use_cache: bool = True) -> pd.DataFrame:
+        """
+        获取转换为策略格式的市场交易数据
         
-        # 排序
-        if 'block_number' in result.columns:
-            result = result.sort_values('block_number')
+        转换结果以 Feather (LZ4) 缓存到本地，旁边的 JSON 文件记录格式版本，
+        命中时通过内存映射读取，无需重新读取原始数据和转换。
         
-        logger.info(f"加载完成: {len(result)} 条交易记录")
+        Args:
+            market_id: 市场 condition_id
+            use_cache: 是否使用本地缓存
+            
+        Returns:
+            策略格式的交易数据 DataFrame
+        """
+        cache_path = self._get_converted_cache_path(market_id)
         
-        # 保存到缓存
-        if self.use_cache and use_cache:
-            result.to_parquet(cache_path)
-            logger.info(f"已缓存到 {cache_path}")
+        if use_cache and self.use_cache and self._is_converted_cache_valid(cache_path):
+            self._converted_hits += 1
+            logger.info(f"从本地缓存加载 {market_id[:20]}... 的转换数据")
+            table = feather.read_table(cache_path, memory_map=True)
+            return table.to_pandas(self_destruct=True)
         
-        # 应用时间过滤
-        if start_time or end_time:
-            result = self._filter_by_time(result, start_time, end_time)
+        self._converted_misses += 1
+        
+        trades = self.get_market_trades(market_id, use_cache=use_cache)
+        result = convert_raw_trades_to_market_format(trades)
+        
+        # 保存到缓存
+        if self.use_cache and use_cache and len(result) > 0:
+            table = pa.Table.from_pandas(result, preserve_index=False)
+            feather.write_feather(table, cache_path, compression='lz4')
+            cache_path.with_suffix('.json').write_text(
+                json.dumps({'version': CONVERTED_CACHE_VERSION, 'rows': len(result)})
+            )
+            logger.info(f"已缓存转换数据到 {cache_path}")
         
         return result
     
+    def iter_market_trades(
+        self,
+        market_id: str,
+        batch_size: int = 65536,
+        columns: Optional[List[str]] = None
+    ) -> Iterator[pa.RecordBatch]:
+        """
+        按批次流式读取策略格式的市场交易数据
+        
+        从内存映射的 Feather 转换缓存中逐个解码 RecordBatch，峰值内存
+        与 batch_size 成正比，而非与整个市场的交易量成正比。转换缓存
+        不存在时先通过 get_converted_trades 生成。
+        
+        Args:
+            market_id: 市场 condition_id
+            batch_size: 每批最大行数
+            columns: 只返回这些列（可选，按给定顺序），未选中的列不会被解码
+            
+        Yields:
+            策略格式的 RecordBatch (timestamp, price, size, side, market)
+            
+        Raises:
+            KeyError: columns 中包含不存在的列（调用时立即抛出）
+        """
+        if columns is not None:
+            columns = list(columns)
+            unknown = [c for c in columns if c not in MARKET_TRADE_COLUMNS]
+            if unknown:
+                raise KeyError(f"未知列: {unknown}")
+        
+        return self._iter_market_trades(market_id, batch_size, columns)
+    
+    def _iter_market_trades(
+        self,
+        market_id: str,
+        batch_size: int,
+        columns: Optional[List[str]]
+    ) -> Iterator[pa.RecordBatch]:
+        """iter_market_trades 的生成器实现（columns 已校验）"""
+        cache_path = self._get_converted_cache_path(market_id)
+        
+        if not (self.use_cache and self._is_converted_cache_valid(cache_path)):
+            result = self.get_converted_trades(market_id)
+            
+            # 禁用缓存或未能写入缓存（无数据）时直接切分内存中的结果，
+            # 禁用缓存时不读取已有的缓存文件
+            if not (self.use_cache and self._is_converted_cache_valid(cache_path)):
+                if len(result) > 0:
+                    if columns is not None:
+                        result = result[columns]
+                    table = pa.Table.from_pandas(result, preserve_index=False)
+                    yield from table.to_batches(max_chunksize=batch_size)
+                return
+        else:
+            self._converted_hits += 1
+        
+        with pa.memory_map(str(cache_path)) as source:
+            reader = pa.ipc.open_file(source)
+            if columns is not None:
+                # 按字段下标重新打开，只解码选中的列（解码结果按文件中的列序排列）
+                indices = sorted({reader.schema.get_field_index(c) for c in columns})
+                options = pa.ipc.IpcReadOptions(included_fields=indices)
+                reader = pa.ipc.open_file(source, options=options)
+            for i in range(reader.num_record_batches):
+                batch = reader.get_batch(i)
+                if columns is not None:
+                    # 恢复调用方给定的列序
+                    batch = batch.select(columns)
+                for offset in range(0, batch.num_rows, batch_size):
+                    yield batch.slice(offset, batch_size)
+    
     def _filter_by_time(
         self,
         df: pd.DataFrame,
@@ -405,16 +747,18 @@ class MarketDataLoader:
         if not time_col:
             return df
         
-        if time_col == 'timestamp' or time_col == '_fetched_at':
-            df[time_col] = pd.to_datetime(df[time_col])
+        values = df[time_col]
+        if time_col != 'block_number' and not pd.api.types.is_datetime64_any_dtype(values):
+            values = pd.to_datetime(values)
         
+        # 在同一列上一次构建掩码
+        mask = np.ones(len(df), dtype=bool)
         if start_time:
-            df = df[df[time_col] >= start_time]
-        
+            mask &= (values >= start_time).to_numpy()
         if end_time:
-            df = df[df[time_col] <= end_time]
+            mask &= (values <= end_time).to_numpy()
         
-        return df
+        return df[mask]
     
     def clear_cache(self):
         """清除所有本地缓存"""
@@ -425,6 +769,12 @@ class MarketDataLoader:
             for f in self.trades_cache_dir.glob("*.parquet"):
                 f.unlink()
         
+        # 清除转换缓存
+        if self.converted_cache_dir.exists():
+            for pattern in ("*.feather", "*.json"):
+                for f in self.converted_cache_dir.glob(pattern):
+                    f.unlink()
+        
         # 清除索引
         if self.index_file.exists():
             self.index_file.unlink()
@@ -435,8 +785,18 @@ class MarketDataLoader:
         
         # 重置内存缓存
         self._markets_df = None
+        self._market_positions = None
+        self._token_ids_cache = {}
         self._market_index = None
         self._loaded_trades_files.clear()
+        with self._pq_fragment_lock:
+            self._pq_fragment_cache.clear()
+        self._converted_hits = 0
+        self._converted_misses = 0
+        self._fresh_hits = 0
+        self._stale_hits = 0
+        self._misses = 0
+        self._background_refreshes = 0
         
         logger.info("缓存已清除")
     
@@ -447,16 +807,31 @@ class MarketDataLoader:
             'markets_cached': self.markets_cache.exists(),
             'index_exists': self.index_file.exists(),
             'trades_cached': 0,
+            'converted_cached': 0,
+            'converted_hits': self._converted_hits,
+            'converted_misses': self._converted_misses,
+            'fresh_hits': self._fresh_hits,
+            'stale_hits': self._stale_hits,
+            'misses': self._misses,
+            'background_refreshes': self._background_refreshes,
             'total_cache_size_mb': 0
         }
         
+        total_size = 0
+        
         # 统计交易缓存
         if self.trades_cache_dir.exists():
             trades_files = list(self.trades_cache_dir.glob("*.parquet"))
             stats['trades_cached'] = len(trades_files)
-            
-            total_size = sum(f.stat().st_size for f in trades_files)
-            stats['total_cache_size_mb'] = round(total_size / (1024 * 1024), 2)
+            total_size += sum(f.stat().st_size for f in trades_files)
+        
+        # 统计转换缓存
+        if self.converted_cache_dir.exists():
+            converted_files = list(self.converted_cache_dir.glob("*.feather"))
+            stats['converted_cached'] = len(converted_files)
+            total_size += sum(f.stat().st_size for f in converted_files)
+        
+        stats['total_cache_size_mb'] = round(total_size / (1024 * 1024), 2)
         
         # 计算 markets 缓存大小
         if self.markets_cache.exists():
@@ -467,47 +842,209 @@ class MarketDataLoader:
         return stats
 
 
-def convert_raw_trades_to_market_format(df: pd.DataFrame) -> pd.DataFrame:
+@functools.lru_cache(maxsize=4096)
+def _market_cache_key(market_id: str) -> str:
     """
-    将原始交易数据转换为策略可用的市场格式
+    市场 ID -> 16 位十六进制缓存键
     
-    原始格式 (from blockchain):
-    - block_number, transaction_hash, maker_asset_id, taker_asset_id, maker_amount, taker_amount
+    缓存键只用作文件名，不需要加密哈希；blake2b 直接输出 8 字节摘要，
+    比 md5 截断更快，64 位也足以避免市场之间的冲突
+    """
+    return hashlib.blake2b(market_id.encode(), digest_size=8).hexdigest()
+
+
+# 市场索引文件 schema: 每个市场一行，包含已扫描到的区块和其所在的区块范围列表
+MARKET_INDEX_SCHEMA = pa.schema([
+    ('market_id', pa.string()),
+    ('scanned_through', pa.int64()),
+    ('file_range', pa.list_(pa.struct([('start', pa.int64()), ('end', pa.int64())]))),
+])
+
+
+def _write_market_index(path: Path, index: Dict[str, Tuple[int, List[Tuple[int, int]]]]):
+    """将市场索引原子写入 Arrow IPC 文件"""
+    table = pa.table({
+        'market_id': list(index),
+        'scanned_through': [scanned_through for scanned_through, _ in index.values()],
+        'file_range': [
+            [{'start': start, 'end': end} for start, end in ranges]
+            for _, ranges in index.values()
+        ],
+    }, schema=MARKET_INDEX_SCHEMA)
     
-    目标格式:
-    - timestamp, market, price, size, side
+    tmp_path = path.with_name(f"{path.name}.{threading.get_ident()}.tmp")
+    with pa.OSFile(str(tmp_path), 'wb') as sink:
+        with pa.ipc.new_file(sink, MARKET_INDEX_SCHEMA) as writer:
+            writer.write_table(table)
+    os.replace(tmp_path, path)
+
+
+def _read_market_index(path: Path) -> Dict[str, Tuple[int, List[Tuple[int, int]]]]:
+    """内存映射读取 Arrow IPC 市场索引，旧格式的索引文件视为空索引"""
+    with pa.memory_map(str(path), 'r') as source:
+        table = pa.ipc.open_file(source).read_all()
+        if not table.schema.equals(MARKET_INDEX_SCHEMA):
+            return {}
+        
+        # 展开 list<struct> 为扁平的 start/end 列，不为每个范围构造中间 dict
+        file_range = table['file_range'].combine_chunks()
+        offsets = file_range.offsets.to_pylist()
+        offsets = [offset - offsets[0] for offset in offsets]
+        flat = file_range.flatten()
+        ranges = list(zip(flat.field('start').to_pylist(), flat.field('end').to_pylist()))
+        
+        return {
+            market_id: (scanned_through, ranges[lo:hi])
+            for market_id, scanned_through, lo, hi in zip(
+                table['market_id'].to_pylist(),
+                table['scanned_through'].to_pylist(),
+                offsets[:-1],
+                offsets[1:]
+            )
+        }
+
+
+@functools.lru_cache(maxsize=256)
+def _asset_id_predicate(
+    column: str,
+    field_type: pa.DataType,
+    token_ids: Tuple[str, ...]
+) -> ds.Expression:
     """
-    if df.empty:
-        return pd.DataFrame(columns=['timestamp', 'market', 'price', 'size', 'side'])
+    构建 asset id 列的 isin 过滤表达式
+    
+    token IDs 先转换为该列在 parquet 中的原生类型，比较在原生类型上进行，
+    可利用行组统计信息；无法转换时退回到把列转为字符串比较。表达式在扫描
+    时由 Arrow 的多线程 is_in 内核求值；按 (列, 类型, token IDs) 缓存，
+    同一市场的各文件不再重复构建 value_set 和类型转换。
+    
+    Args:
+        column: asset id 列名
+        field_type: 该列在交易文件中的类型
+        token_ids: 字符串形式的 token IDs
+        
+    Returns:
+        dataset 过滤表达式
+    """
+    token_set = pa.array(token_ids, type=pa.string())
     
-    result = pd.DataFrame()
+    if field_type != pa.string():
+        try:
+            return pc.is_in(ds.field(column), value_set=token_set.cast(field_type))
+        except (pa.ArrowInvalid, pa.ArrowNotImplementedError):
+            return pc.is_in(ds.field(column).cast(pa.string()), value_set=token_set)
+    
+    return pc.is_in(ds.field(column), value_set=token_set)
+
+
+# 转换所需的原始列 (其余列在投影时丢弃)
+RAW_TRADE_COLUMNS = [
+    'timestamp', 'block_number', 'maker_asset_id', 'maker_amount', 'taker_amount', 'market_id'
+]
+
+
+# side 列的字典 (编码 0 = BUY, 1 = SELL)
+SIDE_CATEGORIES = pa.array(['BUY', 'SELL'], type=pa.string())
+
+
+def convert_raw_trades_to_arrow(trades: Union[pd.DataFrame, pa.Table]) -> pa.Table:
+    """
+    将原始交易数据转换为策略格式的 Arrow Table
+    
+    只投影转换所需的列，方向由 Arrow compute 内核按列计算，价格/数量在 NumPy
+    缓冲区上原地计算，避免 pandas 逐行处理和 object 列开销。
+    
+    Args:
+        trades: 原始交易数据 (pandas DataFrame 或 pyarrow Table)
+        
+    Returns:
+        包含 timestamp, price, size, side, market 列的 Arrow Table
+    """
+    if isinstance(trades, pd.DataFrame):
+        columns = [c for c in RAW_TRADE_COLUMNS if c in trades.columns]
+        table = pa.Table.from_pandas(trades[columns], preserve_index=False)
+    else:
+        table = trades.select([c for c in RAW_TRADE_COLUMNS if c in trades.column_names])
+    
+    n = table.num_rows
     
     # 使用 block_number 作为时间索引（或尝试解析 timestamp）
-    if 'timestamp' in df.columns and df['timestamp'].notna().any():
-        result['timestamp'] = pd.to_datetime(df['timestamp'])
+    if 'timestamp' in table.column_names and table['timestamp'].null_count < n:
+        timestamp = table['timestamp']
     else:
         # 使用 block_number 作为伪时间戳
-        result['timestamp'] = pd.to_datetime(df['block_number'], unit='s')
+        timestamp = pc.cast(
+            pc.cast(table['block_number'], pa.int64()), pa.timestamp('s')
+        ).cast(pa.timestamp('ns'))
     
     # 计算价格 (taker_amount / maker_amount，假设是二元市场)
     # 注意：这是简化计算，实际应根据 token 类型确定
-    result['price'] = df['taker_amount'] / (df['maker_amount'] + df['taker_amount'])
-    result['price'] = result['price'].clip(0.01, 0.99)
-    
-    # 交易数量
-    result['size'] = df['maker_amount'] + df['taker_amount']
+    # 两列各取出一次，size 与 price 在同一缓冲区上原地计算，不产生额外中间数组
+    maker_amount = pc.cast(table['maker_amount'], pa.float64()).to_numpy()
+    taker_amount = pc.cast(table['taker_amount'], pa.float64()).to_numpy()
+    size = maker_amount + taker_amount
+    price = np.empty_like(size)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        np.divide(taker_amount, size, out=price)
+    np.clip(price, 0.01, 0.99, out=price)
     
     # 买卖方向（简化判断）
     # 如果 maker_asset_id 为 0，通常是买入
-    result['side'] = df['maker_asset_id'].apply(lambda x: 'BUY' if x == 0 else 'SELL')
+    maker_asset_id = table['maker_asset_id']
+    zero = "0" if pa.types.is_string(maker_asset_id.type) else 0
+    # 以字典编码存储 (int8 编码 + BUY/SELL 字典)，pandas 中为 1 字节/行的 Categorical
+    side_codes = pc.cast(pc.not_equal(maker_asset_id, zero), pa.int8())
+    if isinstance(side_codes, pa.ChunkedArray):
+        side_codes = side_codes.combine_chunks()
+    side = pa.DictionaryArray.from_arrays(side_codes, SIDE_CATEGORIES)
     
     # 市场 ID
-    result['market'] = df.get('market_id', 'unknown')
+    if 'market_id' in table.column_names:
+        market = table['market_id']
+    else:
+        market = pa.array(['unknown'] * n, type=pa.string())
+    
+    return pa.table({
+        'timestamp': timestamp,
+        'price': price,
+        'size': size,
+        'side': side,
+        'market': market,
+    })
+
+
+def convert_raw_trades_to_market_format(trades: Union[pd.DataFrame, pa.Table]) -> pd.DataFrame:
+    """
+    将原始交易数据转换为策略可用的市场格式
+    
+    原始格式 (from blockchain):
+    - block_number, transaction_hash, maker_asset_id, taker_asset_id, maker_amount, taker_amount
+    
+    目标格式:
+    - timestamp, market, price, size, side
+    
+    计算在 Arrow 上完成 (见 convert_raw_trades_to_arrow)，只在最后物化为 pandas。
+    """
+    if len(trades) == 0:
+        return pd.DataFrame(columns=['timestamp', 'market', 'price', 'size', 'side'])
+    
+    result = convert_raw_trades_to_arrow(trades).to_pandas()
+    
+    if not pd.api.types.is_datetime64_any_dtype(result['timestamp']):
+        result['timestamp'] = pd.to_datetime(result['timestamp'])
     
     return result
 
 
 # 便捷函数
-def create_default_loader(cache_dir: Optional[str] = None) -> MarketDataLoader:
+def create_default_loader(
+    cache_dir: Optional[str] = None,
+    stale_ttl: Optional[float] = None,
+    hard_ttl: Optional[float] = None
+) -> MarketDataLoader:
     """创建默认的数据加载器"""
-    return MarketDataLoader(cache_dir=cache_dir or "~/.cache/polymarket")
+    return MarketDataLoader(
+        cache_dir=cache_dir or "~/.cache/polymarket",
+        stale_ttl=stale_ttl,
+        hard_ttl=hard_ttl
+    )
@@ -4,15 +4,126 @@
 提供订单定价功能，参考 poly-maker 核心算法
 """
 
+import functools
+import math
 import numpy as np
-from typing import Dict, Tuple, Optional
+from dataclasses import dataclass
+from typing import Dict, Tuple, Union
+
+try:
+    from ._njit import njit, prange, NUMBA_AVAILABLE
+except ImportError:
+    from _njit import njit, prange, NUMBA_AVAILABLE
+
+
+# 订单簿深度分档: 平均深度超过的阈值个数 -> 价差调整因子
+# (<=500 深度不足扩大价差, <=2000 正常, <=5000, >5000 深度很好缩小价差)
+DEPTH_THRESHOLDS = (500.0, 2000.0, 5000.0)
+DEPTH_FACTORS = (1.2, 1.0, 0.9, 0.8)
+_DEPTH_THRESHOLDS = np.array(DEPTH_THRESHOLDS)
+_DEPTH_FACTOR_TABLE = np.array(DEPTH_FACTORS)
+
+# 批量定价达到该行数且 numba 可用时，改为多线程逐行调用标量内核
+PARALLEL_BATCH_MIN_ROWS = 10_000
+
+
+@dataclass(slots=True)
+class OrderBookView:
+    """
+    订单簿快照的定长结构
+    
+    每个 tick 由 from_dict 构造一次，之后定价和失衡检查都通过属性读取，
+    不再在热路径上重复 dict.get；缺失值已按定价规则填充默认值
+    """
+    best_bid: float = 0.0
+    best_ask: float = 0.0
+    best_bid_size: float = 0.0
+    best_ask_size: float = 0.0
+    bid_sum: float = 1000.0
+    ask_sum: float = 1000.0
+    
+    @classmethod
+    def from_dict(cls, order_book: Dict) -> 'OrderBookView':
+        """
+        从订单簿 dict 构造（值为 0/None 的深度按 1000 处理）
+        
+        Args:
+            order_book: 订单簿数据，包含 best_bid, best_ask, 等
+            
+        Returns:
+            OrderBookView
+        """
+        get = order_book.get
+        return cls(
+            float(get('best_bid', 0.0) or 0.0),
+            float(get('best_ask', 0.0) or 0.0),
+            float(get('best_bid_size', 0) or 0),
+            float(get('best_ask_size', 0) or 0),
+            float(get('bid_sum_within_n_percent', 1000) or 1000),
+            float(get('ask_sum_within_n_percent', 1000) or 1000),
+        )
+
+
+@dataclass(slots=True, frozen=True)
+class PricingParams:
+    """
+    定价参数
+    
+    由策略配置构造一次，传给 get_order_prices 的 row 参数，
+    逐 tick 定价时不再查找 dict
+    """
+    tick_size: float = 0.01
+    base_spread: float = 0.02
+    min_spread: float = 0.01
+    max_spread: float = 0.05
+    
+    @classmethod
+    def from_dict(cls, row: Dict) -> 'PricingParams':
+        """从市场参数行构造（缺失键取默认值）"""
+        return cls(
+            float(row.get('tick_size', 0.01)),
+            float(row.get('base_spread', 0.02)),
+            float(row.get('min_spread', 0.01)),
+            float(row.get('max_spread', 0.05)),
+        )
+
+
+@dataclass(slots=True, frozen=True)
+class SizingParams:
+    """
+    下单数量参数
+    
+    由策略配置构造一次，传给 calculate_order_size 的 row 参数
+    """
+    trade_size: float = 50
+    max_size: float = 250
+    min_size: float = 5
+    
+    @classmethod
+    def from_dict(cls, row: Dict) -> 'SizingParams':
+        """从市场参数行构造（缺失键取默认值）"""
+        return cls(
+            row.get('trade_size', 50),
+            row.get('max_size', 250),
+            row.get('min_size', 5),
+        )
+
+
+_DEFAULT_PRICING = PricingParams()
+
+
+def _as_order_book_view(order_book: Union[Dict, OrderBookView]) -> OrderBookView:
+    """dict 转为 OrderBookView，已是 OrderBookView 时直接返回"""
+    if isinstance(order_book, OrderBookView):
+        return order_book
+    return OrderBookView.from_dict(order_book)
 
 
 def round_to_tick_size(price: float, tick_size: float) -> float:
     """
     将价格按 tick size 舍入
     
-    使用四舍五入规则
+    使用四舍五入规则 (0.5 进位)
     
     Args:
         price: 原始价格
@@ -23,13 +134,26 @@ def round_to_tick_size(price: float, tick_size: float) -> float:
     """
     if tick_size <= 0:
         return price
-    return round(price / tick_size) * tick_size
+    return _round_to_tick(price, tick_size, 1.0 / tick_size)
+
+
+@njit(cache=True)
+def _round_to_tick(price: float, tick_size: float, inv_tick: float) -> float:
+    """
+    round_to_tick_size 的标量内核，可在其他 njit 内核中内联调用
+    
+    inv_tick = 1 / tick_size 由调用方预先计算，舍入只需一次乘加和 floor；
+    inv_tick 为 0 (tick_size <= 0) 时返回原价
+    """
+    if inv_tick == 0.0:
+        return price
+    return math.floor(price * inv_tick + 0.5) * tick_size
 
 
 def get_order_prices(
-    order_book: Dict,
+    order_book: Union[Dict, OrderBookView],
     avg_price: float,
-    row: Optional[Dict] = None,
+    row: Union[Dict, PricingParams, None] = None,
     position_size: float = 0
 ) -> Tuple[float, float]:
     """
@@ -42,23 +166,53 @@ def get_order_prices(
     4. 确保价格在合理范围内
     
     Args:
-        order_book: 订单簿数据，包含 best_bid, best_ask, 等
+        order_book: 订单簿数据 (dict 或 OrderBookView)，包含 best_bid, best_ask, 等
         avg_price: 持仓均价 (0 表示无持仓)
-        row: 市场参数行，包含 tick_size 等
+        row: 市场参数行 (dict，读取 tick_size) 或 PricingParams
         position_size: 持仓数量
         
     Returns:
         (bid_price, ask_price)
     """
     # 获取参数
-    tick_size = row.get('tick_size', 0.01) if row else 0.01
+    if isinstance(row, PricingParams):
+        params = row
+        tick_size = params.tick_size
+    else:
+        params = _DEFAULT_PRICING
+        tick_size = row.get('tick_size', 0.01) if row else 0.01
     
     # 获取订单簿数据
-    best_bid = order_book.get('best_bid', 0.0) or 0.0
-    best_ask = order_book.get('best_ask', 0.0) or 0.0
-    best_bid_size = order_book.get('best_bid_size', 0) or 0
-    best_ask_size = order_book.get('best_ask_size', 0) or 0
+    ob = _as_order_book_view(order_book)
     
+    return _order_prices_kernel(
+        ob.best_bid, ob.best_ask, ob.bid_sum, ob.ask_sum,
+        float(tick_size), float(avg_price), float(position_size),
+        params.base_spread, params.min_spread, params.max_spread
+    )
+
+
+@njit(cache=True)
+def _order_prices_kernel(
+    best_bid: float,
+    best_ask: float,
+    bid_sum: float,
+    ask_sum: float,
+    tick_size: float,
+    avg_price: float,
+    position_size: float,
+    base_spread: float = 0.02,
+    min_spread: float = 0.01,
+    max_spread: float = 0.05
+) -> Tuple[float, float]:
+    """
+    get_order_prices 的标量定价内核
+    
+    只接受浮点标量，不涉及 dict 查找，numba 可用时编译为机器码
+    
+    Returns:
+        (bid_price, ask_price)
+    """
     # 如果没有订单簿数据，使用默认值
     if best_bid == 0 and best_ask == 0:
         best_bid = 0.49
@@ -71,31 +225,19 @@ def get_order_prices(
     # 计算中间价
     mid_price = (best_bid + best_ask) / 2
     
-    # 基础价差 (2 cents)
-    base_spread = 0.02
-    
     # 根据订单簿深度调整价差
     # 深度好 -> 价差小，深度差 -> 价差大
-    bid_sum = order_book.get('bid_sum_within_n_percent', 1000) or 1000
-    ask_sum = order_book.get('ask_sum_within_n_percent', 1000) or 1000
-    
     # 平均深度
     avg_depth = (bid_sum + ask_sum) / 2
     
-    # 深度调整因子 (深度越大，价差越小)
-    if avg_depth > 5000:
-        depth_factor = 0.8  # 深度很好，缩小价差
-    elif avg_depth > 2000:
-        depth_factor = 0.9
-    elif avg_depth > 500:
-        depth_factor = 1.0  # 正常深度
-    else:
-        depth_factor = 1.2  # 深度不足，扩大价差
+    # 深度调整因子 (深度越大，价差越小)：超过的阈值个数即查表下标，无分支
+    level = int(avg_depth > 500.0) + int(avg_depth > 2000.0) + int(avg_depth > 5000.0)
+    depth_factor = DEPTH_FACTORS[level]
     
     spread = base_spread * depth_factor
     
-    # 确保价差在合理范围内 [0.01, 0.05]
-    spread = max(0.01, min(spread, 0.05))
+    # 确保价差在合理范围内 [min_spread, max_spread] (默认 [0.01, 0.05])
+    spread = max(min_spread, min(spread, max_spread))
     
     # 计算基础买卖价
     bid = mid_price - spread / 2
@@ -126,15 +268,16 @@ def get_order_prices(
         max_bid = min(max_bid_for_cost, max(best_bid, max_bid_for_profit))
         bid = min(bid, max_bid)
     
-    # 舍入到 tick size
-    bid = round_to_tick_size(bid, tick_size)
-    ask = round_to_tick_size(ask, tick_size)
+    # 舍入到 tick size (倒数只计算一次)
+    inv_tick = 1.0 / tick_size if tick_size > 0 else 0.0
+    bid = _round_to_tick(bid, tick_size, inv_tick)
+    ask = _round_to_tick(ask, tick_size, inv_tick)
     
     # 最终检查: 确保买价 < 卖价
     if bid >= ask:
         # 如果冲突，以中间价为准，强制设置价差
-        ask = round_to_tick_size(mid_price + spread / 2, tick_size)
-        bid = round_to_tick_size(ask - spread, tick_size)
+        ask = _round_to_tick(mid_price + spread / 2, tick_size, inv_tick)
+        bid = _round_to_tick(ask - spread, tick_size, inv_tick)
     
     # 确保价格在有效范围 [0.01, 0.99]
     bid = max(0.01, min(bid, 0.99))
@@ -143,17 +286,151 @@ def get_order_prices(
     return bid, ask
 
 
-def calculate_bid_ask(order_book: Dict) -> Tuple[float, float]:
+def get_order_prices_batch(
+    best_bid: np.ndarray,
+    best_ask: np.ndarray,
+    bid_sum: np.ndarray,
+    ask_sum: np.ndarray,
+    tick_size: Union[float, np.ndarray] = 0.01,
+    avg_price: Union[float, np.ndarray] = 0.0,
+    position_size: Union[float, np.ndarray] = 0.0,
+    params: PricingParams = _DEFAULT_PRICING
+) -> Tuple[np.ndarray, np.ndarray]:
     """
-    计算基础买卖价格
+    批量计算订单买卖价格
+    
+    与 get_order_prices 逐元素等价，整段订单簿快照一次完成向量化计算，
+    回测时无需逐行调用。缺失值 (0 或 NaN) 的处理与 get_order_prices 中
+    dict 值为 0/None 时一致。numba 可用且行数不少于 PARALLEL_BATCH_MIN_ROWS
+    时按行并行计算。
     
     Args:
-        order_book: 订单簿数据
+        best_bid: 最优买价数组
+        best_ask: 最优卖价数组
+        bid_sum: 买方深度数组 (bid_sum_within_n_percent)
+        ask_sum: 卖方深度数组 (ask_sum_within_n_percent)
+        tick_size: 最小价格变动 (标量或数组)
+        avg_price: 持仓均价 (标量或数组，0 表示无持仓)
+        position_size: 持仓数量 (标量或数组)
+        params: 价差参数 (只使用 base_spread, min_spread, max_spread)
         
     Returns:
-        (bid, ask)
+        (bid_prices, ask_prices) 两个 float64 数组
     """
-    return get_order_prices(order_book, avg_price=0.0)
+    best_bid, best_ask, bid_sum, ask_sum, tick_size, avg_price, position_size = np.broadcast_arrays(
+        *(np.asarray(a, dtype=np.float64) for a in (
+            best_bid, best_ask, bid_sum, ask_sum, tick_size, avg_price, position_size
+        ))
+    )
+    
+    # 缺失值处理
+    best_bid = np.nan_to_num(best_bid, nan=0.0)
+    best_ask = np.nan_to_num(best_ask, nan=0.0)
+    bid_sum = np.where((bid_sum == 0) | np.isnan(bid_sum), 1000.0, bid_sum)
+    ask_sum = np.where((ask_sum == 0) | np.isnan(ask_sum), 1000.0, ask_sum)
+    
+    if NUMBA_AVAILABLE and best_bid.size >= PARALLEL_BATCH_MIN_ROWS:
+        bid = np.empty(best_bid.shape, dtype=np.float64)
+        ask = np.empty(best_bid.shape, dtype=np.float64)
+        _order_prices_parallel(
+            best_bid.ravel(), best_ask.ravel(), bid_sum.ravel(), ask_sum.ravel(),
+            tick_size.ravel(), avg_price.ravel(), position_size.ravel(),
+            params.base_spread, params.min_spread, params.max_spread,
+            bid.reshape(-1), ask.reshape(-1)
+        )
+        return bid, ask
+    
+    # 如果没有订单簿数据，使用默认值
+    no_bid = best_bid == 0
+    no_ask = best_ask == 0
+    filled_bid = np.where(no_bid & no_ask, 0.49, np.where(no_bid, best_ask - 0.02, best_bid))
+    filled_ask = np.where(no_bid & no_ask, 0.51, np.where(no_ask, best_bid + 0.02, best_ask))
+    best_bid, best_ask = filled_bid, filled_ask
+    
+    mid_price = (best_bid + best_ask) / 2
+    
+    # 深度调整因子 (深度越大，价差越小)
+    avg_depth = (bid_sum + ask_sum) / 2
+    depth_factor = _DEPTH_FACTOR_TABLE[np.searchsorted(_DEPTH_THRESHOLDS, avg_depth)]
+    spread = np.clip(params.base_spread * depth_factor, params.min_spread, params.max_spread)
+    
+    # 计算基础买卖价，并确保买价低于最优买价，卖价高于最优卖价
+    bid = np.minimum(mid_price - spread / 2, best_bid - tick_size)
+    ask = np.maximum(mid_price + spread / 2, best_ask + tick_size)
+    
+    # 多头持仓: 卖价不低于成本保护/止盈价
+    has_avg = avg_price > 0
+    min_ask = np.maximum(avg_price * 0.97, np.minimum(best_ask, avg_price * 1.03))
+    ask = np.where((position_size > 0) & has_avg, np.maximum(ask, min_ask), ask)
+    
+    # 空头持仓: 买价不高于成本保护/止盈价
+    max_bid = np.minimum(avg_price * 1.03, np.maximum(best_bid, avg_price * 0.97))
+    bid = np.where((position_size < 0) & has_avg, np.minimum(bid, max_bid), bid)
+    
+    # 舍入到 tick size (倒数只计算一次)
+    valid_tick = tick_size > 0
+    inv_tick = np.divide(1.0, tick_size, out=np.zeros_like(tick_size), where=valid_tick)
+    bid = _round_to_tick_array(bid, tick_size, inv_tick, valid_tick)
+    ask = _round_to_tick_array(ask, tick_size, inv_tick, valid_tick)
+    
+    # 买价 >= 卖价时，以中间价为准强制设置价差 (很少发生，只重算冲突行)
+    conflict = np.flatnonzero(bid >= ask)
+    if conflict.size:
+        tick, inv, valid = tick_size[conflict], inv_tick[conflict], valid_tick[conflict]
+        reset_ask = _round_to_tick_array(
+            mid_price[conflict] + spread[conflict] / 2, tick, inv, valid
+        )
+        ask[conflict] = reset_ask
+        bid[conflict] = _round_to_tick_array(reset_ask - spread[conflict], tick, inv, valid)
+    
+    # 确保价格在有效范围 [0.01, 0.99]
+    np.clip(bid, 0.01, 0.99, out=bid)
+    np.clip(ask, 0.01, 0.99, out=ask)
+    return bid, ask
+
+
+@njit(parallel=True, cache=True)
+def _order_prices_parallel(
+    best_bid: np.ndarray,
+    best_ask: np.ndarray,
+    bid_sum: np.ndarray,
+    ask_sum: np.ndarray,
+    tick_size: np.ndarray,
+    avg_price: np.ndarray,
+    position_size: np.ndarray,
+    base_spread: float,
+    min_spread: float,
+    max_spread: float,
+    out_bid: np.ndarray,
+    out_ask: np.ndarray
+) -> None:
+    """
+    多线程批量定价：各行相互独立，按行 prange 调用标量内核
+    
+    输入为已填充缺失值的一维数组，结果写入调用方预分配的 out_bid / out_ask
+    """
+    for i in prange(best_bid.shape[0]):
+        out_bid[i], out_ask[i] = _order_prices_kernel(
+            best_bid[i], best_ask[i], bid_sum[i], ask_sum[i],
+            tick_size[i], avg_price[i], position_size[i],
+            base_spread, min_spread, max_spread
+        )
+
+
+def _round_to_tick_array(
+    prices: np.ndarray,
+    tick_size: np.ndarray,
+    inv_tick: np.ndarray,
+    valid: np.ndarray
+) -> np.ndarray:
+    """round_to_tick_size 的数组版本，valid 为 False (tick_size <= 0) 的元素保持原价"""
+    rounded = np.floor(prices * inv_tick + 0.5) * tick_size
+    return np.where(valid, rounded, prices)
+
+
+# 计算基础买卖价格 (无持仓): calculate_bid_ask(order_book) -> (bid, ask)
+# 直接绑定到 get_order_prices，调用时不再多一层 Python 栈帧
+calculate_bid_ask = functools.partial(get_order_prices, avg_price=0.0)
 
 
 def calculate_spread(bid: float, ask: float) -> float:
@@ -198,7 +475,7 @@ def is_valid_spread(
 def calculate_order_size(
     position: float,
     bid_price: float,
-    row: Dict,
+    row: Union[Dict, SizingParams],
     other_position: float
 ) -> Tuple[float, float]:
     """
@@ -207,15 +484,17 @@ def calculate_order_size(
     Args:
         position: 当前持仓
         bid_price: 买价 (用于计算)
-        row: 市场参数，包含 trade_size, max_size, min_size
+        row: 市场参数 (包含 trade_size, max_size, min_size 的 dict) 或 SizingParams
         other_position: 反向持仓数量
         
     Returns:
         (buy_amount, sell_amount)
     """
-    trade_size = row.get('trade_size', 50)
-    max_size = row.get('max_size', 250)
-    min_size = row.get('min_size', 5)
+    if not isinstance(row, SizingParams):
+        row = SizingParams.from_dict(row)
+    trade_size = row.trade_size
+    max_size = row.max_size
+    min_size = row.min_size
     
     # 计算可买入数量
     # 限制: 不超过 max_size，考虑现有持仓
@@ -241,19 +520,20 @@ def calculate_order_size(
     return buy_amount, sell_amount
 
 
-def should_adjust_for_imbalance(order_book: Dict) -> Tuple[bool, str]:
+def should_adjust_for_imbalance(order_book: Union[Dict, OrderBookView]) -> Tuple[bool, str]:
     """
     检查是否应该因订单簿失衡调整定价
     
     Args:
-        order_book: 订单簿数据
+        order_book: 订单簿数据 (dict 或 OrderBookView)
         
     Returns:
         (should_adjust, direction)
         direction: "buy_heavy" | "sell_heavy" | "balanced"
     """
-    bid_sum = order_book.get('bid_sum_within_n_percent', 1000) or 1000
-    ask_sum = order_book.get('ask_sum_within_n_percent', 1000) or 1000
+    ob = _as_order_book_view(order_book)
+    bid_sum = ob.bid_sum
+    ask_sum = ob.ask_sum
     
     if ask_sum == 0:
         return True, "buy_heavy"
@@ -314,10 +594,21 @@ def validate_order_book(order_book: Dict) -> bool:
         True 如果有效
     """
     # 至少要有买价或卖价
-    has_bid = 'best_bid' in order_book and order_book['best_bid'] is not None
-    has_ask = 'best_ask' in order_book and order_book['best_ask'] is not None
+    return order_book.get('best_bid') is not None or order_book.get('best_ask') is not None
+
+
+def warmup_kernels() -> None:
+    """
+    预热 Numba 内核
     
-    return has_bid or has_ask
+    以典型参数调用一次定价内核，触发编译 (或加载 cache=True 的磁盘缓存)，
+    使首次真实定价不承担 JIT 延迟；未安装 numba 时无需预热
+    """
+    if not NUMBA_AVAILABLE:
+        return
+    
+    get_order_prices(OrderBookView(0.50, 0.51), 0.0)
+    round_to_tick_size(0.505, 0.01)
 
 
 class OrderPricer:
@@ -348,7 +639,24 @@ class OrderPricer:
         self.max_spread = max_spread
         self.base_spread = base_spread
     
-    def get_prices(self, order_book: Dict, avg_price: float = 0.0) -> Tuple[float, float]:
+    @property
+    def tick_size(self) -> float:
+        """最小价格变动"""
+        return self._tick_size
+    
+    @tick_size.setter
+    def tick_size(self, value: float):
+        # tick_size 固定后预先绑定定价参数，get_prices 不再逐次构造参数 dict
+        self._tick_size = value
+        self._price = functools.partial(
+            get_order_prices, row=PricingParams(tick_size=float(value))
+        )
+    
+    def get_prices(
+        self,
+        order_book: Union[Dict, OrderBookView],
+        avg_price: float = 0.0
+    ) -> Tuple[float, float]:
         """
         获取定价
         
@@ -359,11 +667,7 @@ class OrderPricer:
         Returns:
             (bid, ask)
         """
-        return get_order_prices(
-            order_book,
-            avg_price=avg_price,
-            row={'tick_size': self.tick_size}
-        )
+        return self._price(order_book, avg_price)
     
     def validate_spread(self, bid: float, ask: float) -> bool:
         """
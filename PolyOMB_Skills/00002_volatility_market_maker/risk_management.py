@@ -4,19 +4,66 @@
 提供风险管理功能，包括止损、止盈、风控等
 """
 
-from datetime import datetime, timedelta
-from enum import Enum
-from typing import Dict, Optional, List
-
-
-class RiskLevel(Enum):
-    """风险等级枚举"""
-    LOW = "low"
-    MEDIUM = "medium"
-    HIGH = "high"
-    CRITICAL = "critical"
-
-
+import math
+import numpy as np
+from datetime import datetime, timedelta, timezone
+from enum import IntEnum
+from typing import Dict, Optional, List, NamedTuple, Tuple, Union
+
+try:
+    from ._njit import njit, NUMBA_AVAILABLE
+except ImportError:
+    from _njit import njit, NUMBA_AVAILABLE
+
+
+class RiskLevel(IntEnum):
+    """风险等级枚举（取值即按严重程度递增的 uint8 编码，可直接比较大小）"""
+    LOW = 0
+    MEDIUM = 1
+    HIGH = 2
+    CRITICAL = 3
+
+
+# 编码 -> 风险等级，用于展开批量风险检查的结果
+RISK_LEVELS = tuple(RiskLevel)
+
+# 时间 -> 纳秒时间戳的基准 (无时区的时间按本地墙钟时间处理)
+_EPOCH = datetime(1970, 1, 1)
+_EPOCH_UTC = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+# 批量风险检查的警告位
+WARN_STOP_LOSS = 1 << 0
+WARN_EXTREME_VOLATILITY = 1 << 1
+WARN_HIGH_VOLATILITY = 1 << 2
+WARN_RISK_OFF = 1 << 3
+WARN_MAX_POSITION = 1 << 4
+WARN_NEAR_MAX_POSITION = 1 << 5
+
+# 警告位 -> 警告信息 (顺序与 comprehensive_risk_check 一致)
+WARNING_MESSAGES = (
+    (WARN_STOP_LOSS, 'Stop loss triggered'),
+    (WARN_EXTREME_VOLATILITY, 'Extreme volatility'),
+    (WARN_HIGH_VOLATILITY, 'High volatility'),
+    (WARN_RISK_OFF, 'In risk-off period'),
+    (WARN_MAX_POSITION, 'Max position reached'),
+    (WARN_NEAR_MAX_POSITION, 'Near max position'),
+)
+
+
+class RiskCheckResult(NamedTuple):
+    """综合风险检查结果"""
+    can_trade: bool
+    risk_level: RiskLevel
+    warning_mask: int
+    should_stop_loss: bool
+    
+    @property
+    def warnings(self) -> List[str]:
+        """警告信息列表 (由 warning_mask 展开)"""
+        return format_risk_warnings(self.warning_mask)
+
+
+@njit(cache=True)
 def should_trigger_stop_loss(
     pnl: float,
     spread: float,
@@ -113,15 +160,23 @@ def should_pause_trading(
     Returns:
         True 如果应暂停
     """
-    import pandas as pd
+    # 处理 None (NaN 在内核中处理)
+    if volatility is None:
+        return False
     
-    # 处理 NaN
-    if volatility is None or (isinstance(volatility, float) and __import__('math').isnan(volatility)):
+    return _should_pause_trading(float(volatility), threshold)
+
+
+@njit(cache=True)
+def _should_pause_trading(volatility: float, threshold: float) -> bool:
+    """should_pause_trading 的标量内核，NaN 波动率不暂停"""
+    if math.isnan(volatility):
         return False
     
     return volatility >= threshold
 
 
+@njit(cache=True)
 def can_open_new_position(
     volatility: float,
     threshold: float = 0.15,
@@ -142,12 +197,8 @@ def can_open_new_position(
     Returns:
         True 如果可以开新仓
     """
-    # 风险关闭期禁止开新仓
-    if in_risk_off:
-        return False
-    
-    # 高波动率禁止开新仓
-    return volatility < threshold
+    # 风险关闭期或高波动率禁止开新仓 (按位与，无短路分支)
+    return (not in_risk_off) & (volatility < threshold)
 
 
 def can_close_position(volatility: float) -> bool:
@@ -224,12 +275,16 @@ def is_valid_trade_size(
     return size >= min_size
 
 
-def is_in_risk_off_period(sleep_until: Optional[datetime]) -> bool:
+def is_in_risk_off_period(
+    sleep_until: Optional[datetime],
+    now: Optional[datetime] = None
+) -> bool:
     """
     检查是否在风险关闭期
     
     Args:
         sleep_until: 风险关闭结束时间
+        now: 当前时间；回测中传入 bar 的时间戳 (默认取系统时间)
         
     Returns:
         True 如果在关闭期
@@ -237,7 +292,13 @@ def is_in_risk_off_period(sleep_until: Optional[datetime]) -> bool:
     if sleep_until is None:
         return False
     
-    return datetime.now() < sleep_until
+    return (now or datetime.now()) < sleep_until
+
+
+def _to_ns(moment: datetime) -> int:
+    """datetime -> 整数纳秒时间戳 (微秒精度)"""
+    epoch = _EPOCH if moment.tzinfo is None else _EPOCH_UTC
+    return (moment - epoch) // timedelta(microseconds=1) * 1000
 
 
 def calculate_risk_off_end_time(
@@ -310,7 +371,35 @@ def check_price_deviation(
     return deviation >= threshold
 
 
-def comprehensive_risk_check(risk_context: Dict) -> Dict:
+def check_price_deviation_batch(
+    prices: np.ndarray,
+    reference: np.ndarray,
+    threshold: float = 0.05
+) -> np.ndarray:
+    """
+    批量检查价格偏离 (check_price_deviation 的向量化版本)
+    
+    用于回测中一次性预计算整条偏离序列
+    
+    Args:
+        prices: 当前价格数组
+        reference: 参考价格数组 (或标量)
+        threshold: 偏离阈值
+        
+    Returns:
+        布尔数组，True 表示偏离超过阈值; 参考价格为 0 时为 False
+    """
+    prices = np.asarray(prices, dtype=np.float64)
+    reference = np.asarray(reference, dtype=np.float64)
+    
+    valid = reference != 0
+    deviation = np.abs(prices - reference)
+    np.divide(deviation, reference, out=deviation, where=valid)
+    
+    return (deviation >= threshold) & valid
+
+
+def comprehensive_risk_check(risk_context: Dict) -> RiskCheckResult:
     """
     综合风险检查
     
@@ -326,10 +415,10 @@ def comprehensive_risk_check(risk_context: Dict) -> Dict:
             - in_risk_off_period: 是否在风险关闭期
             
     Returns:
-        风险检查结果，包含:
+        RiskCheckResult，包含:
             - can_trade: 是否可以交易
             - risk_level: 风险等级
-            - warnings: 警告信息列表
+            - warning_mask: 警告位掩码 (WARN_*)，warnings 属性展开为信息列表
             - should_stop_loss: 是否应该止损
     """
     pnl = risk_context.get('pnl', 0)
@@ -339,50 +428,151 @@ def comprehensive_risk_check(risk_context: Dict) -> Dict:
     max_position = risk_context.get('max_position', 250)
     in_risk_off = risk_context.get('in_risk_off_period', False)
     
-    result = {
-        'can_trade': True,
-        'risk_level': RiskLevel.LOW,
-        'warnings': [],
-        'should_stop_loss': False
-    }
+    can_trade = True
+    risk_level = RiskLevel.LOW
+    warning_mask = 0
     
     # 1. 检查止损 (最高优先级)
     stop_loss_threshold = risk_context.get('stop_loss_threshold', -5.0)
     spread_threshold = risk_context.get('spread_threshold', 0.02)
     
     if pnl <= stop_loss_threshold and spread <= spread_threshold:
-        result['can_trade'] = False
-        result['risk_level'] = RiskLevel.CRITICAL
-        result['should_stop_loss'] = True
-        result['warnings'].append('Stop loss triggered')
-        return result
+        return RiskCheckResult(False, RiskLevel.CRITICAL, WARN_STOP_LOSS, True)
     
     # 2. 检查波动率
     volatility_threshold = risk_context.get('volatility_threshold', 0.15)
     
     if volatility >= volatility_threshold * 1.5:
-        result['risk_level'] = RiskLevel.CRITICAL
-        result['warnings'].append('Extreme volatility')
+        risk_level = RiskLevel.CRITICAL
+        warning_mask |= WARN_EXTREME_VOLATILITY
     elif volatility >= volatility_threshold:
-        result['risk_level'] = RiskLevel.HIGH
-        result['warnings'].append('High volatility')
+        risk_level = RiskLevel.HIGH
+        warning_mask |= WARN_HIGH_VOLATILITY
     
     # 3. 检查风险关闭期
     if in_risk_off:
-        result['can_trade'] = False
-        result['risk_level'] = RiskLevel.HIGH
-        result['warnings'].append('In risk-off period')
+        can_trade = False
+        risk_level = RiskLevel.HIGH
+        warning_mask |= WARN_RISK_OFF
     
     # 4. 检查持仓限制
-    if abs(position_size) >= max_position:
-        result['can_trade'] = False
-        result['risk_level'] = RiskLevel.MEDIUM
-        result['warnings'].append('Max position reached')
-    elif abs(position_size) >= max_position * 0.9:
-        result['risk_level'] = max(result['risk_level'], RiskLevel.MEDIUM)
-        result['warnings'].append('Near max position')
+    abs_position = abs(position_size)
+    if abs_position >= max_position:
+        can_trade = False
+        risk_level = RiskLevel.MEDIUM
+        warning_mask |= WARN_MAX_POSITION
+    elif abs_position >= max_position * 0.9:
+        risk_level = max(risk_level, RiskLevel.MEDIUM)
+        warning_mask |= WARN_NEAR_MAX_POSITION
+    
+    return RiskCheckResult(can_trade, risk_level, warning_mask, False)
+
+
+def risk_check_batch(
+    pnl: np.ndarray,
+    spread: np.ndarray,
+    volatility: np.ndarray,
+    position_size: np.ndarray,
+    stop_loss_threshold: float = -5.0,
+    spread_threshold: float = 0.02,
+    volatility_threshold: float = 0.15,
+    max_position: float = 250,
+    in_risk_off: Union[bool, np.ndarray] = False
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    批量综合风险检查
+    
+    对整段回测历史一次完成 comprehensive_risk_check 的逐元素判断，
+    不为每个 bar 构造 dict 和警告列表；警告信息用 format_risk_warnings
+    只在生成报告时展开。
+    
+    Args:
+        pnl: 盈亏百分比数组
+        spread: 价差数组
+        volatility: 3小时波动率数组
+        position_size: 持仓数量数组
+        stop_loss_threshold: 止损阈值 (负数)
+        spread_threshold: 价差阈值
+        volatility_threshold: 波动率阈值
+        max_position: 最大持仓
+        in_risk_off: 是否在风险关闭期 (标量或数组)
+        
+    Returns:
+        (risk_levels, warnings, can_trade)
+        risk_levels: uint8 风险等级编码 (RiskLevel 的取值)
+        warnings: uint8 警告位掩码 (WARN_*)
+        can_trade: bool 数组
+    """
+    pnl, spread, volatility, position_size, in_risk_off = np.broadcast_arrays(
+        np.asarray(pnl, dtype=np.float64),
+        np.asarray(spread, dtype=np.float64),
+        np.asarray(volatility, dtype=np.float64),
+        np.asarray(position_size, dtype=np.float64),
+        np.asarray(in_risk_off, dtype=bool)
+    )
+    
+    # 1. 止损 (最高优先级，触发时忽略其余检查)
+    stop_loss = (pnl <= stop_loss_threshold) & (spread <= spread_threshold)
+    
+    # 2. 波动率
+    extreme_vol = volatility >= volatility_threshold * 1.5
+    high_vol = ~extreme_vol & (volatility >= volatility_threshold)
+    levels = np.where(
+        extreme_vol, RiskLevel.CRITICAL, np.where(high_vol, RiskLevel.HIGH, RiskLevel.LOW)
+    ).astype(np.uint8)
+    
+    # 3. 风险关闭期
+    levels[in_risk_off] = RiskLevel.HIGH
+    
+    # 4. 持仓限制
+    abs_position = np.abs(position_size)
+    at_max = abs_position >= max_position
+    near_max = ~at_max & (abs_position >= max_position * 0.9)
+    levels[at_max] = RiskLevel.MEDIUM
+    np.maximum(levels, near_max * np.uint8(RiskLevel.MEDIUM), out=levels)
+    
+    levels[stop_loss] = RiskLevel.CRITICAL
+    
+    warnings = (
+        extreme_vol * WARN_EXTREME_VOLATILITY
+        | high_vol * WARN_HIGH_VOLATILITY
+        | in_risk_off * WARN_RISK_OFF
+        | at_max * WARN_MAX_POSITION
+        | near_max * WARN_NEAR_MAX_POSITION
+    ).astype(np.uint8)
+    warnings[stop_loss] = WARN_STOP_LOSS
+    
+    can_trade = ~(stop_loss | in_risk_off | at_max)
+    
+    return levels, warnings, can_trade
+
+
+def format_risk_warnings(warnings: int) -> List[str]:
+    """
+    将警告位掩码 (risk_check_batch / comprehensive_risk_check) 展开为警告信息列表
+    
+    Args:
+        warnings: 单个 bar 的警告位掩码
+        
+    Returns:
+        警告信息列表
+    """
+    return [message for bit, message in WARNING_MESSAGES if warnings & bit]
+
+
+def warmup_kernels() -> None:
+    """
+    预热 Numba 内核
     
-    return result
+    以典型参数调用一次各风险判断内核，触发编译 (或加载 cache=True 的磁盘缓存)，
+    使首次真实检查不承担 JIT 延迟；未安装 numba 时无需预热
+    """
+    if not NUMBA_AVAILABLE:
+        return
+    
+    should_trigger_stop_loss(0.0, 0.01)
+    should_pause_trading(0.1)
+    can_open_new_position(0.1)
 
 
 class RiskManager:
@@ -416,10 +606,33 @@ class RiskManager:
         self.max_position = max_position
         self.sleep_period = sleep_period
         
-        self.risk_off_until: Optional[datetime] = None
+        self.risk_off_until = None
         self.last_check: Optional[datetime] = None
         self.warning_history: List[str] = []
     
+    @property
+    def max_position(self) -> float:
+        """最大持仓"""
+        return self._max_position
+    
+    @max_position.setter
+    def max_position(self, value: float):
+        # 同时缓存持仓风险分档阈值，避免逐次检查时重复乘法
+        self._max_position = value
+        self._max_position_09 = value * 0.9
+        self._max_position_07 = value * 0.7
+    
+    @property
+    def risk_off_until(self) -> Optional[datetime]:
+        """风险关闭结束时间"""
+        return self._risk_off_until
+    
+    @risk_off_until.setter
+    def risk_off_until(self, value: Optional[datetime]):
+        # 同时保存纳秒时间戳，逐 bar 检查时只做整数比较
+        self._risk_off_until = value
+        self._risk_off_until_ns = None if value is None else _to_ns(value)
+    
     def check_position_risk(
         self,
         position: float,
@@ -452,9 +665,10 @@ class RiskManager:
             return RiskLevel.HIGH
         
         # 持仓接近上限
-        if abs(position) >= self.max_position * 0.9:
+        abs_position = abs(position)
+        if abs_position >= self._max_position_09:
             return RiskLevel.HIGH
-        elif abs(position) >= self.max_position * 0.7:
+        elif abs_position >= self._max_position_07:
             return RiskLevel.MEDIUM
         
         return RiskLevel.LOW
@@ -478,16 +692,34 @@ class RiskManager:
         
         return RiskLevel.LOW
     
-    def trigger_risk_off(self):
-        """触发风险关闭期"""
+    def trigger_risk_off(self, now: Optional[datetime] = None):
+        """
+        触发风险关闭期
+        
+        Args:
+            now: 触发时间；回测中传入 bar 的时间戳 (默认取系统时间)
+        """
         self.risk_off_until = calculate_risk_off_end_time(
-            datetime.now(),
+            now or datetime.now(),
             self.sleep_period
         )
     
-    def is_in_risk_off(self) -> bool:
-        """检查是否在风险关闭期"""
-        return is_in_risk_off_period(self.risk_off_until)
+    def is_in_risk_off(self, now: Union[datetime, int, None] = None) -> bool:
+        """
+        检查是否在风险关闭期
+        
+        Args:
+            now: 当前时间 (datetime 或纳秒时间戳)；回测中传入 bar 的时间戳，
+                 逐 bar 调用时传纳秒整数可避免构造 datetime (默认取系统时间)
+        """
+        if self._risk_off_until_ns is None:
+            return False
+        
+        if now is None:
+            now = datetime.now()
+        if not isinstance(now, (int, np.integer)):
+            now = _to_ns(now)
+        return now < self._risk_off_until_ns
     
     def clear_risk_off(self):
         """清除风险关闭期"""
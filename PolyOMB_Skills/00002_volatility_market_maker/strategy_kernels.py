@@ -0,0 +1,51 @@
+"""
+00002 strategy_kernels.py - 策略数值内核
+
+逐元素累加类的热循环，使用 Numba 编译为本地代码（未安装 numba 时按 Python 运行）
+"""
+
+import numpy as np
+
+try:
+    from ._njit import njit, NUMBA_AVAILABLE
+except ImportError:
+    from _njit import njit, NUMBA_AVAILABLE
+
+
+@njit(cache=True, fastmath=True)
+def compute_pnl(position: np.ndarray, returns: np.ndarray) -> np.ndarray:
+    """
+    计算累计盈亏序列
+    
+    持仓为正的周期计入该周期收益，其余周期不计
+    
+    Args:
+        position: 每个周期的持仓
+        returns: 每个周期的收益
+        
+    Returns:
+        累计盈亏序列 (与 position 等长)
+    """
+    n = position.shape[0]
+    pnl = np.empty(n, dtype=np.float64)
+    acc = 0.0
+    
+    for i in range(n):
+        if position[i] > 0:
+            acc += returns[i]
+        pnl[i] = acc
+    
+    return pnl
+
+
+def warmup_kernels() -> None:
+    """
+    预热 Numba 内核
+    
+    以小数组调用一次各内核，触发编译 (或加载 cache=True 的磁盘缓存)，
+    使首次真实计算不承担 JIT 延迟；未安装 numba 时无需预热
+    """
+    if not NUMBA_AVAILABLE:
+        return
+    
+    compute_pnl(np.zeros(1, dtype=np.float64), np.zeros(1, dtype=np.float64))
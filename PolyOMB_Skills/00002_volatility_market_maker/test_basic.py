@@ -37,13 +37,23 @@ def test_volatility_calc():
 
 def test_order_pricing():
     """测试订单定价"""
-    from order_pricing import get_order_prices, round_to_tick_size, is_valid_spread
+    from order_pricing import (
+        OrderBookView,
+        PricingParams,
+        SizingParams,
+        calculate_order_size,
+        get_order_prices,
+        get_order_prices_batch,
+        round_to_tick_size,
+        is_valid_spread
+    )
     
     print("\n[2] 测试订单定价...")
     
     # 测试 tick size 舍入
     assert round_to_tick_size(0.654, 0.01) == 0.65
     assert round_to_tick_size(0.655, 0.01) == 0.66
+    assert round_to_tick_size(0.125, 0.01) == 0.13  # 恰在半 tick 时进位，而非银行家舍入
     print(f"  ✓ tick size 舍入")
     
     # 测试定价
@@ -59,6 +69,48 @@ def test_order_pricing():
     assert ask > order_book['best_ask'], "卖价应高于最优卖价"
     print(f"  ✓ 订单定价: bid={bid:.2f}, ask={ask:.2f}")
     
+    # 测试 OrderBookView 与 dict 定价一致
+    view = OrderBookView.from_dict(order_book)
+    assert view.bid_sum == 1000.0
+    assert get_order_prices(view, avg_price=0.66, row={'tick_size': 0.01}) == (bid, ask)
+    print(f"  ✓ OrderBookView 定价")
+    
+    # 测试 NumPy 标量输入时深度档位按计数取因子 (解释执行时 bool_ 相加会退化为逻辑或)
+    from order_pricing import _order_prices_kernel
+    kernel = getattr(_order_prices_kernel, 'py_func', _order_prices_kernel)
+    assert kernel(*map(np.float64, (0.50, 0.502, 3000.0, 3000.0, 0.001, 0.0, 0.0))) == \
+        kernel(0.50, 0.502, 3000.0, 3000.0, 0.001, 0.0, 0.0) == (0.492, 0.51)
+    print(f"  ✓ NumPy 标量深度档位")
+    
+    # 测试预先构造的参数对象与 dict 参数一致
+    assert get_order_prices(view, avg_price=0.66, row=PricingParams(tick_size=0.01)) == (bid, ask)
+    sizing = {'trade_size': 50, 'max_size': 250, 'min_size': 5}
+    assert calculate_order_size(220, bid, SizingParams.from_dict(sizing), 0) == \
+        calculate_order_size(220, bid, sizing, 0) == (30, 50)
+    print(f"  ✓ 定价/数量参数对象")
+    
+    # 测试批量定价与逐行定价一致
+    bids, asks = get_order_prices_batch(
+        np.array([0.65, 0.0, 0.40]), np.array([0.67, 0.0, 0.0]),
+        np.array([100.0, 6000.0, np.nan]), np.array([100.0, 6000.0, 1000.0]),
+        avg_price=0.66, position_size=np.array([100.0, 0.0, -100.0])
+    )
+    assert (bids[0], asks[0]) == get_order_prices(order_book, avg_price=0.66, position_size=100)
+    assert (bids[2], asks[2]) == get_order_prices(
+        {'best_bid': 0.40, 'ask_sum_within_n_percent': 1000}, avg_price=0.66, position_size=-100
+    )
+    print(f"  ✓ 批量定价")
+    
+    # 测试列式订单簿序列直接用于批量定价
+    from data_adapter import dicts_to_soa
+    frame = dicts_to_soa([order_book] * 3)
+    assert len(frame) == 3 and frame.bid_sum[0] == 1000.0
+    bids, asks = get_order_prices_batch(
+        frame.best_bid, frame.best_ask, frame.bid_sum, frame.ask_sum, avg_price=0.66
+    )
+    assert (bids == bid).all() and (asks == ask).all()
+    print(f"  ✓ 列式订单簿序列")
+    
     # 测试价差验证
     assert is_valid_spread(0.64, 0.67, 0.01, 0.05) == True
     assert is_valid_spread(0.64, 0.70, 0.01, 0.05) == False
@@ -72,7 +124,14 @@ def test_risk_management():
         should_trigger_stop_loss,
         calculate_take_profit_price,
         can_increase_position,
-        RiskLevel
+        check_price_deviation,
+        check_price_deviation_batch,
+        comprehensive_risk_check,
+        risk_check_batch,
+        format_risk_warnings,
+        RiskLevel,
+        RiskManager,
+        RISK_LEVELS
     )
     
     print("\n[3] 测试风险管理...")
@@ -92,11 +151,47 @@ def test_risk_management():
     assert can_increase_position(250, 250) == False
     print(f"  ✓ 持仓限制检查")
     
+    # 测试批量价格偏离与逐条检查一致
+    prices = [0.50, 0.52, 0.60, 0.40, 0.55]
+    references = [0.50, 0.50, 0.50, 0.0, 0.50]
+    mask = check_price_deviation_batch(prices, references)
+    assert mask.tolist() == [
+        check_price_deviation(p, r) for p, r in zip(prices, references)
+    ]
+    print(f"  ✓ 批量价格偏离检查")
+    
+    # 测试批量风险检查与逐条检查一致
+    contexts = [
+        {'pnl': -6, 'spread': 0.01, 'volatility_3h': 0.3, 'position_size': 0},
+        {'pnl': 0, 'spread': 0.05, 'volatility_3h': 0.2, 'position_size': 230},
+        {'pnl': 0, 'spread': 0.05, 'volatility_3h': 0.05, 'position_size': 250},
+    ]
+    levels, warnings, can_trade = risk_check_batch(
+        [c['pnl'] for c in contexts],
+        [c['spread'] for c in contexts],
+        [c['volatility_3h'] for c in contexts],
+        [c['position_size'] for c in contexts]
+    )
+    for i, context in enumerate(contexts):
+        expected = comprehensive_risk_check(context)
+        assert RISK_LEVELS[levels[i]] == expected.risk_level
+        assert format_risk_warnings(warnings[i]) == expected.warnings
+        assert warnings[i] == expected.warning_mask
+        assert can_trade[i] == expected.can_trade
+    print(f"  ✓ 批量风险检查")
+    
+    # 测试风险关闭期使用模拟时钟
+    manager = RiskManager(sleep_period=6)
+    manager.trigger_risk_off(datetime(2024, 1, 1))
+    assert manager.is_in_risk_off(datetime(2024, 1, 1, 5)) == True
+    assert manager.is_in_risk_off(pd.Timestamp('2024-01-01 06:00').value) == False
+    print(f"  ✓ 风险关闭期模拟时钟")
+    
     return True
 
 def test_data_adapter():
     """测试数据适配器"""
-    from data_adapter import SMBDataAdapter, validate_trades_df
+    from data_adapter import SMBDataAdapter, validate_trades_df, filter_by_date_range, get_full_year_date_range
     
     print("\n[4] 测试数据适配器...")
     
@@ -117,6 +212,25 @@ def test_data_adapter():
     assert validate_trades_df(valid_df) == True
     print(f"  ✓ 数据验证")
     
+    # 测试 Mock 数据默认不复制
+    adapter.set_mock_data("trades", valid_df)
+    assert adapter.read_parquet("trades") is adapter.read_parquet("trades")
+    assert adapter.read_parquet("trades", copy=True) is not adapter.read_parquet("trades")
+    print(f"  ✓ Mock 数据零复制读取")
+    
+    # 测试日期过滤不改写原始时间戳列
+    raw = pd.DataFrame({'timestamp': ['2024-01-01', '2024-01-02'], 'price': [0.5, 0.6]})
+    filtered = filter_by_date_range(raw, datetime(2024, 1, 2), datetime(2024, 1, 3))
+    assert len(filtered) == 1 and isinstance(raw['timestamp'].iloc[0], str)
+    assert pd.api.types.is_datetime64_any_dtype(filtered['timestamp'])
+    print(f"  ✓ 日期过滤不修改输入")
+    
+    # 测试全年范围取交易最多的年份
+    span = pd.DataFrame({'timestamp': pd.to_datetime(['2023-12-31', '2024-01-01', '2024-06-01'])})
+    assert get_full_year_date_range(span)[0] == datetime(2024, 1, 1)
+    assert get_full_year_date_range(span.iloc[:1])[0] == datetime(2023, 1, 1)
+    print(f"  ✓ 全年日期范围")
+    
     return True
 
 def test_backtest_engine():
@@ -125,8 +239,13 @@ def test_backtest_engine():
         VolatilityMarketMakerStrategy,
         BacktestEngine,
         Signal,
+        SignalCode,
+        Trade,
+        TradeLog,
+        TradeBuffer,
         calculate_sharpe_ratio,
-        calculate_max_drawdown
+        calculate_max_drawdown,
+        calculate_win_rate
     )
     
     print("\n[5] 测试回测引擎...")
@@ -146,12 +265,52 @@ def test_backtest_engine():
     assert engine.initial_capital == 10000
     print(f"  ✓ 回测引擎初始化")
     
+    # 测试回测运行
+    data = pd.DataFrame({
+        'timestamp': pd.date_range('2024-01-01', periods=10, freq='h'),
+        'price': np.linspace(0.45, 0.55, 10),
+        '3_hour': [np.nan] + [0.1] * 9,
+    })
+    result = engine.run(data)
+    assert len(result.pnl_series) == len(result.pnl_array) == len(data)
+    assert result.total_pnl == 0
+    print(f"  ✓ 回测运行: {len(result.pnl_series)} 步")
+    
+    # 测试向量化信号
+    signals = strategy.generate_signals_vectorized(data)
+    assert signals.dtype == np.int8 and len(signals) == len(data)
+    assert (signals == SignalCode.HOLD).all()
+    assert strategy.generate_signal(data.iloc[1]) == Signal.HOLD == SignalCode.HOLD
+    assert engine.step(data.iloc[1])['signal'] == 'HOLD'
+    print(f"  ✓ 向量化信号生成")
+    
+    # 测试阈值网格搜索
+    grid = strategy.grid_search(data, [0.05, 0.15, 0.25])
+    assert len(grid) == 3 and (grid.total_pnl == result.total_pnl).all()
+    print(f"  ✓ 阈值网格搜索: {len(grid)} 组")
+    
     # 测试夏普比率
     returns = pd.Series([0.01, -0.005, 0.02, -0.01, 0.015])
     sharpe = calculate_sharpe_ratio(returns)
     assert sharpe != 0 or len(returns) < 2
     print(f"  ✓ 夏普比率计算: {sharpe:.4f}")
     
+    # 测试列式交易记录
+    trades = [
+        Trade(datetime(2024, 1, 1), 'BUY', 50, 0.50),
+        Trade(datetime(2024, 1, 2), 'SELL', 50, 0.55, pnl=2.5),
+    ]
+    log = TradeLog.from_trades(trades)
+    assert calculate_win_rate(log) == calculate_win_rate(trades) == 0.5
+    assert log.to_trades() == trades
+    
+    buf = TradeBuffer()
+    for t in trades * 10:
+        buf.append(t.timestamp, t.action, t.size, t.price, t.pnl)
+    assert len(buf) == 20 and buf.trades()[:2] == trades
+    assert calculate_win_rate(buf.to_log()) == 0.5
+    print(f"  ✓ 列式交易记录")
+    
     return True
 
 def test_with_mock_data():
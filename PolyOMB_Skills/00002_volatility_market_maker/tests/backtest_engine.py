@@ -8,10 +8,15 @@
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Tuple, NamedTuple
+from typing import Dict, List, Optional, Tuple, NamedTuple, Union
 from dataclasses import dataclass, field
 from enum import Enum
 
+try:
+    from .._njit import njit
+except ImportError:
+    from _njit import njit
+
 
 class Signal(Enum):
     """交易信号枚举"""
@@ -20,6 +25,12 @@ class Signal(Enum):
     HOLD = "HOLD"
 
 
+# 向量化回测中的动作编码 (与顶层 backtest_engine.SignalCode 一致)
+_NO_TRADE = 0
+_BUY = 1
+_SELL = -1
+
+
 @dataclass
 class Trade:
     """交易记录"""
@@ -30,16 +41,149 @@ class Trade:
     pnl: Optional[float] = None
 
 
+_ACTION_NAMES = {_BUY: 'BUY', _SELL: 'SELL'}
+_ACTION_CODES = {'BUY': _BUY, 'SELL': _SELL}
+
+
+@dataclass
+class TradeLog:
+    """
+    交易记录的列式存储 (每个字段一个数组)
+    
+    统计指标直接在数组上计算；需要 Trade 对象时再调用 to_trades 构造
+    """
+    timestamps: pd.DatetimeIndex  # 保留列的时区
+    actions: np.ndarray  # int8 动作编码 (_BUY / _SELL)
+    sizes: np.ndarray
+    prices: np.ndarray  # float64
+    pnls: np.ndarray  # float64，无盈亏 (买入) 为 NaN
+    
+    def __len__(self) -> int:
+        return len(self.actions)
+    
+    def __getitem__(self, key: slice) -> 'TradeLog':
+        """按切片取子集"""
+        return TradeLog(
+            timestamps=self.timestamps[key],
+            actions=self.actions[key],
+            sizes=self.sizes[key],
+            prices=self.prices[key],
+            pnls=self.pnls[key],
+        )
+    
+    @classmethod
+    def empty(cls) -> 'TradeLog':
+        """空记录"""
+        return cls.from_trades([])
+    
+    @classmethod
+    def concat(cls, logs: List['TradeLog']) -> 'TradeLog':
+        """按顺序拼接多段记录 (跳过空段，避免空数组的默认 dtype 影响结果)"""
+        logs = [log for log in logs if len(log)] or logs[:1]
+        if len(logs) == 1:
+            return logs[0]
+        return cls(
+            timestamps=logs[0].timestamps.append([log.timestamps for log in logs[1:]]),
+            actions=np.concatenate([log.actions for log in logs]),
+            sizes=np.concatenate([log.sizes for log in logs]),
+            prices=np.concatenate([log.prices for log in logs]),
+            pnls=np.concatenate([log.pnls for log in logs]),
+        )
+    
+    @classmethod
+    def from_trades(cls, trades: List[Trade]) -> 'TradeLog':
+        """从 Trade 列表构造"""
+        return cls(
+            timestamps=pd.DatetimeIndex([t.timestamp for t in trades]),
+            actions=np.array([_ACTION_CODES[t.action] for t in trades], dtype=np.int8),
+            sizes=np.array([t.size for t in trades]),
+            prices=np.array([t.price for t in trades], dtype=np.float64),
+            pnls=np.array([np.nan if t.pnl is None else t.pnl for t in trades], dtype=np.float64),
+        )
+    
+    def to_trades(self) -> List[Trade]:
+        """构造对应的 Trade 列表"""
+        return [
+            Trade(
+                timestamp=timestamp,
+                action=_ACTION_NAMES[action],
+                size=size,
+                price=price,
+                pnl=None if pnl != pnl else pnl,
+            )
+            for timestamp, action, size, price, pnl in zip(
+                self.timestamps,
+                self.actions.tolist(),
+                self.sizes.tolist(),
+                self.prices.tolist(),
+                self.pnls.tolist(),
+            )
+        ]
+
+
+class TradeRecord:
+    """
+    交易记录容器
+    
+    逐行路径逐笔追加 Trade，数组路径整段追加 TradeLog；
+    列式记录与 Trade 列表都在读取时才生成，数组路径不会逐笔构造 Trade
+    """
+    
+    def __init__(self):
+        self._log = TradeLog.empty()
+        self._pending: List[Trade] = []  # 尚未并入 _log 的逐笔交易
+        self._trades: List[Trade] = []  # 已物化的 Trade (_log 的前缀)
+    
+    def __len__(self) -> int:
+        return len(self._log) + len(self._pending)
+    
+    def append(self, trade: Trade):
+        """追加一笔交易"""
+        self._pending.append(trade)
+    
+    def extend_log(self, log: TradeLog):
+        """追加一段列式记录"""
+        if len(log):
+            self._log = TradeLog.concat([self.log, log])
+    
+    @property
+    def log(self) -> TradeLog:
+        """全部交易的列式记录"""
+        if self._pending:
+            # 物化部分已追平时直接复用已有的 Trade 对象
+            if len(self._trades) == len(self._log):
+                self._trades.extend(self._pending)
+            self._log = TradeLog.concat([self._log, TradeLog.from_trades(self._pending)])
+            self._pending = []
+        return self._log
+    
+    def to_list(self) -> List[Trade]:
+        """全部交易的 Trade 列表 (只读，按需补齐未物化的部分)"""
+        log = self.log
+        n = len(self._trades)
+        if n < len(log):
+            self._trades.extend(log[n:].to_trades())
+        return self._trades
+
+
 @dataclass
 class BacktestResult:
-    """回测结果"""
-    trades: List[Trade] = field(default_factory=list)
+    """回测结果 (trades 由 trade_log 按需生成)"""
     pnl_series: pd.Series = field(default_factory=lambda: pd.Series(dtype=float))
     statistics: Dict = field(default_factory=dict)
     start_date: Optional[datetime] = None
     end_date: Optional[datetime] = None
     total_pnl: float = 0.0
     trade_count: int = 0
+    trade_log: TradeLog = field(default_factory=TradeLog.empty)
+    _trades: Optional[List[Trade]] = field(default=None, init=False, repr=False, compare=False)
+    
+    @property
+    def trades(self) -> List[Trade]:
+        """交易列表"""
+        if self._trades is None:
+            self._trades = self.trade_log.to_trades()
+        return self._trades
 
 
 class VolatilityMarketMakerStrategy:
@@ -56,11 +200,24 @@ class VolatilityMarketMakerStrategy:
         self.position = 0
         self.avg_price = 0.0
         self.cash = 10000  # 初始资金
-        self.trades = []
+        self.trade_record = TradeRecord()
+        self._apply_config()
+    
+    @property
+    def trades(self) -> List[Trade]:
+        """交易列表"""
+        return self.trade_record.to_list()
     
     def update_params(self, params: Dict):
         """更新策略参数"""
         self.config.update(params)
+        self._apply_config()
+    
+    def _apply_config(self):
+        """从配置中读取逐行使用的参数，缓存为属性 (配置变更后需重新调用)"""
+        self._vol_thresh = self.config.get('volatility_threshold', 0.15)
+        self._max_pos = self.config.get('max_position_size', 250)
+        self._trade_size = self.config.get('trade_size', 50)
     
     def generate_signal(self, row: pd.Series) -> Signal:
         """
@@ -77,11 +234,11 @@ class VolatilityMarketMakerStrategy:
         volatility = row.get('3_hour', 0)
         
         # 高波动率时不交易
-        if volatility > self.config.get('volatility_threshold', 0.15):
+        if volatility > self._vol_thresh:
             return Signal.HOLD
         
         # 基于价格偏离均值产生信号
-        if price < 0.45 and self.position < self.config.get('max_position_size', 250):
+        if price < 0.45 and self.position < self._max_pos:
             return Signal.BUY
         elif price > 0.55 and self.position > 0:
             return Signal.SELL
@@ -101,11 +258,11 @@ class VolatilityMarketMakerStrategy:
         """
         timestamp = row.get('timestamp', datetime.now())
         price = row.get('price', 0.5)
-        trade_size = self.config.get('trade_size', 50)
+        trade_size = self._trade_size
         
         if signal == Signal.BUY:
             # 检查持仓限制
-            if self.position + trade_size > self.config.get('max_position_size', 250):
+            if self.position + trade_size > self._max_pos:
                 return None
             
             # 更新持仓均价
@@ -114,7 +271,7 @@ class VolatilityMarketMakerStrategy:
             self.avg_price = total_cost / self.position if self.position > 0 else 0
             
             trade = Trade(timestamp=timestamp, action='BUY', size=trade_size, price=price)
-            self.trades.append(trade)
+            self.trade_record.append(trade)
             return trade
         
         elif signal == Signal.SELL:
@@ -129,7 +286,7 @@ class VolatilityMarketMakerStrategy:
             self.cash += trade_size * price
             
             trade = Trade(timestamp=timestamp, action='SELL', size=trade_size, price=price, pnl=pnl)
-            self.trades.append(trade)
+            self.trade_record.append(trade)
             return trade
         
         return None
@@ -153,9 +310,20 @@ class BacktestEngine:
         self.strategy = strategy
         self.initial_capital = initial_capital
         self.current_capital = initial_capital
-        self.trades = []
+        self.trade_record = TradeRecord()
         self.pnl_history = []
         self.timestamps = []
+        self.realized_pnl = 0.0  # 已记录交易的累计已实现盈亏
+    
+    @property
+    def trades(self) -> List[Trade]:
+        """交易列表"""
+        return self.trade_record.to_list()
+    
+    @property
+    def trade_log(self) -> TradeLog:
+        """列式交易记录"""
+        return self.trade_record.log
     
     def step(self, row: pd.Series) -> Dict:
         """
@@ -179,7 +347,9 @@ class BacktestEngine:
         self.timestamps.append(row.get('timestamp', datetime.now()))
         
         if trade:
-            self.trades.append(trade)
+            self.trade_record.append(trade)
+            if trade.pnl is not None:
+                self.realized_pnl += trade.pnl
         
         return {
             'signal': signal.value,
@@ -187,12 +357,17 @@ class BacktestEngine:
             'pnl': current_pnl,
         }
     
-    def run(self, data: pd.DataFrame) -> BacktestResult:
+    def run(self, data: pd.DataFrame, use_iterrows: bool = False) -> BacktestResult:
         """
         运行完整回测
         
+        默认将价格、波动率一次性取为 NumPy 数组后在数组上模拟；
+        策略子类重写了 generate_signal / execute_signal 时，
+        或 use_iterrows=True 时，逐行调用 step
+        
         Args:
             data: 历史数据
+            use_iterrows: 是否强制使用逐行 step 的回退路径
         
         Returns:
             回测结果
@@ -203,12 +378,20 @@ class BacktestEngine:
         if len(data) < 10:
             raise ValueError("Insufficient data")
         
-        # 遍历数据
-        for _, row in data.iterrows():
-            self.step(row)
+        strategy_cls = type(self.strategy)
+        overridden = (
+            strategy_cls.generate_signal is not VolatilityMarketMakerStrategy.generate_signal
+            or strategy_cls.execute_signal is not VolatilityMarketMakerStrategy.execute_signal
+        )
+        
+        if use_iterrows or overridden:
+            # 遍历数据
+            for _, row in data.iterrows():
+                self.step(row)
+        else:
+            self._run_arrays(data)
         
-        # 计算统计指标
-        total_pnl = sum(t.pnl for t in self.trades if t.pnl is not None)
+        trade_log = self.trade_log
         
         # 创建 PnL 序列
         pnl_series = pd.Series(
@@ -217,17 +400,80 @@ class BacktestEngine:
         ) if self.pnl_history else pd.Series(dtype=float)
         
         # 计算统计指标
-        statistics = self.calculate_statistics(pnl_series)
+        statistics = self.calculate_statistics(pnl_series, trade_log)
         
         return BacktestResult(
-            trades=self.trades,
             pnl_series=pnl_series,
             statistics=statistics,
             start_date=data['timestamp'].min() if 'timestamp' in data.columns else None,
             end_date=data['timestamp'].max() if 'timestamp' in data.columns else None,
-            total_pnl=total_pnl,
-            trade_count=len(self.trades),
+            total_pnl=calculate_pnl_from_trades(trade_log),
+            trade_count=len(trade_log),
+            trade_log=trade_log,
+        )
+    
+    def _run_arrays(self, data: pd.DataFrame):
+        """
+        在数组上执行回测，结果与逐行调用 step 一致
+        
+        Args:
+            data: 历史数据
+        """
+        n = len(data)
+        strategy = self.strategy
+        
+        # 列缺失时使用与 row.get 相同的默认值
+        if 'price' in data.columns:
+            prices = data['price'].to_numpy(dtype=np.float64)
+        else:
+            prices = np.full(n, 0.5)
+        if '3_hour' in data.columns:
+            vols = data['3_hour'].to_numpy(dtype=np.float64)
+        else:
+            vols = np.zeros(n)
+        if 'timestamp' in data.columns:
+            timestamps = pd.Index(data['timestamp'])
+        else:
+            timestamps = pd.Index([datetime.now()] * n)
+        
+        trade_size = strategy._trade_size
+        actions, trade_pnls, positions, avg_prices, position, avg_price, cash = _simulate(
+            prices,
+            vols,
+            strategy.position,
+            float(strategy.avg_price),
+            float(strategy.cash),
+            trade_size,
+            strategy._max_pos,
+            strategy._vol_thresh,
+        )
+        strategy.position = position
+        strategy.avg_price = avg_price
+        strategy.cash = cash
+        
+        # 生成交易记录
+        traded = np.flatnonzero(actions)
+        trade_actions = actions[traded]
+        trade_log = TradeLog(
+            timestamps=pd.DatetimeIndex(timestamps.take(traded)),
+            actions=trade_actions,
+            sizes=np.full(len(traded), trade_size),
+            prices=prices[traded],
+            pnls=np.where(trade_actions == _SELL, trade_pnls[traded], np.nan),
         )
+        strategy.trade_record.extend_log(trade_log)
+        self.trade_record.extend_log(trade_log)
+        
+        # 每步已实现盈亏只包含之前各步的交易 (与 step 中先记 PnL 后记交易一致)
+        realized = np.empty(n + 1)
+        realized[0] = self.realized_pnl
+        realized[1:] = trade_pnls
+        np.cumsum(realized, out=realized)
+        self.realized_pnl = float(realized[n])
+        
+        unrealized = positions * prices - positions * avg_prices
+        self.pnl_history.extend((realized[:n] + unrealized).tolist())
+        self.timestamps.extend(timestamps)
     
     def calculate_current_pnl(self, current_price: float) -> float:
         """
@@ -242,16 +488,19 @@ class BacktestEngine:
         position_value = self.strategy.position * current_price
         unrealized_pnl = position_value - (self.strategy.position * self.strategy.avg_price)
         
-        realized_pnl = sum(t.pnl for t in self.trades if t.pnl is not None)
-        
-        return realized_pnl + unrealized_pnl
+        return self.realized_pnl + unrealized_pnl
     
-    def calculate_statistics(self, pnl_series: pd.Series) -> Dict:
+    def calculate_statistics(
+        self,
+        pnl_series: pd.Series,
+        trade_log: Optional[TradeLog] = None
+    ) -> Dict:
         """
         计算回测统计指标
         
         Args:
             pnl_series: PnL 序列
+            trade_log: 交易记录 (默认取引擎的交易记录)
         
         Returns:
             统计指标字典
@@ -273,7 +522,7 @@ class BacktestEngine:
         max_dd = calculate_max_drawdown(pnl_series)
         
         # 胜率
-        win_rate = calculate_win_rate(self.trades)
+        win_rate = calculate_win_rate(self.trade_log if trade_log is None else trade_log)
         
         return {
             'sharpe_ratio': sharpe,
@@ -282,6 +531,68 @@ class BacktestEngine:
         }
 
 
+@njit(cache=True)
+def _simulate(
+    prices: np.ndarray,
+    vols: np.ndarray,
+    position: float,
+    avg_price: float,
+    cash: float,
+    trade_size: float,
+    max_position: float,
+    volatility_threshold: float,
+) -> Tuple:
+    """
+    数组上的逐 tick 回测模拟
+    
+    信号生成与执行逻辑与 VolatilityMarketMakerStrategy 一致，
+    持仓、均价、现金以标量演进，每步结果写入预分配数组；
+    numba 可用时编译为机器码
+    
+    Args:
+        prices: 价格数组
+        vols: 波动率数组
+        position: 初始持仓
+        avg_price: 初始持仓均价
+        cash: 初始现金
+        trade_size: 每笔交易数量
+        max_position: 最大持仓
+        volatility_threshold: 波动率阈值
+    
+    Returns:
+        (actions, trade_pnls, positions, avg_prices, position, avg_price, cash)，
+        前四项为每步的动作编码、卖出盈亏 (无卖出为 0)、步后持仓和均价
+    """
+    n = prices.shape[0]
+    actions = np.zeros(n, dtype=np.int8)
+    trade_pnls = np.zeros(n)
+    positions = np.empty(n)
+    avg_prices = np.empty(n)
+    
+    for i in range(n):
+        price = float(prices[i])
+        
+        # 高波动率时不交易；否则基于价格偏离均值交易
+        if not vols[i] > volatility_threshold:
+            if price < 0.45 and position < max_position:
+                if position + trade_size <= max_position:
+                    total_cost = position * avg_price + trade_size * price
+                    position += trade_size
+                    avg_price = total_cost / position if position > 0 else 0.0
+                    actions[i] = _BUY
+            elif price > 0.55 and position > 0:
+                if position >= trade_size:
+                    trade_pnls[i] = trade_size * (price - avg_price)
+                    position -= trade_size
+                    cash += trade_size * price
+                    actions[i] = _SELL
+        
+        positions[i] = position
+        avg_prices[i] = avg_price
+    
+    return actions, trade_pnls, positions, avg_prices, position, avg_price, cash
+
+
 def calculate_sharpe_ratio(
     returns: pd.Series,
     risk_free_rate: float = 0,
@@ -298,15 +609,46 @@ def calculate_sharpe_ratio(
     Returns:
         夏普比率
     """
-    if returns.empty or returns.std() == 0:
+    if returns.empty:
+        return 0.0
+    
+    mean, std = _mean_std(returns.to_numpy(dtype=np.float64))
+    if std == 0:
         return 0.0
     
-    excess_returns = returns - risk_free_rate
-    sharpe = excess_returns.mean() / returns.std() * np.sqrt(periods_per_year)
+    # 超额收益的均值即均值减去无风险利率，无需构造超额收益序列
+    sharpe = (mean - risk_free_rate) / std * np.sqrt(periods_per_year)
     
     return float(sharpe)
 
 
+@njit(cache=True)
+def _mean_std(values: np.ndarray):
+    """
+    单次遍历计算均值和样本标准差 (ddof=1，Welford 递推)
+    
+    NaN 不参与计算 (与 Series.mean / std 一致)，有效样本不足两个时标准差为 NaN
+    """
+    count = 0
+    mean = 0.0
+    m2 = 0.0
+    
+    for i in range(values.shape[0]):
+        x = values[i]
+        if np.isnan(x):
+            continue
+        count += 1
+        delta = x - mean
+        mean += delta / count
+        m2 += delta * (x - mean)
+    
+    if count == 0:
+        return np.nan, np.nan
+    if count == 1:
+        return mean, np.nan
+    return mean, np.sqrt(m2 / (count - 1))
+
+
 def calculate_max_drawdown(pnl_series: pd.Series) -> float:
     """
     计算最大回撤
@@ -320,28 +662,49 @@ def calculate_max_drawdown(pnl_series: pd.Series) -> float:
     if pnl_series.empty:
         return 0.0
     
-    # 计算累计最大值
-    rolling_max = pnl_series.cummax()
+    return float(_max_drawdown(pnl_series.to_numpy(dtype=np.float64)))
+
+
+@njit(cache=True)
+def _max_drawdown(pnls: np.ndarray) -> float:
+    """
+    单次遍历计算最大回撤: 维护累计最大值，同时记录最小的 (当前值 - 累计最大值)
     
-    # 计算回撤
-    drawdown = pnl_series - rolling_max
+    NaN 不参与计算 (与 cummax / min 跳过 NaN 一致)，全为 NaN 时返回 NaN
+    """
+    peak = -np.inf
+    max_drawdown = 0.0
+    seen = False
     
-    # 最大回撤
-    max_drawdown = drawdown.min()
+    for i in range(pnls.shape[0]):
+        x = pnls[i]
+        if np.isnan(x):
+            continue
+        seen = True
+        if x > peak:
+            peak = x
+        elif x - peak < max_drawdown:
+            max_drawdown = x - peak
     
-    return float(max_drawdown)
+    return max_drawdown if seen else np.nan
 
 
-def calculate_win_rate(trades: List[Trade]) -> float:
+def calculate_win_rate(trades: Union[List[Trade], TradeLog]) -> float:
     """
     计算胜率
     
     Args:
-        trades: 交易列表
+        trades: 交易列表或 TradeLog
     
     Returns:
         胜率 (0-1)
     """
+    if isinstance(trades, TradeLog):
+        completed = np.count_nonzero(~np.isnan(trades.pnls))
+        if not completed:
+            return 0.0
+        return float(np.count_nonzero(trades.pnls > 0) / completed)
+    
     completed_trades = [t for t in trades if t.pnl is not None]
     
     if not completed_trades:
@@ -352,16 +715,19 @@ def calculate_win_rate(trades: List[Trade]) -> float:
     return len(winning_trades) / len(completed_trades)
 
 
-def calculate_pnl_from_trades(trades: List[Trade]) -> float:
+def calculate_pnl_from_trades(trades: Union[List[Trade], TradeLog]) -> float:
     """
     从交易列表计算总盈亏
     
     Args:
-        trades: 交易列表
+        trades: 交易列表或 TradeLog
     
     Returns:
         总盈亏
     """
+    if isinstance(trades, TradeLog):
+        return float(np.nansum(trades.pnls))
+    
     return sum(t.pnl for t in trades if t.pnl is not None)
 
 
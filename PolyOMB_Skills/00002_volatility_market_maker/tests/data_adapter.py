@@ -8,9 +8,16 @@
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
-from typing import Dict, Optional, Tuple, List
+from typing import Dict, Optional, Tuple, List, Sequence, Union
 from pathlib import Path
 
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+
+# 策略使用的交易数据列
+TRADE_COLUMNS = ('timestamp', 'market', 'price', 'size', 'side')
+
 
 class SMBDataAdapter:
     """SMB 数据适配器"""
@@ -26,8 +33,9 @@ class SMBDataAdapter:
         self.smb_url = smb_url
         self.mount_point = mount_point
         self._is_mounted = False
-        self._cache = {}
+        self._cache = {}  # 交易数据缓存 (pyarrow.Table，只读共享)
         self.cache_hits = 0
+        self._meta_by_id: Optional[Dict[str, Dict]] = None  # condition_id -> 市场元数据
     
     def mount(self) -> bool:
         """挂载 SMB 共享"""
@@ -44,12 +52,19 @@ class SMBDataAdapter:
         """检查是否已挂载"""
         return self._is_mounted
     
-    def read_parquet(self, relative_path: str) -> pd.DataFrame:
+    def read_parquet(
+        self,
+        relative_path: str,
+        columns: Optional[Sequence[str]] = None,
+        filters: Optional[List[Tuple]] = None
+    ) -> pd.DataFrame:
         """
         读取 Parquet 文件
         
         Args:
             relative_path: 相对于挂载点的路径
+            columns: 只读取这些列 (文件中不存在的列忽略)，None 表示全部列
+            filters: 行过滤条件 (pyarrow filters 格式)，可跳过不匹配的 row group
         
         Returns:
             DataFrame
@@ -62,24 +77,96 @@ class SMBDataAdapter:
         if not full_path.exists():
             return pd.DataFrame()
         
-        return pd.read_parquet(full_path)
+        return _read_parquet(full_path, columns, filters)
+    
+    def read_table(
+        self,
+        relative_path: str,
+        columns: Optional[Sequence[str]] = None,
+        filters: Optional[List[Tuple]] = None
+    ) -> pa.Table:
+        """
+        读取 Parquet 文件为 pyarrow.Table (参数同 read_parquet)
+        
+        Returns:
+            pyarrow.Table，文件不存在时为空表
+        """
+        if not self._is_mounted:
+            raise RuntimeError("SMB not mounted")
+        
+        full_path = Path(self.mount_point) / relative_path
+        
+        if not full_path.exists():
+            return pa.table({})
+        
+        return _read_table(full_path, columns, filters)
     
     def get_market_trades(
         self, 
         market_id: str, 
-        use_cache: bool = True
+        use_cache: bool = True,
+        columns: Optional[Sequence[str]] = TRADE_COLUMNS
     ) -> pd.DataFrame:
         """
         获取特定市场的交易数据
         
+        缓存中保存的是 Arrow 表，每次调用返回新的 DataFrame，
+        调用方修改返回值不会影响缓存
+        
         Args:
             market_id: 市场 ID
             use_cache: 是否使用缓存
+            columns: 读取的列，默认 TRADE_COLUMNS，None 表示全部列
         
         Returns:
             交易数据 DataFrame
         """
+        trades = self._get_cached_trades(market_id, use_cache, columns)
+        
+        if isinstance(trades, pd.DataFrame):
+            return trades
+        return _table_to_pandas(trades)
+    
+    def get_market_trades_arrow(
+        self,
+        market_id: str,
+        use_cache: bool = True,
+        columns: Optional[Sequence[str]] = TRADE_COLUMNS
+    ) -> pa.Table:
+        """
+        获取特定市场的交易数据 (pyarrow.Table，不经过 pandas)
+        
+        Args:
+            market_id: 市场 ID
+            use_cache: 是否使用缓存
+            columns: 读取的列，默认 TRADE_COLUMNS，None 表示全部列
+        
+        Returns:
+            交易数据 Arrow 表
+        """
+        trades = self._get_cached_trades(market_id, use_cache, columns)
+        
+        if isinstance(trades, pd.DataFrame):
+            return pa.Table.from_pandas(trades, preserve_index=False)
+        return trades
+    
+    def _get_cached_trades(
+        self,
+        market_id: str,
+        use_cache: bool,
+        columns: Optional[Sequence[str]]
+    ) -> Union[pa.Table, pd.DataFrame]:
+        """
+        读取交易数据，命中缓存时直接返回缓存对象
+        
+        Returns:
+            Arrow 表 (直接放入缓存的 DataFrame 原样返回)
+        """
         cache_key = f"trades_{market_id}"
+        if columns is None:
+            cache_key = f"{cache_key}:*"
+        elif tuple(columns) != TRADE_COLUMNS:
+            cache_key = f"{cache_key}:{','.join(columns)}"
         
         if use_cache and cache_key in self._cache:
             self.cache_hits += 1
@@ -87,12 +174,12 @@ class SMBDataAdapter:
         
         # 从 trades 目录读取
         relative_path = f"polymarket/trades/{market_id}.parquet"
-        df = self.read_parquet(relative_path)
+        table = self.read_table(relative_path, columns=columns)
         
         if use_cache:
-            self._cache[cache_key] = df
+            self._cache[cache_key] = table
         
-        return df
+        return table
     
     def get_market_metadata(self, market_id: str) -> Dict:
         """
@@ -104,23 +191,30 @@ class SMBDataAdapter:
         Returns:
             元数据字典
         """
-        # 读取 markets.parquet
-        markets_df = self.read_parquet("polymarket/markets.parquet")
-        
-        if markets_df.empty:
-            return {}
+        if self._meta_by_id is None:
+            # 首次调用时读取 markets.parquet 并按 condition_id 建立索引
+            markets_df = self.read_parquet("polymarket/markets.parquet")
+            
+            if markets_df.empty:
+                return {}
+            
+            meta_by_id = {}
+            for record in markets_df.to_dict('records'):
+                # condition_id 重复时保留第一条
+                meta_by_id.setdefault(record['condition_id'], record)
+            self._meta_by_id = meta_by_id
         
         # 查找对应市场
-        market = markets_df[markets_df['condition_id'] == market_id]
+        market = self._meta_by_id.get(market_id)
         
-        if market.empty:
+        if market is None:
             return {
                 "condition_id": market_id,
                 "question": "Unknown",
                 "category": "Unknown",
             }
         
-        return market.iloc[0].to_dict()
+        return dict(market)
     
     def calculate_market_volatility(
         self,
@@ -137,22 +231,27 @@ class SMBDataAdapter:
         Returns:
             波动率值
         """
-        trades = self.get_market_trades(market_id)
+        trades = self.get_market_trades_arrow(market_id)
         
-        if trades.empty or len(trades) < 2:
+        if trades.num_rows < 2:
             return 0.0
         
-        # 确保时间戳列为 datetime
-        trades['timestamp'] = pd.to_datetime(trades['timestamp'])
-        trades = trades.sort_values('timestamp')
+        # 直接在 Arrow 列上取数组，按时间排序价格 (已有序时跳过排序)
+        timestamps = _ensure_datetime(trades.column('timestamp').to_pandas())
+        prices = trades.column('price').to_numpy().astype(np.float64, copy=False)
+        if not timestamps.is_monotonic_increasing:
+            prices = prices[np.argsort(timestamps.to_numpy(), kind='stable')]
         
         # 计算对数收益率
-        log_returns = np.log(trades['price'] / trades['price'].shift(1)).dropna()
+        log_returns = np.diff(np.log(prices))
+        log_returns = log_returns[~np.isnan(log_returns)]
         
-        if log_returns.empty:
+        if log_returns.size == 0:
             return 0.0
+        if log_returns.size == 1:
+            return float('nan')
         
-        return float(log_returns.std())
+        return float(log_returns.std(ddof=1))
     
     def enable_cache(self):
         """启用缓存"""
@@ -162,6 +261,7 @@ class SMBDataAdapter:
         """失效缓存"""
         self._cache = {}
         self.cache_hits = 0
+        self._meta_by_id = None
 
 
 class LocalDataAdapter:
@@ -176,19 +276,84 @@ class LocalDataAdapter:
         """
         self.data_path = Path(data_path)
     
-    def read_parquet(self, relative_path: str) -> pd.DataFrame:
-        """读取 Parquet 文件"""
+    def read_parquet(
+        self,
+        relative_path: str,
+        columns: Optional[Sequence[str]] = None,
+        filters: Optional[List[Tuple]] = None
+    ) -> pd.DataFrame:
+        """读取 Parquet 文件 (参数同 SMBDataAdapter.read_parquet)"""
         full_path = self.data_path / relative_path
         
         if not full_path.exists():
             return pd.DataFrame()
         
-        return pd.read_parquet(full_path)
+        return _read_parquet(full_path, columns, filters)
     
-    def get_market_trades(self, market_id: str) -> pd.DataFrame:
-        """获取市场交易数据"""
+    def get_market_trades(
+        self,
+        market_id: str,
+        columns: Optional[Sequence[str]] = TRADE_COLUMNS
+    ) -> pd.DataFrame:
+        """获取市场交易数据 (默认只读取 TRADE_COLUMNS)"""
         relative_path = f"polymarket/trades/{market_id}.parquet"
-        return self.read_parquet(relative_path)
+        return self.read_parquet(relative_path, columns=columns)
+
+
+def _read_parquet(
+    path: Path,
+    columns: Optional[Sequence[str]] = None,
+    filters: Optional[List[Tuple]] = None
+) -> pd.DataFrame:
+    """读取 Parquet 文件为 DataFrame (参数同 _read_table)"""
+    return _read_table(path, columns, filters).to_pandas()
+
+
+def _read_table(
+    path: Path,
+    columns: Optional[Sequence[str]] = None,
+    filters: Optional[List[Tuple]] = None
+) -> pa.Table:
+    """
+    读取 Parquet 文件，只解码需要的列和 row group
+    
+    Args:
+        path: 文件路径
+        columns: 需要的列 (文件中不存在的列忽略)，None 表示全部列
+        filters: 行过滤条件 (pyarrow filters 格式)
+    
+    Returns:
+        pyarrow.Table
+    """
+    if columns is not None:
+        available = set(pq.read_schema(path).names)
+        columns = [col for col in columns if col in available]
+    
+    return pq.read_table(path, columns=columns, filters=filters)
+
+
+def _table_to_pandas(table: pa.Table) -> pd.DataFrame:
+    """Arrow 表转 DataFrame (无列的空表转为 pd.DataFrame())"""
+    if table.num_columns == 0:
+        return pd.DataFrame()
+    return table.to_pandas()
+
+
+def _ensure_datetime(values: pd.Series) -> pd.Series:
+    """
+    将时间戳列转换为 datetime
+    
+    已是 datetime64 (含带时区) 时原样返回，不重复解析、不复制
+    
+    Args:
+        values: 时间戳列
+    
+    Returns:
+        datetime64 序列
+    """
+    if pd.api.types.is_datetime64_any_dtype(values.dtype):
+        return values
+    return pd.to_datetime(values)
 
 
 def extract_price_series(
@@ -212,12 +377,12 @@ def extract_price_series(
     if df.empty:
         return pd.Series(dtype=float)
     
-    df_copy = df.copy()
-    df_copy[timestamp_col] = pd.to_datetime(df_copy[timestamp_col])
-    df_copy = df_copy.set_index(timestamp_col).sort_index()
+    # 只取价格列，以时间戳为索引 (不复制整个 DataFrame)
+    timestamps = pd.DatetimeIndex(_ensure_datetime(df[timestamp_col]), name=timestamp_col)
+    prices = df[price_col].set_axis(timestamps).sort_index()
     
     # 使用最后成交价
-    price_series = df_copy[price_col].resample(interval).last().dropna()
+    price_series = prices.resample(interval).last().dropna()
     
     return price_series
 
@@ -241,17 +406,13 @@ def build_orderbook_snapshot(
     if df.empty:
         return {}
     
-    df_copy = df.copy()
-    df_copy['timestamp'] = pd.to_datetime(df_copy['timestamp'])
+    timestamps = _ensure_datetime(df['timestamp'])
     
     # 筛选时间窗口内的交易
     start_time = timestamp - window
     end_time = timestamp + window
     
-    window_trades = df_copy[
-        (df_copy['timestamp'] >= start_time) & 
-        (df_copy['timestamp'] <= end_time)
-    ]
+    window_trades = df.loc[(timestamps >= start_time) & (timestamps <= end_time)]
     
     if window_trades.empty:
         return {}
@@ -291,11 +452,12 @@ def convert_to_strategy_format(
     if trades.empty:
         return pd.DataFrame()
     
-    df = trades.copy()
+    # 浅复制: 只替换/新增列，不改动原 DataFrame
+    df = trades.copy(deep=False)
     
     # 确保时间戳列存在
     if 'timestamp' in df.columns:
-        df['timestamp'] = pd.to_datetime(df['timestamp'])
+        df['timestamp'] = _ensure_datetime(df['timestamp'])
     
     # 添加元数据列
     df['tick_size'] = metadata.get('tick_size', 0.01)
@@ -316,10 +478,9 @@ def get_lifecycle_date_range(df: pd.DataFrame) -> Tuple[datetime, datetime]:
     if df.empty or 'timestamp' not in df.columns:
         return datetime.now(), datetime.now()
     
-    df_copy = df.copy()
-    df_copy['timestamp'] = pd.to_datetime(df_copy['timestamp'])
+    timestamps = _ensure_datetime(df['timestamp'])
     
-    return df_copy['timestamp'].min(), df_copy['timestamp'].max()
+    return timestamps.min(), timestamps.max()
 
 
 def get_full_year_date_range(df: pd.DataFrame) -> Tuple[datetime, datetime]:
@@ -336,10 +497,7 @@ def get_full_year_date_range(df: pd.DataFrame) -> Tuple[datetime, datetime]:
         year = datetime.now().year
         return datetime(year, 1, 1), datetime(year, 12, 31)
     
-    df_copy = df.copy()
-    df_copy['timestamp'] = pd.to_datetime(df_copy['timestamp'])
-    
-    data_year = df_copy['timestamp'].dt.year.mode()[0]
+    data_year = _ensure_datetime(df['timestamp']).dt.year.mode()[0]
     
     return datetime(data_year, 1, 1), datetime(data_year, 12, 31)
 
@@ -365,11 +523,15 @@ def filter_by_date_range(
     if df.empty or timestamp_col not in df.columns:
         return df
     
-    df_copy = df.copy()
-    df_copy[timestamp_col] = pd.to_datetime(df_copy[timestamp_col])
+    column = df[timestamp_col]
+    timestamps = _ensure_datetime(column)
+    mask = (timestamps >= start) & (timestamps <= end)
+    
+    if pd.api.types.is_datetime64_any_dtype(column):
+        return df.loc[mask]
     
-    mask = (df_copy[timestamp_col] >= start) & (df_copy[timestamp_col] <= end)
-    return df_copy[mask]
+    # 原列不是 datetime 时，结果中的时间戳列使用解析后的值
+    return df.loc[mask].assign(**{timestamp_col: timestamps[mask]})
 
 
 def validate_trades_df(
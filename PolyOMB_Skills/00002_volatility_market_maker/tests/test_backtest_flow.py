@@ -19,6 +19,7 @@ from .backtest_engine import (
     VolatilityMarketMakerStrategy,
     Signal,
     Trade,
+    TradeLog,
     BacktestResult,
     calculate_sharpe_ratio,
     calculate_max_drawdown,
@@ -89,6 +90,31 @@ class TestBacktestEngine:
             # 验证总盈亏计算正确
             manual_pnl = sum(t.pnl for t in result.trades if t.pnl is not None)
             assert abs(result.total_pnl - manual_pnl) < 0.01
+    
+    @pytest.mark.parametrize("tz", [None, "UTC"])
+    def test_backtest_array_path_matches_iterrows(self, sample_trades_1k, tz):
+        """
+        测试数组回测路径与逐行 step 路径结果一致 (含带时区的时间戳)
+        """
+        data = sample_trades_1k
+        if tz is not None:
+            data = data.assign(timestamp=data['timestamp'].dt.tz_localize(tz))
+        
+        results = []
+        for use_iterrows in (False, True):
+            strategy = VolatilityMarketMakerStrategy(dict(TEST_CONFIG))
+            engine = BacktestEngine(strategy)
+            results.append((engine.run(data, use_iterrows=use_iterrows), strategy, engine))
+        
+        (fast, fast_strategy, fast_engine), (slow, slow_strategy, slow_engine) = results
+        assert fast.trades == slow.trades
+        assert fast_engine.trades == slow_engine.trades == slow.trades
+        assert all(t.timestamp.tzinfo is not None for t in fast.trades) == (tz is not None)
+        pd.testing.assert_series_equal(fast.pnl_series, slow.pnl_series)
+        assert fast.statistics == slow.statistics
+        assert (fast_strategy.position, fast_strategy.avg_price, fast_strategy.cash) == (
+            slow_strategy.position, slow_strategy.avg_price, slow_strategy.cash
+        )
 
 
 class TestStrategyIntegration:
@@ -265,6 +291,22 @@ class TestBacktestResultValidation:
         
         win_rate = calculate_win_rate(trades)
         assert win_rate == 0.0
+    
+    def test_trade_log_matches_trade_list(self):
+        """测试 TradeLog 与 Trade 列表互相转换，统计结果一致"""
+        trades = [
+            Trade(timestamp=datetime(2024, 1, 1), action='BUY', size=10, price=0.5),
+            Trade(timestamp=datetime(2024, 1, 2), action='SELL', size=10, price=0.6, pnl=1.0),
+            Trade(timestamp=datetime(2024, 1, 3), action='BUY', size=10, price=0.55),
+            Trade(timestamp=datetime(2024, 1, 4), action='SELL', size=10, price=0.5, pnl=-0.5),
+        ]
+        
+        trade_log = TradeLog.from_trades(trades)
+        
+        assert len(trade_log) == len(trades)
+        assert trade_log.to_trades() == trades
+        assert calculate_win_rate(trade_log) == calculate_win_rate(trades)
+        assert calculate_pnl_from_trades(trade_log) == calculate_pnl_from_trades(trades)
 
 
 class TestTimePresetIntegration:
@@ -6,8 +6,10 @@
 
 import pytest
 import pandas as pd
+import pyarrow as pa
 from datetime import datetime
 import tempfile
+import os
 import shutil
 from pathlib import Path
 import sys
@@ -43,6 +45,37 @@ def loader(temp_cache_dir):
     )
 
 
+@pytest.fixture
+def smb_loader(temp_cache_dir):
+    """在临时目录中模拟 SMB 数据布局的加载器"""
+    data_path = Path(temp_cache_dir) / "smb"
+    markets_dir = data_path / "polymarket" / "markets"
+    trades_dir = data_path / "polymarket" / "trades"
+    markets_dir.mkdir(parents=True)
+    trades_dir.mkdir(parents=True)
+    
+    pd.DataFrame({
+        'condition_id': ['market_a', 'market_b'],
+        'clob_token_ids': ['["111", "222"]', '["333"]'],
+    }).to_parquet(markets_dir / "markets_0_10000.parquet")
+    
+    for start, (takers, makers) in enumerate([
+        (['111', '0', '333'], ['0', '222', '0']),
+        (['333', '111', '999'], ['0', '0', '0']),
+    ]):
+        pd.DataFrame({
+            'block_number': [start * 10 + i for i in range(3)],
+            'taker_asset_id': takers,
+            'maker_asset_id': makers,
+            'maker_amount': [1000, 2000, 3000],
+            'taker_amount': [2000, 1000, 1000],
+            'transaction_hash': ['0xabc'] * 3,
+            'signature': ['0x' + 'f' * 130] * 3,
+        }).to_parquet(trades_dir / f"trades_{start * 10}_{start * 10 + 9}.parquet")
+    
+    return MarketDataLoader(data_path=str(data_path), cache_dir=str(Path(temp_cache_dir) / "cache"))
+
+
 # =============================================================================
 # Tests
 # =============================================================================
@@ -71,9 +104,11 @@ class TestMarketDataLoader:
         market_id = "0x1234567890abcdef"
         cache_key = loader._get_cache_key(market_id)
         
-        # 应该是 MD5 哈希的前16位
+        # 应该是 16 位十六进制摘要，且同一市场稳定
         assert len(cache_key) == 16
         assert cache_key.isalnum()
+        assert cache_key == loader._get_cache_key(market_id)
+        assert cache_key != loader._get_cache_key(market_id + "0")
     
     def test_get_market_cache_path(self, loader):
         """测试缓存路径生成"""
@@ -145,6 +180,7 @@ class TestDataConversion:
         # 验证买卖方向
         assert result['side'].iloc[0] == 'BUY'  # maker_asset_id == 0
         assert result['side'].iloc[1] == 'SELL'  # maker_asset_id != 0
+        assert isinstance(result['side'].dtype, pd.CategoricalDtype)
     
     def test_price_clipping(self):
         """测试价格范围限制"""
@@ -162,6 +198,24 @@ class TestDataConversion:
         # 价格应在 [0.01, 0.99] 范围内
         assert result['price'].iloc[0] >= 0.01
         assert result['price'].iloc[0] <= 0.99
+    
+    def test_convert_arrow_table(self):
+        """测试 Arrow Table 输入与 DataFrame 输入结果一致"""
+        raw_data = pd.DataFrame({
+            'block_number': [100, 101, 102],
+            'transaction_hash': ['0x1', '0x2', '0x3'],
+            'maker_asset_id': [0, 123, 0],
+            'taker_asset_id': [456, 0, 789],
+            'maker_amount': [1000, 2000, 1500],
+            'taker_amount': [2000, 1000, 2500],
+        })
+        
+        from_pandas = convert_raw_trades_to_market_format(raw_data)
+        from_arrow = convert_raw_trades_to_market_format(pa.Table.from_pandas(raw_data))
+        
+        pd.testing.assert_frame_equal(from_pandas, from_arrow)
+        assert list(from_arrow['side']) == ['BUY', 'SELL', 'BUY']
+        assert list(from_arrow['market']) == ['unknown'] * 3
 
 
 class TestIntegration:
@@ -224,6 +278,10 @@ class TestCacheMechanism:
         
         assert len(result) == 3
         assert list(result['price']) == [0.5, 0.6, 0.7]
+        
+        # 列投影
+        projected = loader.get_market_trades(market_id, columns=['price'])
+        assert list(projected.columns) == ['price']
     
     def test_cache_stats_update(self, loader, temp_cache_dir):
         """测试缓存统计更新"""
@@ -239,6 +297,194 @@ class TestCacheMechanism:
         assert stats['trades_cached'] == 3
         assert stats['total_cache_size_mb'] >= 0  # 小文件可能四舍五入为0
 
+    def test_converted_cache(self, loader, temp_cache_dir):
+        """测试转换数据的 Feather 缓存"""
+        market_id = "test_market_456"
+        
+        # 创建模拟原始交易缓存
+        raw_data = pd.DataFrame({
+            'block_number': [100, 101, 102],
+            'maker_asset_id': [0, 123, 0],
+            'taker_asset_id': [456, 0, 789],
+            'maker_amount': [1000, 2000, 1500],
+            'taker_amount': [2000, 1000, 2500],
+        })
+        raw_data.to_parquet(loader._get_market_cache_path(market_id))
+        
+        first = loader.get_converted_trades(market_id)
+        assert loader._get_converted_cache_path(market_id).exists()
+        
+        # 第二次从转换缓存读取
+        second = loader.get_converted_trades(market_id)
+        pd.testing.assert_frame_equal(first, second)
+        
+        stats = loader.get_cache_stats()
+        assert stats['converted_cached'] == 1
+        assert stats['converted_misses'] == 1
+        assert stats['converted_hits'] == 1
+    
+    def test_converted_cache_version_mismatch(self, loader, temp_cache_dir):
+        """测试版本不匹配时转换缓存失效"""
+        market_id = "test_market_789"
+        
+        raw_data = pd.DataFrame({
+            'block_number': [100],
+            'maker_asset_id': [0],
+            'taker_asset_id': [456],
+            'maker_amount': [1000],
+            'taker_amount': [2000],
+        })
+        raw_data.to_parquet(loader._get_market_cache_path(market_id))
+        loader.get_converted_trades(market_id)
+        
+        # 模拟旧版本缓存
+        meta_path = loader._get_converted_cache_path(market_id).with_suffix('.json')
+        meta_path.write_text('{"version": 0}')
+        
+        loader.get_converted_trades(market_id)
+        
+        assert loader.get_cache_stats()['converted_misses'] == 2
+
+    
+    def test_iter_market_trades(self, loader, temp_cache_dir):
+        """测试按批次流式读取转换数据"""
+        market_id = "test_market_stream"
+        
+        raw_data = pd.DataFrame({
+            'block_number': list(range(100, 110)),
+            'maker_asset_id': [0, 1] * 5,
+            'taker_asset_id': [1, 0] * 5,
+            'maker_amount': [1000] * 10,
+            'taker_amount': [3000] * 10,
+        })
+        raw_data.to_parquet(loader._get_market_cache_path(market_id))
+        
+        batches = list(loader.iter_market_trades(market_id, batch_size=4))
+        
+        assert [b.num_rows for b in batches] == [4, 4, 2]
+        assert batches[0].schema.names == ['timestamp', 'price', 'size', 'side', 'market']
+        
+        streamed = pa.Table.from_batches(batches).to_pandas()
+        pd.testing.assert_frame_equal(streamed, loader.get_converted_trades(market_id))
+        
+        # 列投影
+        projected = list(loader.iter_market_trades(market_id, columns=['price']))
+        assert projected[0].schema.names == ['price']
+        assert sum(b.num_rows for b in projected) == 10
+
+        # 按给定顺序返回列
+        reordered = list(loader.iter_market_trades(market_id, columns=['side', 'price']))
+        assert reordered[0].schema.names == ['side', 'price']
+        
+        # 未知列调用时即抛出 KeyError
+        with pytest.raises(KeyError):
+            loader.iter_market_trades(market_id, columns=['missing'])
+    
+    
+    def test_stale_cache_served_and_refreshed(self, temp_cache_dir):
+        """测试过期缓存先返回旧数据并在后台刷新"""
+        loader = MarketDataLoader(cache_dir=temp_cache_dir, stale_ttl=60)
+        market_id = "test_market_stale"
+        
+        cache_path = loader._get_market_cache_path(market_id)
+        pd.DataFrame({'block_number': [1], 'price': [0.5]}).to_parquet(cache_path)
+        os.utime(cache_path, (0, 0))
+        fresh = pd.DataFrame({'block_number': [1, 2], 'price': [0.5, 0.6]})
+        loader._fetch_market_trades = lambda m: fresh
+        
+        result = loader.get_market_trades(market_id)
+        assert len(result) == 1
+        
+        loader._refresh_futures[market_id].result(timeout=10)
+        
+        stats = loader.get_cache_stats()
+        assert stats['stale_hits'] == 1
+        assert stats['background_refreshes'] == 1
+        assert len(pd.read_parquet(cache_path)) == 2
+    
+    def test_hard_ttl_forces_refetch(self, temp_cache_dir):
+        """测试超过 hard_ttl 的缓存阻塞重新读取"""
+        loader = MarketDataLoader(cache_dir=temp_cache_dir, stale_ttl=60, hard_ttl=3600)
+        market_id = "test_market_expired"
+        
+        cache_path = loader._get_market_cache_path(market_id)
+        pd.DataFrame({'block_number': [1], 'price': [0.5]}).to_parquet(cache_path)
+        os.utime(cache_path, (0, 0))
+        loader._fetch_market_trades = lambda m: pd.DataFrame({'block_number': [1, 2], 'price': [0.5, 0.6]})
+        
+        result = loader.get_market_trades(market_id)
+        
+        assert len(result) == 2
+        stats = loader.get_cache_stats()
+        assert stats['misses'] == 1
+        assert stats['stale_hits'] == 0
+
+
+class TestFetchTrades:
+    """从数据源读取交易测试"""
+    
+    def test_fetch_market_trades(self, smb_loader):
+        """测试并发读取多个文件并按市场过滤"""
+        result = smb_loader.get_market_trades('market_a', use_cache=False)
+        
+        assert list(result['block_number']) == [0, 1, 11]
+        assert (result['market_id'] == 'market_a').all()
+        assert 'signature' not in result.columns
+        
+        # 每个文件的 footer 只解析一次
+        assert len(smb_loader._pq_fragment_cache) == 2
+    
+    def test_fetch_native_asset_id_dtype(self, smb_loader):
+        """测试 asset id 为整数列时按原生类型过滤"""
+        trades_dir = smb_loader.data_path / "polymarket" / "trades"
+        for path in trades_dir.glob("*.parquet"):
+            df = pd.read_parquet(path)
+            df[['taker_asset_id', 'maker_asset_id']] = df[['taker_asset_id', 'maker_asset_id']].astype('int64')
+            df.to_parquet(path)
+        
+        result = smb_loader.get_market_trades('market_a', use_cache=False)
+        
+        assert list(result['block_number']) == [0, 1, 11]
+    
+    def test_lazy_market_index(self, smb_loader):
+        """测试市场索引在首次读取时按市场惰性构建"""
+        smb_loader.get_market_trades('market_b', use_cache=False)
+        
+        assert smb_loader._load_market_index() == {'market_b': (19, [(0, 9), (10, 19)])}
+        
+        # 只有 market_a 在第二个文件之后新增的文件中有交易
+        trades_dir = smb_loader.data_path / "polymarket" / "trades"
+        pd.DataFrame({
+            'block_number': [20, 21],
+            'taker_asset_id': ['111', '999'],
+            'maker_asset_id': ['0', '0'],
+            'maker_amount': [1000, 1000],
+            'taker_amount': [1000, 1000],
+            'transaction_hash': ['0xabc'] * 2,
+        }).to_parquet(trades_dir / "trades_20_29.parquet")
+        
+        result = smb_loader.get_market_trades('market_b', use_cache=False)
+        assert list(result['block_number']) == [2, 10]
+        assert smb_loader._load_market_index()['market_b'] == (29, [(0, 9), (10, 19)])
+        
+        # 从 Arrow 索引文件重新加载
+        smb_loader._market_index = None
+        assert smb_loader.index_file.suffix == '.arrow'
+        assert smb_loader._load_market_index() == {'market_b': (29, [(0, 9), (10, 19)])}
+    
+    def test_token_ids_cached_per_market(self, smb_loader):
+        """测试 token IDs 每个市场只解析一次"""
+        assert smb_loader._get_token_ids_for_market('market_a') == ['111', '222']
+        
+        smb_loader.get_market_info = None
+        token_ids = smb_loader._get_token_ids_for_market('market_a')
+        token_ids.append('999')
+        assert smb_loader._get_token_ids_for_market('market_a') == ['111', '222']
+    
+    def test_fetch_unknown_market(self, smb_loader):
+        """测试未知市场返回空结果"""
+        assert smb_loader.get_market_trades('missing', use_cache=False).empty
+
 
 def test_create_default_loader():
     """测试工厂函数"""
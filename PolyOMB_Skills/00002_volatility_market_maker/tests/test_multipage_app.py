@@ -41,6 +41,16 @@ class TestStateManager:
         for key in STATE_KEYS:
             assert key in mock_streamlit.session_state, f"Key {key} not initialized"
     
+    def test_init_state_skips_scan_once_initialized(self, mock_streamlit):
+        """Test init_state only populates defaults on the first call"""
+        from components.state_manager import init_state
+        
+        init_state()
+        del mock_streamlit.session_state["selected_skill"]
+        init_state()
+        
+        assert "selected_skill" not in mock_streamlit.session_state
+    
     def test_get_state_returns_default_for_missing_key(self, mock_streamlit):
         """Test get_state returns default value for missing key"""
         from components.state_manager import get_state
@@ -70,6 +80,17 @@ class TestStateManager:
         # Check defaults restored
         assert mock_streamlit.session_state["current_page"] == "skill_manager"
         assert mock_streamlit.session_state["selected_skill"] is None
+    
+    def test_debug_state_summarizes_dataframes(self, mock_streamlit):
+        """Test debug_state does not serialize DataFrame contents"""
+        import pandas as pd
+        from components.state_manager import debug_state, set_state
+        
+        set_state("backtest_results", {"trades": pd.DataFrame({"pnl": range(1000)})})
+        debug_state()
+        
+        dump = mock_streamlit.code.call_args[0][0]
+        assert "<DataFrame (1000, 1)>" in dump
 
 
 class TestCommonComponents:
@@ -205,6 +226,13 @@ class TestPageNavigation:
         # Verify other state is preserved (rerun was called)
         assert mock_streamlit.session_state["selected_skill"] == "test_skill"
         mock_streamlit.rerun.assert_called_once()
+    
+    def test_every_page_has_renderer(self, mock_streamlit):
+        """Test each page in PAGES is dispatched to a render function"""
+        from app import PAGE_RENDERERS
+        from components.common import PAGES
+        
+        assert set(PAGE_RENDERERS) == set(PAGES)
 
 
 class TestIntegrationFlow:
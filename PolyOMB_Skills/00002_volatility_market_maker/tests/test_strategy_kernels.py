@@ -0,0 +1,37 @@
+"""
+00002 test_strategy_kernels.py - 策略数值内核测试
+"""
+
+import pytest
+import numpy as np
+from pathlib import Path
+import sys
+
+# 添加父目录到路径
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from strategy_kernels import compute_pnl
+
+
+class TestComputePnl:
+    """compute_pnl 测试"""
+    
+    def test_matches_cumsum(self):
+        """测试与 NumPy cumsum 结果一致"""
+        position = np.concatenate([np.zeros(30), np.full(40, 50.0), np.zeros(30)])
+        returns = np.full(100, 0.01)
+        
+        pnl = compute_pnl(position, returns)
+        expected = np.where(position > 0, returns, 0.0).cumsum()
+        
+        np.testing.assert_allclose(pnl, expected)
+        assert pnl[-1] == pytest.approx(0.40)
+    
+    def test_empty(self):
+        """测试空输入"""
+        pnl = compute_pnl(np.empty(0), np.empty(0))
+        assert len(pnl) == 0
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
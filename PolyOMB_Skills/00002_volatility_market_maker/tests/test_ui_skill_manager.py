@@ -364,6 +364,49 @@ class TestSkillManagerIntegration:
         
         # 验证数量一致
         assert len(manager.skills) == initial_count
+    
+    def test_categories_index(self, tmp_path):
+        """测试类别索引去重排序并在重新加载后失效"""
+        for skill_id, category in [('00001_alpha', 'Zeta'), ('00002_beta', 'Alpha'), ('00003_gamma', 'Zeta')]:
+            (tmp_path / skill_id).mkdir()
+            (tmp_path / skill_id / f"{skill_id}.yaml").write_text(f"category: {category}\n")
+        
+        manager = SkillManager(skills_dir=tmp_path)
+        assert manager.categories == ['Alpha', 'Zeta']
+        
+        # 新增 Skill 后重新加载，类别索引应重新计算
+        (tmp_path / '00004_delta').mkdir()
+        (tmp_path / '00004_delta' / '00004_delta.yaml').write_text("category: Mid\n")
+        manager._load_skills()
+        
+        assert manager.categories == ['Alpha', 'Mid', 'Zeta']
+    
+    def test_search_with_category(self, tmp_path):
+        """测试关键词与类别组合搜索"""
+        for skill_id, category in [('00001_alpha_maker', 'Trading'), ('00002_beta_maker', 'Data'), ('00003_gamma', 'Trading')]:
+            (tmp_path / skill_id).mkdir()
+            (tmp_path / skill_id / f"{skill_id}.yaml").write_text(f"category: {category}\n")
+        
+        manager = SkillManager(skills_dir=tmp_path)
+        
+        assert [s.id for s in manager.search_skills('MAKER')] == ['00001_alpha_maker', '00002_beta_maker']
+        assert [s.id for s in manager.search_skills('maker', category='Trading')] == ['00001_alpha_maker']
+        assert [s.id for s in manager.search_skills('', category='Trading')] == ['00001_alpha_maker', '00003_gamma']
+        assert [s.id for s in manager.filter_skills(category='Data')] == ['00002_beta_maker']
+        assert manager.search_skills('nothing') == []
+    
+    def test_search_matches_description(self, tmp_path):
+        """测试长关键词走三元组索引时仍匹配描述且不跨字段匹配"""
+        for skill_id, desc in [('00001_alpha', 'Trades ETH volatility'), ('00002_beta', 'Tracks volume')]:
+            (tmp_path / skill_id).mkdir()
+            (tmp_path / skill_id / f"{skill_id}.description.md").write_text(desc)
+        
+        manager = SkillManager(skills_dir=tmp_path)
+        
+        assert [s.id for s in manager.search_skills('eth vol')] == ['00001_alpha']
+        assert [s.id for s in manager.search_skills('VOL')] == ['00001_alpha', '00002_beta']
+        # 名称 "Beta" 与描述 "Tracks" 拼接不应产生匹配
+        assert manager.search_skills('betatracks') == []
 
 
 # =============================================================================
@@ -7,10 +7,12 @@
 
 import streamlit as st
 import pandas as pd
+import numpy as np
 import yaml
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, List, Optional, Set, Tuple
 from dataclasses import dataclass
+from functools import cached_property
 from enum import Enum
 import json
 
@@ -41,6 +43,11 @@ class SkillInfo:
             self.dependencies = []
 
 
+def _trigrams(text: str) -> Set[str]:
+    """文本的所有三字符子串"""
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
 class SkillCard:
     """Skill卡片组件"""
     
@@ -110,15 +117,44 @@ class SkillManager:
         """从目录加载Skills"""
         self.skills = []
         
-        if not self.skills_dir.exists():
-            return
+        if self.skills_dir.exists():
+            # 扫描目录下的所有 000XX_* 文件夹
+            for skill_dir in sorted(self.skills_dir.glob("000[0-9][0-9]_*")):
+                if skill_dir.is_dir():
+                    skill_info = self._parse_skill_dir(skill_dir)
+                    if skill_info:
+                        self.skills.append(skill_info)
         
-        # 扫描目录下的所有 000XX_* 文件夹
-        for skill_dir in sorted(self.skills_dir.glob("000[0-9][0-9]_*")):
-            if skill_dir.is_dir():
-                skill_info = self._parse_skill_dir(skill_dir)
-                if skill_info:
-                    self.skills.append(skill_info)
+        self._build_indexes()
+    
+    def _build_indexes(self):
+        """
+        构建列式索引 (SoA)
+        
+        搜索和类别过滤只比较单个字段，按列存放后可以用 NumPy 掩码一次完成，
+        不必逐个访问 SkillInfo 对象。Skills 列表变化后需重新调用。
+        """
+        self._categories = np.array([s.category for s in self.skills], dtype=str)
+        self._names_lower = np.array([s.name.lower() for s in self.skills], dtype=str)
+        self._descriptions_lower = np.array([s.description.lower() for s in self.skills], dtype=str)
+        
+        # 三元组倒排索引: trigram -> 包含该三元组的 Skill 下标
+        self._trigram_index: Dict[str, Set[int]] = {}
+        for i, skill in enumerate(self.skills):
+            for text in (skill.name.lower(), skill.description.lower()):
+                for trigram in _trigrams(text):
+                    self._trigram_index.setdefault(trigram, set()).add(i)
+        
+        self.__dict__.pop('categories', None)
+    
+    def _gather(self, mask: np.ndarray) -> List[SkillInfo]:
+        """按掩码取回原始 SkillInfo 对象"""
+        return [self.skills[i] for i in np.flatnonzero(mask)]
+    
+    @cached_property
+    def categories(self) -> List[str]:
+        """已加载 Skills 的类别列表（去重并排序，首次访问时计算）"""
+        return sorted({s.category for s in self.skills})
     
     def _parse_skill_dir(self, skill_dir: Path) -> Optional[SkillInfo]:
         """解析Skill目录"""
@@ -172,20 +208,49 @@ class SkillManager:
         result = self.skills
         
         if category:
-            result = [s for s in result if s.category == category]
+            result = self._gather(self._categories == category)
         
+        # 状态可在运行时切换，直接读取对象字段
         if status:
             result = [s for s in result if s.status == status]
         
         return result
     
-    def search_skills(self, query: str) -> List[SkillInfo]:
-        """搜索Skills"""
+    def search_skills(self, query: str, category: Optional[str] = None) -> List[SkillInfo]:
+        """
+        搜索Skills
+        
+        Args:
+            query: 关键词（匹配名称或描述，不区分大小写）
+            category: 类别（可选）
+            
+        Returns:
+            匹配的 Skills
+        """
         query = query.lower()
-        return [
-            s for s in self.skills
-            if query in s.name.lower() or query in s.description.lower()
-        ]
+        
+        if len(query) >= 3:
+            # 先用三元组索引求候选集，再逐个确认子串匹配
+            candidates = None
+            for trigram in _trigrams(query):
+                hits = self._trigram_index.get(trigram, set())
+                candidates = hits if candidates is None else candidates & hits
+                if not candidates:
+                    return []
+            
+            mask = np.zeros(len(self.skills), dtype=bool)
+            for i in candidates:
+                if query in self._names_lower[i] or query in self._descriptions_lower[i]:
+                    mask[i] = True
+        else:
+            mask = (
+                (np.char.find(self._names_lower, query) >= 0) |
+                (np.char.find(self._descriptions_lower, query) >= 0)
+            )
+        
+        if category:
+            mask &= self._categories == category
+        return self._gather(mask)
     
     def check_dependencies(self, skill_info: SkillInfo) -> Tuple[bool, List[str]]:
         """
@@ -293,8 +358,7 @@ class SkillManager:
             search_query = st.text_input("🔍 搜索 Skills", placeholder="输入关键词...")
         
         with col2:
-            categories = list(set([s.category for s in self.skills]))
-            categories.insert(0, "全部")
+            categories = ["全部", *self.categories]
             selected_category = st.selectbox("📁 类别", categories)
         
         return search_query, selected_category
@@ -307,13 +371,8 @@ class SkillManager:
         search_query, selected_category = self.render_search_and_filter()
         
         # 过滤Skills
-        filtered_skills = self.skills
-        
-        if search_query:
-            filtered_skills = self.search_skills(search_query)
-        
-        if selected_category != "全部":
-            filtered_skills = [s for s in filtered_skills if s.category == selected_category]
+        category = None if selected_category == "全部" else selected_category
+        filtered_skills = self.search_skills(search_query or "", category=category)
         
         # 主布局：两列
         col_left, col_right = st.columns([2, 1])